@@ -16,7 +16,6 @@
 #       certain user specified tags
 
 # TODO - Use Cases TO DO:
-#  - Save an existing model to a file
 #  - Specific Model calls to
 #     - Remove a Node
 #     - Remove an Interface/Circuit
@@ -25,7 +24,6 @@
 #     *** These can all be done now, but require a few API calls to do s
 
 # TODO - User experience TO DO:
-#  - save_model call that will save model data to file
 #  - new client code example that uses a save_model call
 
 # TODO - test model with demands over LSPs and routed demands in same Model
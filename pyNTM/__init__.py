@@ -13,4 +13,13 @@ from .srlg import SRLG  # noqa: F401
 from .utilities import *  # noqa: F401,F403
 from .flex_model import FlexModel  # noqa: F401
 from .flex_model import Parallel_Link_Model  # noqa: F401
+from .graph_engine import GraphEngine  # noqa: F401
+from .routing_matrix import RoutingMatrix  # noqa: F401
+from .failure_sweep import FailureSweep  # noqa: F401
+from .scenario_executor import ScenarioExecutor  # noqa: F401
+from .monte_carlo import MonteCarloFailures  # noqa: F401
+from .scenario_runner import ScenarioRunner  # noqa: F401
+from .scenario_runner import load_scenarios  # noqa: F401
+from .columnar_store import ColumnarStore  # noqa: F401
+from .sqlite_store import SQLiteStore  # noqa: F401
 from .master_model import _MasterModel  # noqa: F401
@@ -0,0 +1,63 @@
+"""
+Per model change tracking.
+
+Each model has a ChangeTracker, reached from the model and from every
+Node, Interface, Demand, RSVP LSP and SRLG in it through their _tracker
+attribute.
+
+- topology_version is bumped by every change that can alter a routing
+  graph built from the model -- an Interface or Node failing or
+  unfailing, an Interface's cost, capacity, circuit_id or RSVP settings
+  changing.  A graph built at one topology version can be reused until
+  the version changes.
+- key_version is bumped when an object is renamed in place, which makes
+  the model's lookup indexes stale.
+- journal, while the model has an open checkpoint (see
+  _MasterModel.checkpoint), holds (object, attribute, previous value)
+  entries for the user edits to failure states, costs, capacities and
+  demand traffic.
+
+Objects that are not in a model have no tracker; changes to them are not
+tracked.
+"""
+
+
+class ChangeTracker(object):
+    """
+    Versions and undo journal of one model
+    """
+
+    def __init__(self):
+        self.topology_version = 0
+        self.key_version = 0
+        self.journal = None
+
+
+def topology_changed(model_object):
+    """
+    Bumps the topology version of model_object's model; call after any
+    change to model_object that can alter a routing graph
+    """
+    tracker = model_object._tracker
+    if tracker is not None:
+        tracker.topology_version += 1
+
+
+def key_changed(model_object):
+    """
+    Bumps the key version of model_object's model; call after a change to
+    an attribute that is part of model_object's _key
+    """
+    tracker = model_object._tracker
+    if tracker is not None:
+        tracker.key_version += 1
+
+
+def record_change(model_object, attribute, value):
+    """
+    Records in the undo journal of model_object's model, if it has an open
+    checkpoint, that model_object's attribute held value before a change
+    """
+    tracker = model_object._tracker
+    if tracker is not None and tracker.journal is not None:
+        tracker.journal.append((model_object, attribute, value))
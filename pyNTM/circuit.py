@@ -16,6 +16,21 @@ class Circuit(object):
     def _key(self):
         return (self.interface_a._key, self.interface_b._key)
 
+    @property
+    def failure_probability(self):
+        """
+        Probability that the Circuit is failed, for Monte Carlo failure
+        simulation: the larger failure_probability of its two Interfaces.
+        Setting it sets both Interfaces, so it outlives the Circuit objects
+        that each simulation builds again.
+        """
+        return max(self.interface_a.failure_probability, self.interface_b.failure_probability)
+
+    @failure_probability.setter
+    def failure_probability(self, probability):
+        self.interface_a.failure_probability = probability
+        self.interface_b.failure_probability = probability
+
     def get_circuit_interfaces(self, model):
         """
         Return the Circuit's component Interface objects in model object
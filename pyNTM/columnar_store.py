@@ -0,0 +1,374 @@
+"""
+Memory-mapped columnar store of a model's topology, Demands and
+simulation results.
+
+The store is a single file: a fixed header, a JSON manifest and then one
+fixed-width column per attribute, each 8 byte aligned::
+
+    magic (8 bytes, b'PYNTMCOL') | format version (uint16) | manifest length (uint32) | manifest | columns
+
+Numeric columns are native byte order arrays of the typecodes of the array
+module.  A string table is two columns: '<name>_offsets' ('q', one more
+entry than strings) and '<name>' ('B', the UTF-8 bytes of every string).
+Nodes, Interfaces and Demands are referred to by their position (id) in
+their columns; Interfaces and Demands are ordered by _key, as in
+RoutingMatrix.
+
+ColumnarStore opens the file with mmap and hands out the columns as
+memoryviews of the mapping, so several processes can read one simulated
+model without copying it or building its objects.  Node, Interface and
+Demand objects are only built when asked for, one id at a time::
+
+    model.save_columnar_store('model.columns')
+
+    store = ColumnarStore('model.columns')
+    utilization = store.column('interface_utilization')
+    busy = [interface_id for interface_id in range(store.interface_count)
+            if utilization[interface_id] > 80]
+    store.interface(busy[0])
+
+Columns:
+
+- node_name: string table
+- node_lat, node_lon: 'd'
+- node_failed: 'b'
+- interface_name, interface_circuit_id: string tables; circuit ids are
+  JSON encoded ('null' if None)
+- interface_node, interface_remote_node: 'i', Node ids
+- interface_cost: 'q'
+- interface_capacity, interface_percent_reservable_bandwidth: 'd'
+- interface_rsvp_enabled, interface_failed: 'b'
+- interface_traffic, interface_utilization, interface_reserved_bandwidth:
+  'd'; traffic and utilization are NaN for failed Interfaces
+- demand_name: string table
+- demand_source, demand_dest: 'i', Node ids
+- demand_traffic: 'd'
+- demand_routed: 'b'
+- routing_offsets ('q'), routing_interfaces ('i'), routing_fractions ('d'):
+  the routing matrix; the Interfaces carrying Demand j and the fraction
+  of its traffic on each are at positions
+  routing_offsets[j]:routing_offsets[j + 1]
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from .demand import Demand
+from .exceptions import ModelException
+from .interface import Interface
+from .node import Node
+from .routing_matrix import RoutingMatrix
+
+MAGIC = b'PYNTMCOL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sHI')
+ALIGNMENT = 8
+
+NAN = float('nan')
+
+
+def _string_table(name, strings):
+    """
+    Returns the [(column name, array), ...] of a string table
+    """
+    offsets = array('q', [0])
+    data = array('B')
+    for string in strings:
+        data.frombytes(string.encode('utf-8'))
+        offsets.append(len(data))
+    return [(name + '_offsets', offsets), (name, data)]
+
+
+def _model_columns(model):
+    """
+    Returns the [(column name, array), ...] of model and its simulation results
+    """
+    routing = RoutingMatrix.from_model(model)
+    nodes = sorted(model.node_objects, key=lambda node: node.name)
+    node_ids = {node.name: node_id for node_id, node in enumerate(nodes)}
+    interfaces = routing.interfaces
+    demands = routing.demands
+
+    columns = _string_table('node_name', (node.name for node in nodes))
+    columns += [
+        ('node_lat', array('d', (node.lat for node in nodes))),
+        ('node_lon', array('d', (node.lon for node in nodes))),
+        ('node_failed', array('b', (node.failed for node in nodes))),
+    ]
+
+    columns += _string_table('interface_name', (interface.name for interface in interfaces))
+    columns += _string_table('interface_circuit_id', (json.dumps(interface.circuit_id) for interface in interfaces))
+    columns += [
+        ('interface_node', array('i', (node_ids[interface.node_object.name] for interface in interfaces))),
+        ('interface_remote_node', array('i', (node_ids[interface.remote_node_object.name]
+                                              for interface in interfaces))),
+        ('interface_cost', array('q', (interface.cost for interface in interfaces))),
+        ('interface_capacity', array('d', (interface.capacity for interface in interfaces))),
+        ('interface_percent_reservable_bandwidth', array('d', (interface.percent_reservable_bandwidth
+                                                               for interface in interfaces))),
+        ('interface_rsvp_enabled', array('b', (interface.rsvp_enabled for interface in interfaces))),
+        ('interface_failed', array('b', (interface.failed for interface in interfaces))),
+        ('interface_traffic', array('d', (NAN if interface.failed else interface.traffic
+                                          for interface in interfaces))),
+        ('interface_utilization', array('d', (NAN if interface.failed else interface.utilization
+                                              for interface in interfaces))),
+        ('interface_reserved_bandwidth', array('d', (interface.reserved_bandwidth for interface in interfaces))),
+    ]
+
+    columns += _string_table('demand_name', (demand.name for demand in demands))
+    columns += [
+        ('demand_source', array('i', (node_ids[demand.source_node_object.name] for demand in demands))),
+        ('demand_dest', array('i', (node_ids[demand.dest_node_object.name] for demand in demands))),
+        ('demand_traffic', array('d', (demand.traffic for demand in demands))),
+        ('demand_routed', array('b', (demand._routed for demand in demands))),
+        ('routing_offsets', array('q', routing.column_offsets)),
+        ('routing_interfaces', array('i', routing.row_ids)),
+        ('routing_fractions', routing.fractions),
+    ]
+
+    return columns
+
+
+def save_columnar_store(model, store_file):
+    """
+    Writes model and its simulation results to a columnar store file
+
+    :param model: PerformanceModel or FlexModel object; run
+    update_simulation() on it first
+    :param store_file: path of the store file
+    """
+    columns = _model_columns(model)
+
+    manifest = {'byteorder': sys.byteorder, 'columns': {}}
+    manifest_length = 0
+    # Column offsets depend on the manifest's length, which depends on the
+    # offsets; repeat until the length settles
+    while True:
+        offset = HEADER.size + manifest_length
+        for name, values in columns:
+            offset += -offset % ALIGNMENT
+            manifest['columns'][name] = [values.typecode, offset, len(values)]
+            offset += len(values) * values.itemsize
+        encoded_manifest = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+        if len(encoded_manifest) == manifest_length:
+            break
+        manifest_length = len(encoded_manifest)
+
+    with open(store_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, manifest_length))
+        f.write(encoded_manifest)
+        for name, values in columns:
+            f.write(b'\0' * (manifest['columns'][name][1] - f.tell()))
+            values.tofile(f)
+
+
+class ColumnarStore(object):
+    """
+    Read-only, memory-mapped view of a store written by
+    save_columnar_store (or model.save_columnar_store)
+
+    - node_count, interface_count, demand_count: number of each object
+    - column(name): zero-copy memoryview of a column
+    - node(id), interface(id), demand(id): object views, built on first use
+
+    Close the store (or use it as a context manager) once the memoryviews
+    returned by column() are no longer used.
+    """
+
+    def __init__(self, store_file):
+        self.store_file = store_file
+        with open(store_file, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise ModelException("{} is not a columnar model store".format(store_file))
+
+        try:
+            self._manifest = self._read_manifest()
+        except ModelException:
+            self._mmap.close()
+            raise
+
+        self._buffer = memoryview(self._mmap)
+        self._columns = {}
+        self._nodes = {}
+        self._interfaces = {}
+        self._demands = {}
+        self._interface_ids = None
+        self._demand_ids = None
+
+        self.node_count = len(self.column('node_name_offsets')) - 1
+        self.interface_count = len(self.column('interface_node'))
+        self.demand_count = len(self.column('demand_source'))
+
+    def __repr__(self):
+        return 'ColumnarStore(Nodes: %s, Interfaces: %s, Demands: %s)' % \
+               (self.node_count, self.interface_count, self.demand_count)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_manifest(self):
+        if len(self._mmap) < HEADER.size:
+            raise ModelException("{} is not a columnar model store".format(self.store_file))
+        magic, version, manifest_length = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ModelException("{} is not a columnar model store".format(self.store_file))
+        if version > FORMAT_VERSION:
+            msg = "{} is columnar store format version {}; this version of pyNTM reads up to version {}".format(
+                self.store_file, version, FORMAT_VERSION)
+            raise ModelException(msg)
+
+        try:
+            manifest = json.loads(self._mmap[HEADER.size:HEADER.size + manifest_length].decode('utf-8'))
+        except ValueError as error:
+            raise ModelException("{} is a damaged columnar model store: {}".format(self.store_file, error))
+        if manifest['byteorder'] != sys.byteorder:
+            msg = "{} was written on a {} endian machine; this machine is {} endian".format(
+                self.store_file, manifest['byteorder'], sys.byteorder)
+            raise ModelException(msg)
+        return manifest
+
+    def close(self):
+        """
+        Unmaps the store file; memoryviews from column() must have been
+        released
+        """
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._buffer.release()
+        self._mmap.close()
+
+    def column_names(self):
+        """
+        Returns the names of the columns in the store
+        """
+        return list(self._manifest['columns'])
+
+    def column(self, name):
+        """
+        Returns a column as a memoryview of the mapped file; indexing it
+        gives numbers, as with an array of the column's typecode
+
+        :param name: column name; see the module docstring
+        :return: memoryview
+        """
+        if name not in self._columns:
+            if name not in self._manifest['columns']:
+                raise ModelException("{} has no column {}".format(self.store_file, name))
+            typecode, offset, length = self._manifest['columns'][name]
+            itemsize = array(typecode).itemsize
+            self._columns[name] = self._buffer[offset:offset + length * itemsize].cast(typecode)
+        return self._columns[name]
+
+    def string(self, table, index):
+        """
+        Returns string index of a string table
+
+        :param table: string table name, such as 'interface_name'
+        :param index: position of the string in the table
+        :return: str
+        """
+        offsets = self.column(table + '_offsets')
+        return self.column(table)[offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def node(self, node_id):
+        """
+        Returns the Node with id node_id
+        """
+        node = self._nodes.get(node_id)
+        if node is None:
+            node = Node(self.string('node_name', node_id), self.column('node_lat')[node_id],
+                        self.column('node_lon')[node_id])
+            node._failed = bool(self.column('node_failed')[node_id])
+            self._nodes[node_id] = node
+        return node
+
+    def interface(self, interface_id):
+        """
+        Returns an Interface view of interface_id, with the traffic and
+        reserved bandwidth from the simulation
+        """
+        interface = self._interfaces.get(interface_id)
+        if interface is None:
+            column = self.column
+            interface = Interface(self.string('interface_name', interface_id),
+                                  column('interface_cost')[interface_id],
+                                  column('interface_capacity')[interface_id],
+                                  self.node(column('interface_node')[interface_id]),
+                                  self.node(column('interface_remote_node')[interface_id]),
+                                  json.loads(self.string('interface_circuit_id', interface_id)),
+                                  bool(column('interface_rsvp_enabled')[interface_id]),
+                                  column('interface_percent_reservable_bandwidth')[interface_id])
+            interface._reserved_bandwidth = column('interface_reserved_bandwidth')[interface_id]
+            if column('interface_failed')[interface_id]:
+                interface._failed = True
+                interface.traffic = 'Down'
+            else:
+                interface.traffic = column('interface_traffic')[interface_id]
+            self._interfaces[interface_id] = interface
+        return interface
+
+    def demand(self, demand_id):
+        """
+        Returns a Demand view of demand_id; its routing is given by
+        demand_routing, not by Demand.path
+        """
+        demand = self._demands.get(demand_id)
+        if demand is None:
+            column = self.column
+            demand = Demand(self.node(column('demand_source')[demand_id]),
+                            self.node(column('demand_dest')[demand_id]),
+                            column('demand_traffic')[demand_id],
+                            self.string('demand_name', demand_id))
+            self._demands[demand_id] = demand
+        return demand
+
+    def interface_id(self, interface_name, node_name):
+        """
+        Returns the id of the Interface named interface_name on node_name.
+        The first call builds a lookup dict of every Interface.
+        """
+        if self._interface_ids is None:
+            interface_node = self.column('interface_node')
+            node_names = [self.string('node_name', node_id) for node_id in range(self.node_count)]
+            self._interface_ids = {(self.string('interface_name', interface_id),
+                                    node_names[interface_node[interface_id]]): interface_id
+                                   for interface_id in range(self.interface_count)}
+        try:
+            return self._interface_ids[(interface_name, node_name)]
+        except KeyError:
+            raise ModelException('specified interface does not exist')
+
+    def demand_id(self, source_node_name, dest_node_name, demand_name='none'):
+        """
+        Returns the id of the Demand from source_node_name to dest_node_name
+        named demand_name.  The first call builds a lookup dict of every
+        Demand.
+        """
+        if self._demand_ids is None:
+            source, dest = self.column('demand_source'), self.column('demand_dest')
+            node_names = [self.string('node_name', node_id) for node_id in range(self.node_count)]
+            self._demand_ids = {(node_names[source[demand_id]], node_names[dest[demand_id]],
+                                 self.string('demand_name', demand_id)): demand_id
+                                for demand_id in range(self.demand_count)}
+        try:
+            return self._demand_ids[(source_node_name, dest_node_name, demand_name)]
+        except KeyError:
+            raise ModelException('no matching demand')
+
+    def demand_routing(self, demand_id):
+        """
+        Returns [(interface id, fraction of the Demand's traffic), ...] for
+        each Interface that carries demand_id
+        """
+        offsets = self.column('routing_offsets')
+        start, end = offsets[demand_id], offsets[demand_id + 1]
+        return list(zip(self.column('routing_interfaces')[start:end], self.column('routing_fractions')[start:end]))
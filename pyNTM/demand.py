@@ -1,23 +1,105 @@
 """A Demand is a traffic load that traverses the network from a source Node
 to a destination Node"""
 
+from .change_tracking import key_changed, record_change
+
 
 class Demand(object):
     """
     A representation of traffic load on the modeled network
     """
 
+    _tracker = None  # ChangeTracker of the model holding the demand
+
+    # Attributes written by update_simulation; see _MasterModel.checkpoint
+    _simulation_attributes = ('_path', '_path_generator', '_ecmp_splits_generator', '_ecmp_splits_cache',
+                              '_igp_routed')
+
     def __init__(self, source_node_object, dest_node_object, traffic=0, name='none'):
         self.source_node_object = source_node_object
         self.dest_node_object = dest_node_object
         self.traffic = traffic
         self.name = name
+        self._ecmp_splits_cache = None
         self.path = 'Unrouted'
 
         # Validate traffic value
         if not(isinstance(traffic, (int, float))) or traffic < 0:
             raise ValueError('Must be a positive int or float')
 
+    @property
+    def name(self):
+        """Name of the demand"""
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        key_changed(self)
+
+    @property
+    def traffic(self):
+        """Traffic load of the demand"""
+        return self._traffic
+
+    @traffic.setter
+    def traffic(self, traffic):
+        if hasattr(self, '_traffic'):  # Not a new object
+            record_change(self, '_traffic', self._traffic)
+        self._traffic = traffic
+
+    @property
+    def path(self):
+        """
+        List of paths the demand takes or 'Unrouted'; each path is a list of
+        Interface objects or an RSVP_LSP.  IGP paths are only enumerated the
+        first time path is read after a simulation.
+        """
+        if self._path_generator is not None:
+            self._path = self._path_generator()
+            self._path_generator = None
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+        self._path_generator = None
+        self._ecmp_splits_generator = None
+        self._igp_routed = False
+
+    def _set_ecmp_route(self, ecmp_splits_generator, path_generator):
+        """
+        Routes the demand over the IGP shortest paths
+
+        :param ecmp_splits_generator: callable that returns a dict of
+        Interface: fraction of the demand's traffic on the Interface
+        :param path_generator: callable that returns the list of paths
+        :return: None
+        """
+        self._path = None
+        self._path_generator = path_generator
+        self._ecmp_splits_generator = ecmp_splits_generator
+        self._ecmp_splits_cache = None
+        self._igp_routed = True
+
+    @property
+    def _ecmp_splits(self):
+        """
+        dict of Interface: fraction of the demand's traffic on the Interface
+        if the demand is IGP routed by the simulation, otherwise None
+        """
+        if not self._igp_routed:
+            return None
+        if self._ecmp_splits_generator is not None:
+            self._ecmp_splits_cache = self._ecmp_splits_generator()
+            self._ecmp_splits_generator = None
+        return self._ecmp_splits_cache
+
+    @property
+    def _routed(self):
+        """True if the demand has a path; does not enumerate IGP paths"""
+        return self._igp_routed or self._path != 'Unrouted'
+
     @property
     def _key(self):
         """Unique identifier for the demand: (Node('source').name, Node('dest').name, name)"""
@@ -42,11 +124,8 @@ class Demand(object):
         demand_path = []
 
         # Find all LSPs that can carry the demand:
-        for lsp in (lsp for lsp in model.rsvp_lsp_objects):
-            if (lsp.source_node_object == self.source_node_object and
-                    lsp.dest_node_object == self.dest_node_object and
-                    'Unrouted' not in lsp.path):
-
+        for lsp in model._lookup_all('lsp_groups', (self.source_node_object.name, self.dest_node_object.name)):
+            if 'Unrouted' not in lsp.path:
                 demand_path.append(lsp)
 
         # If demand can't be carried by LSP, do shortest path routing
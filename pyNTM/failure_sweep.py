@@ -0,0 +1,298 @@
+"""
+N-k failure sweeps over circuits, Nodes and SRLGs.
+
+A FailureSweep simulates the model once for a baseline and then runs each
+failure scenario against it incrementally:
+
+- RSVP LSPs are placed again warm started from the baseline placement (see
+  lsp_warm_start), so only the LSPs that cross a failed Interface, or that a
+  moved LSP makes room for, go through constrained SPF
+- only the Demands that are affected are routed again: IGP routed Demands
+  with traffic on a failed Interface and Demands whose parallel LSP group
+  was placed differently
+- all other Demands keep their baseline traffic on each Interface
+
+After each scenario the failed state, reserved bandwidth and LSP paths of
+the model are restored to the baseline, so a sweep leaves the model as the
+baseline simulation left it.
+
+A scenario is a tuple of failed elements; each element is one of:
+
+- ('circuit', interface_name, node_name): the circuit holding the Interface
+- ('node', node_name)
+- ('srlg', srlg_name)
+"""
+
+from array import array
+from itertools import combinations
+
+from .change_tracking import topology_changed
+from .exceptions import ModelException
+from .graph_engine import GraphEngine, ecmp_splits
+
+
+class FailureSweep(object):
+    """
+    Runs failure scenarios against a baseline simulation of model.  Building
+    a FailureSweep runs update_simulation on model.
+
+    Demand traffic is put on Interfaces as in traffic_propagation =
+    'per_demand': each IGP routed Demand's share of an Interface is rounded
+    to 1 decimal place.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+        # The baseline placement log warm starts every scenario's LSP placement
+        lsp_rerouting = model.lsp_rerouting
+        model.lsp_rerouting = 'incremental'
+        try:
+            model.update_simulation()
+        finally:
+            model.lsp_rerouting = lsp_rerouting
+        self._baseline_log = model._lsp_routing_log
+
+        self.interfaces = list(model.interface_objects)
+        self.interface_ids = {interface: interface_id for interface_id, interface in enumerate(self.interfaces)}
+        self._failed_interfaces = set(interface for interface in self.interfaces if interface.failed)
+        self._failed_nodes = set(node for node in model.node_objects if node.failed)
+        self._failed_srlgs = set(srlg for srlg in model.srlg_objects if srlg.failed)
+        self._reserved_bandwidth = [interface._reserved_bandwidth for interface in self.interfaces]
+        self._lsp_state = {lsp: (lsp.path, lsp.reserved_bandwidth, lsp._setup_bandwidth)
+                           for lsp in model.rsvp_lsp_objects}
+        self._lsp_paths = {lsp: self._lsp_path_key(lsp) for lsp in model.rsvp_lsp_objects}
+
+        # Baseline traffic each Demand puts on each Interface
+        self._demand_traffic = {}
+        self._interface_demands = {}
+        self._baseline_traffic = array('d', [0.0]) * len(self.interfaces)
+        for demand in model.demand_objects:
+            traffic_per_int = self._baseline_demand_traffic(demand)
+            self._demand_traffic[demand] = traffic_per_int
+            for interface, traffic in traffic_per_int.items():
+                self._baseline_traffic[self.interface_ids[interface]] += traffic
+                self._interface_demands.setdefault(interface, set()).add(demand)
+        self._baseline_unrouted = set(demand for demand in model.demand_objects if not demand._routed)
+
+    @staticmethod
+    def _lsp_path_key(lsp):
+        if lsp.path == 'Unrouted':
+            return 'Unrouted'
+        return tuple(lsp.path['interfaces']), lsp.reserved_bandwidth
+
+    def _routed_lsps(self, demand):
+        return [lsp for lsp in self.model._lookup_all('lsp_groups', (demand.source_node_object.name,
+                                                                     demand.dest_node_object.name))
+                if lsp.path != 'Unrouted']
+
+    def _baseline_demand_traffic(self, demand):
+        """
+        Returns dict of Interface: traffic from demand in the baseline simulation
+        """
+        if demand._igp_routed:
+            return self.model._demand_traffic_per_int(demand)
+        if not demand._routed:
+            return {}
+        return self._lsp_demand_traffic(demand, self._routed_lsps(demand))
+
+    @staticmethod
+    def _lsp_demand_traffic(demand, routed_lsps):
+        # The demand's traffic is split evenly across the routed LSPs in its group
+        traffic_per_lsp = demand.traffic / len(routed_lsps)
+        traffic_per_int = {}
+        for lsp in routed_lsps:
+            for interface in lsp.path['interfaces']:
+                traffic_per_int[interface] = traffic_per_int.get(interface, 0) + traffic_per_lsp
+        return traffic_per_int
+
+    def scenarios(self, element_types=('circuit', 'node', 'srlg'), max_failures=1):
+        """
+        Returns the list of scenarios that fail every combination of up to
+        max_failures elements of element_types
+
+        :param element_types: any of 'circuit', 'node' and 'srlg'
+        :param max_failures: most elements failed at once; 2 sweeps every
+        single element and every pair of elements
+        :return: list of scenarios
+        """
+        elements = []
+        for element_type in element_types:
+            if element_type == 'circuit':
+                circuits = sorted(self.model.circuit_objects, key=lambda circuit: circuit._key())
+                elements += [('circuit', circuit.interface_a.name, circuit.interface_a.node_object.name)
+                             for circuit in circuits]
+            elif element_type == 'node':
+                nodes = sorted(self.model.node_objects, key=lambda node: node.name)
+                elements += [('node', node.name) for node in nodes]
+            elif element_type == 'srlg':
+                srlgs = sorted(self.model.srlg_objects, key=lambda srlg: srlg.name)
+                elements += [('srlg', srlg.name) for srlg in srlgs]
+            else:
+                raise ModelException("element_types must be 'circuit', 'node' or 'srlg'")
+
+        scenarios = []
+        for failures in range(1, max_failures + 1):
+            scenarios += list(combinations(elements, failures))
+        return scenarios
+
+    def _fail(self, element):
+        element_type = element[0]
+        if element_type == 'circuit':
+            self.model.fail_interface(element[1], element[2])
+        elif element_type == 'node':
+            self.model.fail_node(element[1])
+        elif element_type == 'srlg':
+            self.model.fail_srlg(element[1])
+        else:
+            raise ModelException("scenario elements must be 'circuit', 'node' or 'srlg' tuples")
+
+    def _restore(self):
+        """
+        Puts the model back in its baseline state
+        """
+        for interface_id, interface in enumerate(self.interfaces):
+            interface._failed = interface in self._failed_interfaces
+            interface._reserved_bandwidth = self._reserved_bandwidth[interface_id]
+        for node in self.model.node_objects:
+            node._failed = node in self._failed_nodes
+        for srlg in self.model.srlg_objects:
+            srlg._failed = srlg in self._failed_srlgs
+        for lsp, (path, reserved_bandwidth, setup_bandwidth) in self._lsp_state.items():
+            lsp.path = path
+            lsp.reserved_bandwidth = reserved_bandwidth
+            lsp._setup_bandwidth = setup_bandwidth
+        self.model._lsp_routing_log = self._baseline_log
+        topology_changed(self.model)
+
+    def _route_demands(self, demands):
+        """
+        Routes demands again over the failed model, keeping the baseline
+        traffic of every other Demand, and returns (traffic, unrouted_demands):
+        traffic is an array of the traffic on each Interface, by interface
+        id, and unrouted_demands is the set of Demands that do not route
+        """
+        model = self.model
+        traffic = array('d', self._baseline_traffic)
+        unrouted_demands = set(self._baseline_unrouted)
+        engine = None
+        spf_dags = {}
+        for demand in demands:
+            for interface, demand_traffic in self._demand_traffic[demand].items():
+                traffic[self.interface_ids[interface]] -= demand_traffic
+            unrouted_demands.discard(demand)
+
+            routed_lsps = self._routed_lsps(demand)
+            if routed_lsps:
+                traffic_per_int = self._lsp_demand_traffic(demand, routed_lsps)
+            else:
+                if engine is None:
+                    engine = GraphEngine.from_model(model)
+                src = demand.source_node_object.name
+                dest = demand.dest_node_object.name
+                if src not in spf_dags:
+                    spf_dags[src] = engine.interface_spf(src)
+                pred, dist = spf_dags[src]
+                if dest not in pred:
+                    unrouted_demands.add(demand)
+                    continue
+                traffic_per_int = {interface: round(demand.traffic * fraction, 1)
+                                   for interface, fraction in ecmp_splits(pred, dist, src, dest).items()}
+
+            for interface, demand_traffic in traffic_per_int.items():
+                traffic[self.interface_ids[interface]] += demand_traffic
+
+        return traffic, unrouted_demands
+
+    def run_scenario(self, scenario):
+        """
+        Runs one failure scenario
+
+        :param scenario: tuple of failed elements
+        :return: dict with keys
+
+            - 'traffic': dict of Interface: traffic ('Down' if failed)
+            - 'utilization': dict of Interface: utilization ('Int is down' if failed)
+            - 'unrouted_demands': list of Demands that cannot be routed
+        """
+        model = self.model
+        lsp_rerouting = model.lsp_rerouting
+        try:
+            for element in scenario:
+                self._fail(element)
+            newly_failed = [interface for interface in self.interfaces
+                            if interface.failed and interface not in self._failed_interfaces]
+
+            # Place the LSPs again; most keep their baseline path
+            changed_groups = set()
+            if model.rsvp_lsp_objects:
+                model.lsp_rerouting = 'incremental'
+                model._route_lsps()
+                for lsp, baseline_path in self._lsp_paths.items():
+                    if self._lsp_path_key(lsp) != baseline_path:
+                        changed_groups.add((lsp.source_node_object.name, lsp.dest_node_object.name))
+
+            affected_demands = set()
+            for interface in newly_failed:
+                affected_demands.update(self._interface_demands.get(interface, ()))
+            for group in changed_groups:
+                affected_demands.update(model._lookup_all('demand_groups', group))
+
+            traffic, unrouted_demands = self._route_demands(affected_demands)
+
+            results = {'traffic': {}, 'utilization': {}, 'unrouted_demands': list(unrouted_demands)}
+            for interface_id, interface in enumerate(self.interfaces):
+                if interface.failed:
+                    results['traffic'][interface] = 'Down'
+                    results['utilization'][interface] = 'Int is down'
+                else:
+                    results['traffic'][interface] = traffic[interface_id]
+                    util = (traffic[interface_id] / interface.capacity) * 100
+                    results['utilization'][interface] = float('%.2f' % util)
+            return results
+        finally:
+            model.lsp_rerouting = lsp_rerouting
+            self._restore()
+
+    def run(self, scenarios):
+        """
+        Runs each scenario and collects the worst case utilization
+
+        :param scenarios: iterable of scenarios
+        :return: see worst_case
+        """
+        return worst_case((tuple(scenario), self.run_scenario(tuple(scenario))) for scenario in scenarios)
+
+
+def worst_case(scenario_results):
+    """
+    Collects the worst case utilization of failure scenarios
+
+    :param scenario_results: iterable of (scenario, results) where results
+    is a dict with the 'utilization' and 'unrouted_demands' of
+    FailureSweep.run_scenario
+    :return: dict with keys
+
+        - 'scenarios': dict of scenario: {'max_utilization': <highest
+          Interface utilization>, 'interface': <Interface with it>,
+          'unrouted_demands': <list of Demands that cannot be routed>}
+        - 'interfaces': dict of Interface: {'max_utilization': <highest
+          utilization across the scenarios>, 'scenario': <scenario with it>}
+          for each Interface that is up in at least one scenario
+    """
+    scenario_worst = {}
+    interface_worst = {}
+    for scenario, results in scenario_results:
+        worst = {'max_utilization': None, 'interface': None, 'unrouted_demands': results['unrouted_demands']}
+        for interface, util in results['utilization'].items():
+            if util == 'Int is down':
+                continue
+            if worst['max_utilization'] is None or util > worst['max_utilization']:
+                worst['max_utilization'] = util
+                worst['interface'] = interface
+            interface_results = interface_worst.get(interface)
+            if interface_results is None or util > interface_results['max_utilization']:
+                interface_worst[interface] = {'max_utilization': util, 'scenario': scenario}
+        scenario_worst[scenario] = worst
+
+    return {'scenarios': scenario_worst, 'interfaces': interface_worst}
@@ -16,6 +16,7 @@ This model type allows multiple links/parallel links between 2 nodes.
 There will be a performance impact in this model variant.
 """
 
+from collections import Counter
 from pprint import pprint
 
 import itertools
@@ -26,7 +27,6 @@ from .circuit import Circuit
 from .interface import Interface
 from .exceptions import ModelException
 from .master_model import _MasterModel
-from .utilities import find_end_index
 from .node import Node
 
 # TODO - call to analyze model for Unrouted LSPs and LSPs not on shortest path
@@ -71,7 +71,6 @@ class FlexModel(_MasterModel):
         self.circuit_objects = set()
         self.rsvp_lsp_objects = rsvp_lsp_objects
         self.srlg_objects = set()
-        self._parallel_lsp_groups = {}
 
         super().__init__(interface_objects, node_objects, demand_objects, rsvp_lsp_objects)
 
@@ -103,9 +102,11 @@ class FlexModel(_MasterModel):
         """
 
         new_interface_objects, new_node_objects = self._make_network_interfaces(network_interfaces)
-        self.node_objects = self.node_objects.union(new_node_objects)
-        self.interface_objects = self.interface_objects.union(new_interface_objects)
-        self.validate_model()
+        self.node_objects.update(new_node_objects)
+        self.interface_objects.update(new_interface_objects)
+        self._record_added('node_objects', new_node_objects)
+        self._record_added('interface_objects', new_interface_objects)
+        self._validate_or_defer()
 
     def validate_model(self):
         """
@@ -202,7 +203,8 @@ class FlexModel(_MasterModel):
         results.
         """
 
-        self._parallel_lsp_groups = {}  # Reset the attribute
+        self._journal_simulation()
+        self._reverse_indexes = None
 
         # This set of interfaces can be used to route traffic
         non_failed_interfaces = set()
@@ -246,48 +248,41 @@ class FlexModel(_MasterModel):
 
         self.validate_model()
 
-    def _route_demands(self, model):
+    def _make_networkx_igp_spf(self, reverse=False):
         """
-        Routes demands in input 'model'
-
-        :param model: input 'model' parameter object (may be different from self)
-        :return: model with routed demands
+        Returns a function that runs SPF from a source Node name over the
+        networkx MultiDiGraph of non-failed Interfaces.  The function returns
+        (pred, dist): pred is a dict of Node name: list of ECMP predecessor
+        (Interface, tail Node name) pairs, dist a dict of Node name: cost.
+        If reverse is True, the SPF is rooted at a destination Node and the
+        pairs are the next hop (Interface, head Node name) pairs toward it.
+        Every lowest cost parallel Interface from a predecessor is an ECMP edge.
         """
 
         G = self._make_weighted_network_graph_mdg(include_failed_circuits=False)
+        if reverse:
+            # Edge data in the reversed view still holds the original Interface
+            G = G.reverse(copy=False)
 
-        for demand in model.demand_objects:
-            demand.path = []
-
-            # Find all LSPs that can carry the demand:
-            for lsp in (lsp for lsp in model.rsvp_lsp_objects):
-                if (lsp.source_node_object == demand.source_node_object and
-                        lsp.dest_node_object == demand.dest_node_object and
-                        'Unrouted' not in lsp.path):
-                    demand.path.append(lsp)
+        def igp_spf(source_node_name):
+            nx_pred, dist = nx.dijkstra_predecessor_and_distance(G, source_node_name, weight='cost')
+            pred = {node: [(interface, tail) for tail in tails
+                           for interface in self._ecmp_interfaces_mdg(G, tail, node)]
+                    for node, tails in nx_pred.items()}
+            return pred, dist
 
-            if demand.path == []:
-                src = demand.source_node_object.name
-                dest = demand.dest_node_object.name
-
-                # Shortest path in networkx multidigraph
-                try:
-                    nx_sp = list(nx.all_shortest_paths(G, src, dest, weight='cost'))
-                except nx.exception.NetworkXNoPath:
-                    # There is no path, demand.path = 'Unrouted'
-                    demand.path = 'Unrouted'
-                    continue
+        return igp_spf
 
-                # all_paths is list of paths from source to destination; these paths
-                # may include paths that have multiple links between nodes
-                all_paths = self._get_all_paths_mdg(G, nx_sp)
-
-                path_list = self._normalize_multidigraph_paths(all_paths)
-                demand.path = path_list
-
-        self._update_interface_utilization()
-
-        return self
+    @staticmethod
+    def _ecmp_interfaces_mdg(G, current_hop, next_hop):
+        """
+        Returns the lowest cost Interface(s) from current_hop to next_hop in
+        networkx multidigraph G
+        """
+        values_source_hop = G[current_hop][next_hop].values()
+        min_weight = min(d['cost'] for d in values_source_hop)
+        return [interface_item['interface'] for interface_item in values_source_hop
+                if interface_item['cost'] == min_weight]
 
     def _get_all_paths_mdg(self, G, nx_sp):
         """
@@ -333,16 +328,7 @@ class FlexModel(_MasterModel):
             current_hop = path[0]
             this_path = []
             for next_hop in path[1:]:
-                this_hop = []
-                values_source_hop = G[current_hop][next_hop].values()
-                min_weight = min(d['cost'] for d in values_source_hop)
-                ecmp_links = [interface_index for interface_index, interface_item in
-                              G[current_hop][next_hop].items() if
-                              interface_item['cost'] == min_weight]
-
-                # Add Interface(s) to this_hop list and add traffic to Interfaces
-                for link_index in ecmp_links:
-                    this_hop.append(G[current_hop][next_hop][link_index]['interface'])
+                this_hop = self._ecmp_interfaces_mdg(G, current_hop, next_hop)
                 this_path.append(this_hop)
                 current_hop = next_hop
             all_paths.append(this_path)
@@ -351,8 +337,9 @@ class FlexModel(_MasterModel):
 
     def _make_weighted_network_graph_mdg(self, include_failed_circuits=True, needed_bw=0, rsvp_required=False):
         """
-        Returns a networkx weighted networkx multidigraph object from
-        the input Model object
+        Returns a networkx weighted multidigraph from the input Model object.
+        The graph is built once per topology version and filter parameters and
+        shared between callers, so it must not be modified.
 
         :param include_failed_circuits: include interfaces from currently failed
         circuits in the graph?
@@ -362,6 +349,14 @@ class FlexModel(_MasterModel):
         :return: networkx multidigraph with edges that conform to the needed_bw and
         rsvp_required parameters
         """
+        return self._cached_graph(self._build_weighted_network_graph_mdg, include_failed_circuits,
+                                  needed_bw, rsvp_required)
+
+    def _build_weighted_network_graph_mdg(self, include_failed_circuits=True, needed_bw=0,
+                                          rsvp_required=False):
+        """
+        Builds the graph returned by _make_weighted_network_graph_mdg
+        """
 
         G = nx.MultiDiGraph()
 
@@ -468,12 +463,23 @@ class FlexModel(_MasterModel):
                  comprised of two Interface objects
         """
 
-        G = self._make_weighted_network_graph_mdg(include_failed_circuits=include_failed_circuits)
+        # The edges of the weighted network multidigraph, grouped without building it
+        edges, interfaces_between = self._circuit_edges(include_failed_circuits=include_failed_circuits,
+                                                        multigraph=True)
+        edge_node_pairs = set((local_node_name, remote_node_name) for (local_node_name, remote_node_name, data)
+                              in edges)
 
-        # Determine which interfaces pair up into good circuits in G
+        # Interfaces by local node name, remote node name and circuit_id
+        circuit_interfaces = {}
+        for (local_node_name, remote_node_name), interfaces in interfaces_between.items():
+            for interface in interfaces:
+                circuit_interfaces.setdefault((local_node_name, remote_node_name, interface.circuit_id),
+                                              []).append(interface)
+
+        # Determine which interfaces pair up into good circuits
         graph_interfaces = ((local_node_name, remote_node_name, data) for
                             (local_node_name, remote_node_name, data) in
-                            G.edges(data=True) if G.has_edge(remote_node_name, local_node_name))
+                            edges if (remote_node_name, local_node_name) in edge_node_pairs)
 
         # Set interface object in_ckt = False
         for interface in (interface for interface in self.interface_objects):
@@ -485,21 +491,20 @@ class FlexModel(_MasterModel):
         # get the corresponding interface objects from the model to create
         # the Circuit object
         for interface in graph_interfaces:
-            # Get each interface from model for each
-            try:
-                int1 = self.get_interface_object_from_nodes(interface[0], interface[1],
-                                                            circuit_id=interface[2]['circuit_id'])[0]
-            except (TypeError, IndexError):
+            # Get each interface from model for each; there must be exactly one
+            # per direction with the circuit_id
+            matches = circuit_interfaces.get((interface[0], interface[1], interface[2]['circuit_id']), [])
+            if len(matches) != 1:
                 msg = ("No matching Interface Object found: source node {}, dest node {} "
                        "circuit_id {} ".format(interface[0], interface[1], interface[2]['circuit_id']))
                 raise ModelException(msg)
-            try:
-                int2 = self.get_interface_object_from_nodes(interface[1], interface[0],
-                                                            circuit_id=interface[2]['circuit_id'])[0]
-            except (TypeError, IndexError):
+            int1 = matches[0]
+            matches = circuit_interfaces.get((interface[1], interface[0], interface[2]['circuit_id']), [])
+            if len(matches) != 1:
                 msg = ("No matching Interface Object found: source node {}, dest node {} "
                        "circuit_id {} ".format(interface[1], interface[0], interface[2]['circuit_id']))
                 raise ModelException(msg)
+            int2 = matches[0]
             # Mark the interfaces as in ckt
             if int1.in_ckt is False and int2.in_ckt is False:
                 # Mark interface objects as in_ckt = True
@@ -512,7 +517,7 @@ class FlexModel(_MasterModel):
         # Find any interfaces that don't have counterpart
         exception_ints_not_in_ckt = [(local_node_name, remote_node_name, data)
                                      for (local_node_name, remote_node_name, data) in
-                                     G.edges(data=True) if not (G.has_edge(remote_node_name, local_node_name))]
+                                     edges if (remote_node_name, local_node_name) not in edge_node_pairs]
 
         if len(exception_ints_not_in_ckt) > 0:
             exception_msg = ('WARNING: These interfaces were not matched '
@@ -544,17 +549,10 @@ class FlexModel(_MasterModel):
         :return: list of Interface objects with common local node and remote node
         """
 
-        interface_gen = (interface for interface in self.interface_objects)
+        interface_list = self._lookup_all('interfaces_between', (local_node_name, remote_node_name))
 
-        if circuit_id is None:
-            interface_list = [interface for interface in interface_gen if
-                              interface.node_object.name == local_node_name and
-                              interface.remote_node_object.name == remote_node_name]
-        else:
-            interface_list = [interface for interface in interface_gen if
-                              interface.node_object.name == local_node_name and
-                              interface.remote_node_object.name == remote_node_name and
-                              interface.circuit_id == circuit_id]
+        if circuit_id is not None:
+            interface_list = [interface for interface in interface_list if interface.circuit_id == circuit_id]
 
             if len(interface_list) > 1:
                 msg = ("There is an internal error with circuit_iding; Interface circuit_ids must be unique"
@@ -582,11 +580,29 @@ class FlexModel(_MasterModel):
         :return: Model with new Circuit comprised of 2 new Interfaces
         """
 
+        existing_int_keys = self._index('interface')
+        circuit_ids = self.all_interface_circuit_ids
+
+        int_a, int_b = self._make_circuit_interfaces(node_a_object, node_b_object, node_a_interface_name,
+                                                     node_b_interface_name, cost_intf_a, cost_intf_b,
+                                                     capacity, circuit_id, existing_int_keys, circuit_ids)
+
+        self._add_objects('interface_objects', [int_a, int_b])
+
+        self._validate_or_defer()
+
+    def _make_circuit_interfaces(self, node_a_object, node_b_object, node_a_interface_name,
+                                 node_b_interface_name, cost_intf_a, cost_intf_b, capacity,
+                                 circuit_id, existing_int_keys, circuit_ids):
+        """
+        Returns the two component Interface objects of a new Circuit; see add_circuit
+
+        :param existing_int_keys: set (or dict) of the _key of each Interface in the model
+        :param circuit_ids: set of the circuit_ids in the model
+        """
         if circuit_id is None:
             raise ModelException("circuit_id must be specified explicitly")
 
-        circuit_ids = self.all_interface_circuit_ids
-
         if circuit_id in circuit_ids:
             err_msg = "circuit_id value {} is already exists in model".format(circuit_id)
             raise ModelException(err_msg)
@@ -596,8 +612,6 @@ class FlexModel(_MasterModel):
         int_b = Interface(node_b_interface_name, cost_intf_b, capacity,
                           node_b_object, node_a_object, circuit_id)
 
-        existing_int_keys = set([interface._key for interface in self.interface_objects])
-
         if int_a._key in existing_int_keys:
             raise ModelException("interface {} on node {} - "
                                  "interface already exists in model".format(int_a, node_a_object))
@@ -605,10 +619,7 @@ class FlexModel(_MasterModel):
             raise ModelException("interface {} on node {} - "
                                  "interface already exists in model".format(int_b, node_b_object))
 
-        self.interface_objects.add(int_a)
-        self.interface_objects.add(int_b)
-
-        self.validate_model()
+        return int_a, int_b
 
     def _make_network_interfaces(self, interface_info_list):
         """
@@ -1073,6 +1084,11 @@ class FlexModel(_MasterModel):
         - configured_setup_bw - if LSP has a fixed, static configured setup bandwidth, place that static value here,
         if LSP is auto-bandwidth, then leave this blank for the LSP (optional)
 
+        SRLG_TABLE (this table is optional; it follows the RSVP_LSP_TABLE)
+        - srlg_name - name of SRLG
+        - node_object_name - name of a Node in the SRLG, or of the node where an Interface in the SRLG resides
+        - interface_name - name of the Interface in the SRLG; leave this blank if the Node is in the SRLG
+
         Functional model files can be found in this directory in
         https://github.com/tim-fiola/network_traffic_modeler_py3/tree/master/examples
 
@@ -1103,144 +1119,92 @@ class FlexModel(_MasterModel):
             A	B	lsp_a_b_1   10
             A	B	lsp_a_b_2
 
+            SRLG_TABLE
+            srlg_name	node_object_name	interface_name
+            srlg_1	A	A-to-B_1
+            srlg_1	B	B-to-A_1
+            srlg_2	B
+
         :param data_file: file with model info
         :return: Model object
 
         """
         # TODO - allow user to add user-defined columns in NODES_TABLE and add that as an attribute to the Node
-        # TODO - add support for SRLGs
-
-        interface_set = set()
-        node_set = set()
-        demand_set = set()
-        lsp_set = set()
 
-        # Open the file with the data, read it, and split it into lines
-        with open(data_file, 'r') as f:
-            data = f.read()
+        interface_set, node_set, demand_set, lsp_set, srlg_members = cls._read_model_file(data_file)
 
-        lines = data.splitlines()
+        model = cls(interface_set, node_set, demand_set, lsp_set)
+        model._add_srlg_members(srlg_members)
+        return model
 
-        # Define the Interfaces from the data and extract the presence of
-        # Nodes from the Interface data
-        int_info_begin_index = 2
-        int_info_end_index = find_end_index(int_info_begin_index, lines)
+    _interface_table_header = ['node_object_name', 'remote_node_object_name', 'name', 'cost', 'capacity',
+                               'circuit_id', 'rsvp_enabled', 'percent_reservable_bandwidth']
 
-        # Check that each circuit_id appears exactly 2 times
-        circuit_id_list = []
-        for line in lines[int_info_begin_index:int_info_end_index]:
-            try:
-                circuit_id_item = line.split()[5]
-                circuit_id_list.append(circuit_id_item)
-            except IndexError:
-                pass
-
-        bad_circuit_ids = [{'circuit_id': item, 'appearances': circuit_id_list.count(item)} for item
-                           in set(circuit_id_list) if circuit_id_list.count(item) != 2]
-
-        if len(bad_circuit_ids) != 0:
-            msg = ("Each circuit_id value must appear exactly twice; the following circuit_id values "
-                   "do not meet that criteria: {}".format(bad_circuit_ids))
-            raise ModelException(msg)
-
-        interface_set, node_set = cls._extract_interface_data_and_implied_nodes(int_info_begin_index,
-                                                                                int_info_end_index, lines)
-
-        # Define the explicit nodes info from the file
-        nodes_info_begin_index = int_info_end_index + 3
-        nodes_info_end_index = find_end_index(nodes_info_begin_index, lines)
-        node_lines = lines[nodes_info_begin_index:nodes_info_end_index]
-        for node_line in node_lines:
-            cls._add_node_from_data(demand_set, interface_set, lines, lsp_set, node_line, node_set)
-
-        # Define the demands info
-        demands_info_begin_index = nodes_info_end_index + 3
-        demands_info_end_index = find_end_index(demands_info_begin_index, lines)
-        # There may or may not be LSPs in the model, so if there are not,
-        # set the demands_info_end_index as the last line in the file
-        if not demands_info_end_index:
-            demands_info_end_index = len(lines)
-
-        demands_lines = lines[demands_info_begin_index:demands_info_end_index]
-
-        for demand_line in demands_lines:
-            try:
-                cls._add_demand_from_data(demand_line, demand_set, lines, node_set)
-            except ModelException as e:
-                err_msg = e.args[0]
-                raise ModelException(err_msg)
-
-        # Define the LSP info (if present)
-        # If the demands_info_end_index is the same as the length of the
-        # lines list, then there is no LSP section
-        if demands_info_end_index != len(lines):
-            try:
-                cls._add_lsp_from_data(demands_info_end_index, lines, lsp_set, node_set)
-            except ModelException as e:
-                err_msg = e.args[0]
-                raise ModelException(err_msg)
-
-        return cls(interface_set, node_set, demand_set, lsp_set)
+    @staticmethod
+    def _interface_to_data(interface):
+        """
+        Returns the fields of the INTERFACES_TABLE line for interface;
+        the reverse of _interface_from_data
+        """
+        return [interface.node_object.name, interface.remote_node_object.name, interface.name, interface.cost,
+                interface.capacity, interface.circuit_id, interface.rsvp_enabled,
+                interface.percent_reservable_bandwidth]
 
     @classmethod
-    def _extract_interface_data_and_implied_nodes(cls, int_info_begin_index, int_info_end_index, lines):
+    def _interface_from_data(cls, line_index, interface_line):
         """
-        Extracts interface data from lines and adds Interface objects to a set.
-        Also extracts the implied Nodes from the Interfaces and adds those Nodes to a set.
+        Returns the Interface object described by a line of the
+        INTERFACES_TABLE; its Node objects are new Nodes named after the
+        local and remote nodes in the line
 
-        :param int_info_begin_index: Index position in lines where interface info begins
-        :param int_info_end_index:  Index position in lines where interface info ends
-        :param lines: lines of data describing a Model objects
-        :return: set of Interface objects, set of Node objects created from lines
+        :param line_index: index of interface_line in the data file
+        :param interface_line: line of interface data
+        :return: Interface object
         """
-
-        interface_set = set()
-        node_set = set()
-        interface_lines = lines[int_info_begin_index:int_info_end_index]
-        # Add the Interfaces to a set
-        for interface_line in interface_lines:
-            # Read interface characteristics
-            if len(interface_line.split()) == 6:
-                [node_name, remote_node_name, name, cost, capacity, circuit_id] = interface_line.split()
+        interface_info = interface_line.split()
+        # Read interface characteristics
+        if len(interface_info) == 6:
+            [node_name, remote_node_name, name, cost, capacity, circuit_id] = interface_info
+            rsvp_enabled_bool = True
+            percent_reservable_bandwidth = 100
+        elif len(interface_info) == 7:
+            [node_name, remote_node_name, name, cost, capacity, circuit_id, rsvp_enabled] = interface_info
+            if rsvp_enabled in [True, 'T', 'True', 'true']:
                 rsvp_enabled_bool = True
-                percent_reservable_bandwidth = 100
-            elif len(interface_line.split()) == 7:
-                [node_name, remote_node_name, name, cost, capacity, circuit_id, rsvp_enabled] = interface_line.split()
-                if rsvp_enabled in [True, 'T', 'True', 'true']:
-                    rsvp_enabled_bool = True
-                else:
-                    rsvp_enabled_bool = False
-                percent_reservable_bandwidth = 100
-            elif len(interface_line.split()) >= 8:
-                [node_name, remote_node_name, name, cost, capacity, circuit_id, rsvp_enabled,
-                 percent_reservable_bandwidth] = interface_line.split()
-                if rsvp_enabled in [True, 'T', 'True', 'true']:
-                    rsvp_enabled_bool = True
-                else:
-                    rsvp_enabled_bool = False
             else:
-                msg = ("node_name, remote_node_name, name, cost, capacity, circuit_id "
-                       "must be defined for line {}, line index {}".format(interface_line,
-                                                                           lines.index(interface_line)))
-                raise ModelException(msg)
+                rsvp_enabled_bool = False
+            percent_reservable_bandwidth = 100
+        elif len(interface_info) >= 8:
+            [node_name, remote_node_name, name, cost, capacity, circuit_id, rsvp_enabled,
+             percent_reservable_bandwidth] = interface_info
+            if rsvp_enabled in [True, 'T', 'True', 'true']:
+                rsvp_enabled_bool = True
+            else:
+                rsvp_enabled_bool = False
+        else:
+            msg = ("node_name, remote_node_name, name, cost, capacity, circuit_id "
+                   "must be defined for line {}, line index {}".format(interface_line, line_index))
+            raise ModelException(msg)
 
-            new_interface = Interface(name, int(cost), int(capacity), Node(node_name),
-                                      Node(remote_node_name), circuit_id, rsvp_enabled_bool,
-                                      float(percent_reservable_bandwidth))
+        return Interface(name, int(cost), cls._number_from_data(capacity), Node(node_name), Node(remote_node_name),
+                         circuit_id, rsvp_enabled_bool, float(percent_reservable_bandwidth))
 
-            if new_interface._key not in set([interface._key for interface in interface_set]):
-                interface_set.add(new_interface)
-            else:
-                print("{} already exists in model; disregarding line {}".format(new_interface,
-                                                                                lines.index(interface_line)))
+    @classmethod
+    def _check_circuit_ids(cls, circuit_ids):
+        """
+        Checks that each circuit_id read from a model data file appears
+        exactly 2 times
 
-            # Derive Nodes from the Interface data
-            if node_name not in set([node.name for node in node_set]):
-                node_set.add(new_interface.node_object)
-            if remote_node_name not in set([node.name for node in node_set]):
-                node_set.add(new_interface.remote_node_object)
+        :param circuit_ids: list of the circuit_id on each interface line
+        """
+        circuit_id_counts = Counter(circuit_ids)
+        bad_circuit_ids = [{'circuit_id': item, 'appearances': circuit_id_counts[item]} for item
+                           in set(circuit_ids) if circuit_id_counts[item] != 2]
 
-        return interface_set, node_set
+        if len(bad_circuit_ids) != 0:
+            msg = ("Each circuit_id value must appear exactly twice; the following circuit_id values "
+                   "do not meet that criteria: {}".format(bad_circuit_ids))
+            raise ModelException(msg)
 
 
 class Parallel_Link_Model(FlexModel):
@@ -1259,6 +1223,5 @@ class Parallel_Link_Model(FlexModel):
         self.circuit_objects = set()
         self.rsvp_lsp_objects = rsvp_lsp_objects
         self.srlg_objects = set()
-        self._parallel_lsp_groups = {}
 
         super().__init__(interface_objects, node_objects, demand_objects, rsvp_lsp_objects)
@@ -0,0 +1,393 @@
+"""
+An array-backed graph engine for the routing hot path.
+
+The GraphEngine stores a Model topology as integer-indexed, compressed sparse
+row (CSR) arrays instead of a networkx graph full of per-edge dicts.  Each
+Node gets an integer node id and each Interface gets an integer interface id;
+shortest path first (SPF) runs return the ECMP predecessors of each Node
+directly as interface ids, so there is no node path to Interface path
+conversion step.
+
+Select it on a model with::
+
+    model.routing_engine = 'native'
+
+"""
+
+import random
+
+from array import array
+from heapq import heappop, heappush
+
+INFINITY = float('inf')
+
+
+class GraphEngine(object):
+    """
+    Integer-indexed CSR representation of a Model topology.
+
+    - node_names: list of Node names; a Node's id is its index in this list
+    - tails/heads: local/remote node id for each interface id
+    - costs: cost for each interface id
+    - capacities: capacity for each interface id
+    - failed: failed mask for each interface id (1 = failed)
+    - reservable: reservable_bandwidth for each interface id
+    - interfaces: Interface objects, indexed by interface id (optional)
+
+    The outgoing interfaces of node id n are out_edges[out_offsets[n]:out_offsets[n + 1]];
+    the incoming interfaces are in_edges[in_offsets[n]:in_offsets[n + 1]].
+    """
+
+    def __init__(self, node_names, tails, heads, costs, capacities, failed, reservable, interfaces=None):
+        self.node_names = list(node_names)
+        self.node_ids = {name: node_id for node_id, name in enumerate(self.node_names)}
+        self.tails = array('l', tails)
+        self.heads = array('l', heads)
+        self.costs = array('l', costs)
+        self.capacities = array('d', capacities)
+        self.failed = array('b', failed)
+        self.reservable = array('d', reservable)
+        self.interfaces = interfaces
+
+        self.out_offsets, self.out_edges = self._make_csr(self.tails)
+        self.in_offsets, self.in_edges = self._make_csr(self.heads)
+
+    def __repr__(self):
+        return 'GraphEngine(Nodes: %s, Interfaces: %s)' % (len(self.node_names), len(self.tails))
+
+    def _make_csr(self, edge_nodes):
+        """
+        Groups interface ids by node id (counting sort)
+
+        :param edge_nodes: node id for each interface id
+        :return: offsets array (len = number of nodes + 1), interface id array
+        ordered by node id
+        """
+        offsets = array('l', [0] * (len(self.node_names) + 1))
+        for node_id in edge_nodes:
+            offsets[node_id + 1] += 1
+        for node_id in range(len(self.node_names)):
+            offsets[node_id + 1] += offsets[node_id]
+
+        position = array('l', offsets)
+        edges = array('l', [0] * len(edge_nodes))
+        for edge, node_id in enumerate(edge_nodes):
+            edges[position[node_id]] = edge
+            position[node_id] += 1
+
+        return offsets, edges
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Builds a GraphEngine from the Interfaces and Nodes in model
+
+        :param model: PerformanceModel or FlexModel object
+        :return: GraphEngine object; engine.interfaces[i] is the Interface
+        object with interface id i
+        """
+        node_names = set(node.name for node in model.node_objects)
+        interfaces = list(model.interface_objects)
+        for interface in interfaces:
+            node_names.add(interface.node_object.name)
+            node_names.add(interface.remote_node_object.name)
+        node_names = sorted(node_names)
+        node_ids = {name: node_id for node_id, name in enumerate(node_names)}
+
+        return cls(node_names,
+                   [node_ids[interface.node_object.name] for interface in interfaces],
+                   [node_ids[interface.remote_node_object.name] for interface in interfaces],
+                   [interface.cost for interface in interfaces],
+                   [interface.capacity for interface in interfaces],
+                   [interface.failed for interface in interfaces],
+                   [interface.reservable_bandwidth for interface in interfaces],
+                   interfaces)
+
+    def spf(self, source_id, needed_bw=0, reverse=False):
+        """
+        Runs Dijkstra from source_id over the non-failed interfaces with at
+        least needed_bw of reservable bandwidth (the same edges
+        _make_weighted_network_graph(include_failed_circuits=False, needed_bw=needed_bw)
+        would put in a graph).
+
+        :param source_id: node id of the SPF root
+        :param needed_bw: minimum reservable bandwidth for an interface to be considered
+        :param reverse: if True, follow interfaces backwards so source_id is
+        the destination of the shortest paths (a reverse SPF tree)
+        :return: dist, pred; dist[n] is the cost from source_id to node id n
+        (to source_id from n if reverse) or INFINITY if unreachable.  pred[n]
+        is the list of ECMP predecessor (interface id, tail node id) pairs for
+        node id n; if reverse, the pairs are the (interface id, head node id)
+        next hops from node id n toward source_id.  pred[n] is None if node id
+        n is unreachable.
+        """
+        dist = [INFINITY] * len(self.node_names)
+        pred = [None] * len(self.node_names)
+        dist[source_id] = 0
+        pred[source_id] = []
+
+        if reverse:
+            offsets, edges, far_ends = self.in_offsets, self.in_edges, self.tails
+        else:
+            offsets, edges, far_ends = self.out_offsets, self.out_edges, self.heads
+        costs, failed, reservable = self.costs, self.failed, self.reservable
+
+        heap = [(0, source_id)]
+        while heap:
+            node_dist, node_id = heappop(heap)
+            if node_dist > dist[node_id]:
+                continue
+            for position in range(offsets[node_id], offsets[node_id + 1]):
+                edge = edges[position]
+                if failed[edge] or reservable[edge] < needed_bw:
+                    continue
+                remote_id = far_ends[edge]
+                remote_dist = node_dist + costs[edge]
+                if remote_dist < dist[remote_id]:
+                    dist[remote_id] = remote_dist
+                    pred[remote_id] = [(edge, node_id)]
+                    heappush(heap, (remote_dist, remote_id))
+                elif remote_dist == dist[remote_id]:
+                    pred[remote_id].append((edge, node_id))
+
+        return dist, pred
+
+    def interface_spf(self, source_node_name, needed_bw=0, reverse=False):
+        """
+        Runs spf from a source Node name and returns the results keyed by
+        Node name with Interface objects as the DAG edges
+
+        :param source_node_name: name of the SPF root Node
+        :param needed_bw: minimum reservable bandwidth for an interface to be considered
+        :param reverse: if True, source_node_name is the destination of the
+        shortest paths; see spf
+        :return: pred, dist; pred is a dict of Node name: list of ECMP
+        predecessor (Interface, tail Node name) pairs (next hop (Interface,
+        head Node name) pairs if reverse) and dist is a dict of Node name:
+        cost from (to, if reverse) the root; unreachable Nodes are not in
+        either dict
+        """
+        dist, pred = self.spf(self.node_ids[source_node_name], needed_bw, reverse)
+
+        node_names, interfaces = self.node_names, self.interfaces
+        interface_pred = {}
+        interface_dist = {}
+        for node_id, node_pred in enumerate(pred):
+            if node_pred is not None:
+                interface_pred[node_names[node_id]] = [(interfaces[edge], node_names[tail])
+                                                       for edge, tail in node_pred]
+                interface_dist[node_names[node_id]] = dist[node_id]
+
+        return interface_pred, interface_dist
+
+    def cspf(self, source_id, dest_id, needed_bw):
+        """
+        Constrained SPF for RSVP LSP placement: finds a path from source_id to
+        dest_id over the non-failed interfaces with at least needed_bw of
+        reservable bandwidth.  Interfaces short of needed_bw are skipped as
+        they are reached, against the current contents of self.reservable,
+        so no per-LSP graph is built.
+
+        Among the lowest cost paths, those with the fewest hops are kept and
+        one of them is chosen uniformly at random.
+
+        :param source_id: node id the path starts from
+        :param dest_id: node id the path ends at
+        :param needed_bw: minimum reservable bandwidth for an interface to be considered
+        :return: list of interface ids from source_id to dest_id, or None if
+        there is no path with needed_bw
+        """
+        # Distances are (cost, hops) pairs, so ties in cost go to fewer hops
+        dist = {source_id: (0, 0)}
+        pred = {source_id: []}
+        settled = []
+
+        out_offsets, out_edges, heads = self.out_offsets, self.out_edges, self.heads
+        costs, failed, reservable = self.costs, self.failed, self.reservable
+
+        heap = [(0, 0, source_id)]
+        while heap:
+            node_cost, node_hops, node_id = heappop(heap)
+            if (node_cost, node_hops) > dist[node_id]:
+                continue
+            settled.append(node_id)
+            if node_id == dest_id:
+                break
+            for position in range(out_offsets[node_id], out_offsets[node_id + 1]):
+                edge = out_edges[position]
+                if failed[edge] or reservable[edge] < needed_bw:
+                    continue
+                remote_id = heads[edge]
+                remote_dist = (node_cost + costs[edge], node_hops + 1)
+                current_dist = dist.get(remote_id)
+                if current_dist is None or remote_dist < current_dist:
+                    dist[remote_id] = remote_dist
+                    pred[remote_id] = [(edge, node_id)]
+                    heappush(heap, (remote_dist[0], remote_dist[1], remote_id))
+                elif remote_dist == current_dist:
+                    pred[remote_id].append((edge, node_id))
+
+        if dest_id not in pred:
+            return None
+
+        # Number of equal (cost, hops) paths from source_id to each settled node;
+        # the predecessors of a node are all settled before it
+        path_counts = {source_id: 1}
+        for node_id in settled[1:]:
+            path_counts[node_id] = sum(path_counts[tail] for edge, tail in pred[node_id])
+
+        # Walk back from dest_id, taking each predecessor in proportion to
+        # the number of paths through it, which picks a uniformly random path
+        path = []
+        node_id = dest_id
+        while node_id != source_id:
+            node_pred = pred[node_id]
+            if len(node_pred) == 1:
+                edge, node_id = node_pred[0]
+            else:
+                pick = random.randrange(path_counts[node_id])
+                for edge, tail in node_pred:
+                    if pick < path_counts[tail]:
+                        break
+                    pick -= path_counts[tail]
+                node_id = tail
+            path.append(edge)
+
+        return path[::-1]
+
+    def update_reservable(self, edges=None):
+        """
+        Refreshes self.reservable from the Interface objects, after LSPs have
+        reserved bandwidth on them
+
+        :param edges: interface ids to refresh; all of them if None
+        """
+        if edges is None:
+            edges = range(len(self.interfaces))
+        for edge in edges:
+            self.reservable[edge] = self.interfaces[edge].reservable_bandwidth
+
+
+def _dag_out_edges(pred, dest):
+    """
+    Collects the edges of an ECMP predecessor DAG that lie on a shortest
+    path to dest, grouped by tail node
+
+    :param pred: dict of node: list of (edge, tail node) pairs
+    :param dest: destination node
+    :return: dict of tail node: list of (edge, head node) pairs
+    """
+    out_edges = {}
+    seen = {dest}
+    stack = [dest]
+    while stack:
+        node = stack.pop()
+        for edge, tail in pred[node]:
+            try:
+                out_edges[tail].append((edge, node))
+            except KeyError:
+                out_edges[tail] = [(edge, node)]
+            if tail not in seen:
+                seen.add(tail)
+                stack.append(tail)
+
+    return out_edges
+
+
+def dag_paths(pred, source, dest):
+    """
+    Walks an ECMP predecessor DAG back from dest and returns every
+    shortest path from source to dest as a list of edges.
+
+    :param pred: dict of node: list of (edge, tail node) pairs on the
+    shortest paths from source to node; unreachable nodes are not in pred
+    :param source: SPF root node
+    :param dest: destination node
+    :return: list of paths, each a list of edges from source to dest; empty
+    list if dest is unreachable
+    """
+    if dest not in pred:
+        return []
+
+    paths = []
+    stack = [(dest, [])]
+    while stack:
+        node, reversed_path = stack.pop()
+        if node == source:
+            paths.append(reversed_path[::-1])
+            continue
+        for edge, tail in reversed(pred[node]):
+            stack.append((tail, reversed_path + [edge]))
+
+    return paths
+
+
+def ecmp_splits(pred, dist, source, dest):
+    """
+    Hop-by-hop ECMP split of the traffic from source to dest: each node
+    divides the traffic it receives evenly across its edges on the shortest
+    paths to dest.  Fractions are pushed down the DAG in order of distance
+    from source (a topological order, since costs are positive), so the
+    cost is linear in the size of the DAG rather than in the number of paths.
+
+    :param pred: dict of node: list of (edge, tail node) pairs on the
+    shortest paths from source to node
+    :param dist: dict of node: cost from source
+    :param source: SPF root node
+    :param dest: destination node; must be in pred
+    :return: dict of edge: fraction of the source to dest traffic on the edge
+    """
+    out_edges = _dag_out_edges(pred, dest)
+
+    node_fraction = {source: 1.0}
+    splits = {}
+    for node in sorted(out_edges, key=dist.__getitem__):
+        edge_fraction = node_fraction[node] / len(out_edges[node])
+        for edge, head in out_edges[node]:
+            splits[edge] = edge_fraction
+            node_fraction[head] = node_fraction.get(head, 0.0) + edge_fraction
+
+    return splits
+
+
+def dag_paths_to_root(succ, source, root):
+    """
+    Returns every shortest path from source to root in a destination
+    rooted ECMP DAG.
+
+    :param succ: dict of node: list of (edge, head node) next hops toward
+    root; nodes that cannot reach root are not in succ
+    :param source: node the paths start from
+    :param root: destination node of the DAG
+    :return: list of paths, each a list of edges from source to root; empty
+    list if source cannot reach root
+    """
+    return [path[::-1] for path in dag_paths(succ, root, source)]
+
+
+def propagate_to_root(succ, dist, node_traffic):
+    """
+    Pushes the traffic injected at each node down a destination rooted ECMP
+    DAG in a single pass.  Each node divides the traffic it holds (injected
+    plus received) evenly across its next hops; nodes are visited farthest
+    from the root first, so a node has received all its traffic by the time
+    it is visited.
+
+    :param succ: dict of node: list of (edge, head node) next hops toward the root
+    :param dist: dict of node: cost to the root
+    :param node_traffic: dict of node: traffic injected at node; every node
+    must be in succ
+    :return: dict of edge: traffic on the edge
+    """
+    held_traffic = dict(node_traffic)
+    edge_traffic = {}
+    for node in sorted(succ, key=dist.__getitem__, reverse=True):
+        traffic = held_traffic.get(node)
+        if not traffic or not succ[node]:
+            continue
+        edge_share = traffic / len(succ[node])
+        for edge, head in succ[node]:
+            edge_traffic[edge] = edge_traffic.get(edge, 0.0) + edge_share
+            held_traffic[head] = held_traffic.get(head, 0.0) + edge_share
+
+    return edge_traffic
@@ -1,5 +1,6 @@
 """An object representing a Node interface"""
 
+from .change_tracking import record_change, topology_changed
 from .exceptions import ModelException
 from .rsvp import RSVP_LSP
 from .srlg import SRLG
@@ -8,6 +9,11 @@ from .srlg import SRLG
 class Interface(object):
     """An object representing a Node's Interface"""
 
+    _tracker = None  # ChangeTracker of the model holding the interface
+
+    # Attributes written by update_simulation; see _MasterModel.checkpoint
+    _simulation_attributes = ('traffic', '_reserved_bandwidth')
+
     def __init__(self, name, cost, capacity, node_object, remote_node_object,
                  circuit_id=None, rsvp_enabled=True, percent_reservable_bandwidth=100):
         self.name = name
@@ -20,6 +26,7 @@ class Interface(object):
         self._failed = False
         self._reserved_bandwidth = 0.0
         self._srlgs = set()
+        self._failure_probability = 0
         self.rsvp_enabled = rsvp_enabled
         self.percent_reservable_bandwidth = percent_reservable_bandwidth
 
@@ -87,7 +94,12 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
         :return: None
         """
         if isinstance(value, float) or isinstance(value, int):
+            had_reservable_bandwidth = self.reservable_bandwidth >= 0
             self._reserved_bandwidth = value
+            if (self.reservable_bandwidth >= 0) != had_reservable_bandwidth:
+                # Graphs that need no reservable bandwidth still leave out
+                # Interfaces with less than none
+                topology_changed(self)
         else:
             raise ModelException("Interface reserved_bandwidth must be a float or integer")
 
@@ -112,6 +124,11 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
         if not (isinstance(status, bool)):
             raise ModelException('must be boolean value')
 
+        # Failing releases the reservations, which a rollback restores
+        record_change(self, '_reserved_bandwidth', self._reserved_bandwidth)
+        record_change(self, '_failed', self._failed)
+        topology_changed(self)
+
         # Check for membership in any failed SRLGs
         if status is False:
             # Check for membership in any failed SRLGs
@@ -145,7 +162,10 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
             raise ModelException("Interface cost cannot be less than 1")
         if not isinstance(cost, int):
             raise ModelException("Interface cost must be integer")
+        if hasattr(self, '_cost'):  # Not a new object
+            record_change(self, '_cost', self._cost)
         self._cost = cost
+        topology_changed(self)
 
     @property
     def capacity(self):
@@ -155,7 +175,53 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
     def capacity(self, capacity):
         if not(capacity > 0):
             raise ModelException("Interface capacity must be greater than 0")
+        if hasattr(self, '_capacity'):  # Not a new object
+            record_change(self, '_capacity', self._capacity)
         self._capacity = capacity
+        topology_changed(self)
+
+    @property
+    def circuit_id(self):
+        return self._circuit_id
+
+    @circuit_id.setter
+    def circuit_id(self, circuit_id):
+        # PerformanceModel validation writes the same circuit ids every simulation
+        if circuit_id != getattr(self, '_circuit_id', None):
+            topology_changed(self)
+        self._circuit_id = circuit_id
+
+    @property
+    def rsvp_enabled(self):
+        return self._rsvp_enabled
+
+    @rsvp_enabled.setter
+    def rsvp_enabled(self, rsvp_enabled):
+        self._rsvp_enabled = rsvp_enabled
+        topology_changed(self)
+
+    @property
+    def percent_reservable_bandwidth(self):
+        return self._percent_reservable_bandwidth
+
+    @percent_reservable_bandwidth.setter
+    def percent_reservable_bandwidth(self, percent_reservable_bandwidth):
+        self._percent_reservable_bandwidth = percent_reservable_bandwidth
+        topology_changed(self)
+
+    @property
+    def failure_probability(self):
+        """
+        Probability that the Interface's circuit is failed, for Monte Carlo
+        failure simulation; see Circuit.failure_probability
+        """
+        return self._failure_probability
+
+    @failure_probability.setter
+    def failure_probability(self, probability):
+        if not 0 <= probability <= 1:
+            raise ModelException("failure_probability must be between 0 and 1")
+        self._failure_probability = probability
 
     def fail_interface(self, model):
         """
@@ -200,8 +266,8 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
         :return: Interface object on remote side of Circuit containing self
         """
 
-        for interface in (interface for interface in model.interface_objects):
-            if interface.node_object.name == self.remote_node_object.name and interface.circuit_id == self.circuit_id:
+        for interface in model._lookup_all('node_interfaces', self.remote_node_object.name):
+            if interface.circuit_id == self.circuit_id:
                 remote_interface = interface
                 break
 
@@ -236,9 +302,18 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
         :param model: model object containing self
         :return: list of Demand objects egressing self
         """
+        interface_demands = model._reverse_index('interface_demands')
+        if interface_demands is not None:
+            return list(interface_demands.get(self, {}))
+
         dmd_set = set()
-        routed_demands = (demand for demand in model.demand_objects if demand.path != 'Unrouted')
+        routed_demands = (demand for demand in model.demand_objects if demand._routed)
         for demand in routed_demands:
+            # IGP routed demands carry their ECMP splits; no need to enumerate paths
+            if demand._igp_routed:
+                if self in demand._ecmp_splits:
+                    dmd_set.add(demand)
+                continue
 
             for dmd_path in demand.path:
                 # If dmd_path is an RSVP LSP and self is in dmd_path.path['interfaces'] ,
@@ -256,9 +331,30 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
 
         dmd_list = list(dmd_set)
 
-        # TODO - add % of each demand that is on the interface next to the demand
         return dmd_list
 
+    def traffic_per_demand(self, model):
+        """
+        Returns how much of each Demand's traffic egresses the interface
+
+        :param model: model object containing self
+        :return: dict of Demand: units of the Demand's traffic on self
+        """
+        interface_demands = model._reverse_index('interface_demands')
+        if interface_demands is not None:
+            return dict(interface_demands.get(self, {}))
+
+        traffic_per_demand = {}
+        for demand in self.demands(model):
+            if demand._igp_routed:
+                traffic_per_demand[demand] = model._demand_traffic_per_int(demand)[self]
+            else:
+                # Demand's traffic is split evenly across the LSPs carrying it
+                lsps_on_self = [lsp for lsp in demand.path if self in lsp.path['interfaces']]
+                traffic_per_demand[demand] = demand.traffic * len(lsps_on_self) / len(demand.path)
+
+        return traffic_per_demand
+
     def lsps(self, model):
         """
         Returns a list of RSVP LSPs that egress the interface
@@ -266,6 +362,9 @@ remote_node_object = %r, circuit_id = %r)' % (self.__class__.__name__,
         :param model: Model object
         :return: list of RSVP LSPs that egress the interface
         """
+        interface_lsps = model._reverse_index('interface_lsps')
+        if interface_lsps is not None:
+            return list(interface_lsps.get(self, []))
 
         lsp_set = set()
 
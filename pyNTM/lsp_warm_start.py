@@ -0,0 +1,202 @@
+"""
+Warm start for incremental RSVP LSP placement.
+
+An LSPRoutingLog records, in routing order, where each LSP was placed during
+an update_simulation run and the reserved bandwidth it left behind.  On the
+next run, LSPWarmStart replays that log next to the new placement and tells
+the model which LSPs can keep their previous result.
+
+An LSP keeps its previous path (or stays 'Unrouted') only when that is what
+a cold run would compute:
+
+- its setup bandwidth is unchanged,
+- every Interface on the previous path is still up and can still reserve
+  the setup bandwidth, and
+- no Interface is usable at the setup bandwidth now that was not usable at
+  the same point of the previous run.
+
+Under those conditions the set of eligible paths can only have shrunk and
+the previous path is still in it, so it is still a lowest cost, fewest hops
+path.  Every other LSP is placed with a constrained SPF.  Interface cost
+changes, restored Interfaces and added or removed Interfaces or LSPs make
+the previous log unusable; the run is then cold.
+"""
+
+
+def _reservable_limit(interface):
+    """
+    Bandwidth an Interface can reserve when nothing is reserved on it, or
+    None if the Interface is not rsvp_enabled
+    """
+    if interface.rsvp_enabled is True:
+        return interface.capacity * (interface.percent_reservable_bandwidth / 100)
+    return None
+
+
+class LSPRoutingLog(object):
+    """
+    Record of the LSP placements of one update_simulation run.
+
+    - interface_state: dict of Interface: (cost, failed, reservable limit) at
+      the start of the run
+    - groups: list of parallel LSP groups in routing order; each is a dict with
+
+        - 'lsps': tuple of the LSPs in the group, in routing order
+        - 'steps': list of (setup_bandwidth, path, reserved) for each LSP;
+          path is a list of Interfaces or None if the LSP did not route and
+          reserved is a dict of Interface: _reserved_bandwidth after the LSP
+          was placed
+        - 'reserved': dict of Interface: _reserved_bandwidth after the group's
+          optimize step, or None if the step did not run
+    """
+
+    def __init__(self, interfaces):
+        self.interface_state = {interface: (interface.cost, interface.failed, _reservable_limit(interface))
+                                for interface in interfaces}
+        self.groups = []
+
+    def start_group(self, lsps):
+        self.groups.append({'lsps': tuple(lsps), 'steps': [], 'reserved': None})
+
+    def add_step(self, setup_bandwidth, path):
+        """
+        Records the placement of the next LSP in the current group
+
+        :param setup_bandwidth: setup bandwidth the LSP signaled for
+        :param path: list of Interfaces the LSP reserved bandwidth on, or
+        None if the LSP did not route
+        """
+        reserved = {}
+        if path is not None:
+            reserved = {interface: interface._reserved_bandwidth for interface in path}
+        self.groups[-1]['steps'].append((setup_bandwidth, path, reserved))
+
+    def add_optimize_step(self, interfaces):
+        """
+        Records the reserved bandwidth after the current group's optimize step
+        """
+        self.groups[-1]['reserved'] = {interface: interface._reserved_bandwidth for interface in interfaces}
+
+
+class LSPWarmStart(object):
+    """
+    Replays the previous run's LSPRoutingLog next to the current placement,
+    which uses engine (a GraphEngine built from the same model).
+
+    The previous run's reservable bandwidth is tracked per interface id
+    alongside engine.reservable; loosened holds the interface ids whose
+    reservable bandwidth is higher now than at the same point of the
+    previous run.
+    """
+
+    def __init__(self, previous_log, engine):
+        self.previous_log = previous_log
+        self.engine = engine
+        self.interface_ids = {interface: edge for edge, interface in enumerate(engine.interfaces)}
+
+        self.previous_limits = [previous_log.interface_state[interface][2] for interface in engine.interfaces]
+        self.previous_reserved = [0.0] * len(engine.interfaces)
+        self.loosened = set()
+        self.refresh(range(len(engine.interfaces)))
+
+    @classmethod
+    def from_log(cls, previous_log, engine, lsp_groups):
+        """
+        Returns an LSPWarmStart, or None if previous_log cannot be used for
+        a warm start of a run that routes lsp_groups over engine's Interfaces
+
+        :param previous_log: LSPRoutingLog of the previous run, or None
+        :param engine: GraphEngine built from the model
+        :param lsp_groups: list of parallel LSP groups in routing order
+        """
+        if previous_log is None:
+            return None
+
+        interface_state = previous_log.interface_state
+        if len(interface_state) != len(engine.interfaces):
+            return None
+        for interface in engine.interfaces:
+            try:
+                cost, failed, limit = interface_state[interface]
+            except KeyError:
+                return None
+            # Cost changes and restored Interfaces can open up better paths
+            if cost != interface.cost or (failed and not interface.failed):
+                return None
+
+        if [group['lsps'] for group in previous_log.groups] != [tuple(lsps) for lsps in lsp_groups]:
+            return None
+        if any(len(group['steps']) != len(group['lsps']) for group in previous_log.groups):
+            return None
+
+        return cls(previous_log, engine)
+
+    def _previous_reservable(self, edge):
+        limit = self.previous_limits[edge]
+        if limit is None:
+            return -1.0
+        return round(limit - round(self.previous_reserved[edge], 1), 1)
+
+    def refresh(self, edges):
+        """
+        Updates loosened for edges after their reservable bandwidth changed
+        in either run
+        """
+        reservable = self.engine.reservable
+        for edge in edges:
+            if reservable[edge] > self._previous_reservable(edge):
+                self.loosened.add(edge)
+            else:
+                self.loosened.discard(edge)
+
+    def previous_result(self, group_index, lsp_index, setup_bandwidth):
+        """
+        Returns (True, path) if the LSP at lsp_index in the group at
+        group_index can keep its placement from the previous run, where path
+        is its list of interface ids or None if it stays unrouted; returns
+        (False, None) if the LSP must be placed again.  Then replays the
+        previous run's placement of the LSP.
+        """
+        previous_bandwidth, previous_path, previous_reserved = \
+            self.previous_log.groups[group_index]['steps'][lsp_index]
+
+        result = (False, None)
+        if previous_bandwidth == setup_bandwidth and not self._newly_usable(setup_bandwidth):
+            if previous_path is None:
+                result = (True, None)
+            else:
+                edges = [self.interface_ids[interface] for interface in previous_path]
+                reservable, failed = self.engine.reservable, self.engine.failed
+                if all(not failed[edge] and reservable[edge] >= setup_bandwidth for edge in edges):
+                    result = (True, edges)
+
+        self._replay(previous_reserved)
+        return result
+
+    def _newly_usable(self, setup_bandwidth):
+        """
+        Is any Interface usable at setup_bandwidth now that was not usable
+        at the same point of the previous run?
+        """
+        reservable, failed = self.engine.reservable, self.engine.failed
+        for edge in self.loosened:
+            if (not failed[edge] and reservable[edge] >= setup_bandwidth and
+                    self._previous_reservable(edge) < setup_bandwidth):
+                return True
+        return False
+
+    def finish_group(self, group_index):
+        """
+        Replays the previous run's optimize step for the group at group_index, if it ran
+        """
+        previous_reserved = self.previous_log.groups[group_index]['reserved']
+        if previous_reserved is not None:
+            self._replay(previous_reserved)
+
+    def _replay(self, previous_reserved):
+        edges = []
+        for interface, reserved_bandwidth in previous_reserved.items():
+            edge = self.interface_ids[interface]
+            self.previous_reserved[edge] = reserved_bandwidth
+            edges.append(edge)
+        self.refresh(edges)
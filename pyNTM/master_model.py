@@ -9,14 +9,52 @@ This cannot be used to instantiate a functioning model directly.  Use a subclass
 FlexModel or PerformanceModel
 """
 
+from .change_tracking import ChangeTracker, topology_changed
+from .columnar_store import save_columnar_store
 from .demand import Demand
 from .exceptions import ModelException
+from .failure_sweep import FailureSweep
+from .graph_engine import GraphEngine, dag_paths, dag_paths_to_root, ecmp_splits, propagate_to_root
+from .lsp_warm_start import LSPRoutingLog, LSPWarmStart
+from .monte_carlo import MonteCarloFailures
 from .node import Node
+from .object_set import ObjectSet
+from .routing_matrix import RoutingMatrix
+from .snapshot import load_snapshot, save_snapshot
+from .sqlite_store import save_sqlite_store
 from .rsvp import RSVP_LSP
 from .srlg import SRLG
+from .utilities import read_model_tables
 
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
 from pprint import pprint
 
+# Journaled in place of a simulation attribute an object does not have yet
+_MISSING = object()
+
+
+def _object_set_property(set_name):
+    """
+    Returns a property for the model object set set_name; sets assigned to
+    it are copied into an ObjectSet that shares the model's ChangeTracker
+    """
+    attribute = '_' + set_name
+
+    def get_objects(self):
+        return getattr(self, attribute)
+
+    def set_objects(self, objects):
+        tracker = self.__dict__.get('_tracker')
+        if tracker is None:
+            tracker = self._tracker = ChangeTracker()
+        setattr(self, attribute, ObjectSet(objects, tracker))
+        topology_changed(self)
+
+    return property(get_objects, set_objects)
+
 
 class _MasterModel(object):
     """
@@ -33,7 +71,225 @@ class _MasterModel(object):
         self.circuit_objects = set()
         self.rsvp_lsp_objects = rsvp_lsp_objects
         self.srlg_objects = set()
-        self._parallel_lsp_groups = {}
+        self.routing_engine = 'networkx'
+        self.traffic_propagation = 'per_demand'
+        self.lsp_rerouting = 'full'
+        self._reverse_indexes = None
+        self._lsp_routing_log = None
+        self._graph_cache = {}
+        self._graph_cache_version = None
+        self._results_journaled = False
+        self._batch = None
+
+    @property
+    def routing_engine(self):
+        """
+        SPF engine used to route demands and place RSVP LSPs: 'networkx'
+        (default) or 'native' (array-backed GraphEngine; LSPs are placed with
+        GraphEngine.cspf against a single residual reservable bandwidth array)
+        """
+        return self._routing_engine
+
+    @routing_engine.setter
+    def routing_engine(self, value):
+        if value not in ('networkx', 'native'):
+            raise ModelException("routing_engine must be 'networkx' or 'native'")
+        self._routing_engine = value
+
+    @property
+    def traffic_propagation(self):
+        """
+        How IGP routed demand traffic is put on Interfaces:
+
+        - 'per_demand' (default): one SPF per source Node; each demand's
+          traffic is split over its ECMP paths separately and rounded to
+          1 decimal place per Interface
+        - 'per_destination': one reverse SPF per destination Node; the
+          traffic of all the demands to a destination is summed at each
+          source Node and pushed through that destination's ECMP DAG in a
+          single pass.  Interface traffic is the unrounded sum.
+        """
+        return self._traffic_propagation
+
+    @traffic_propagation.setter
+    def traffic_propagation(self, value):
+        if value not in ('per_demand', 'per_destination'):
+            raise ModelException("traffic_propagation must be 'per_demand' or 'per_destination'")
+        self._traffic_propagation = value
+
+    @property
+    def lsp_rerouting(self):
+        """
+        How update_simulation places RSVP LSPs:
+
+        - 'full' (default): every LSP is placed from scratch
+        - 'incremental': LSPs are placed with GraphEngine.cspf, warm started
+          from the previous 'incremental' run.  An LSP keeps its previous
+          path when a cold run would be certain to give it a path of the
+          same cost and hop count: its setup bandwidth is unchanged, its path
+          is still up with enough reservable bandwidth and no Interface has
+          become usable for it.  Other LSPs are placed again.  Results are
+          the same as a cold run, up to the random choice between equal
+          cost, equal hop count paths.  Interface cost changes, restored
+          Interfaces and added or removed Interfaces or LSPs make the next
+          run cold.
+        """
+        return self._lsp_rerouting
+
+    @lsp_rerouting.setter
+    def lsp_rerouting(self, value):
+        if value not in ('full', 'incremental'):
+            raise ModelException("lsp_rerouting must be 'full' or 'incremental'")
+        self._lsp_rerouting = value
+
+    # Attributes written by update_simulation; see checkpoint
+    _simulation_attributes = ('_reverse_indexes', '_lsp_routing_log')
+
+    # Lookup indexes: index name: (object set attribute, key function, unique keys?)
+    _index_definitions = {
+        'node': ('node_objects', lambda node: node.name, True),
+        'interface': ('interface_objects', lambda interface: interface._key, True),
+        'node_interfaces': ('interface_objects', lambda interface: interface.node_object.name, False),
+        'interfaces_between': ('interface_objects',
+                               lambda interface: (interface.node_object.name, interface.remote_node_object.name),
+                               False),
+        'demand': ('demand_objects', lambda demand: demand._key, True),
+        'lsp': ('rsvp_lsp_objects', lambda lsp: lsp._key, True),
+        'lsp_groups': ('rsvp_lsp_objects',
+                       lambda lsp: (lsp.source_node_object.name, lsp.dest_node_object.name), False),
+        'demand_groups': ('demand_objects',
+                          lambda demand: (demand.source_node_object.name, demand.dest_node_object.name), False),
+    }
+
+    interface_objects = _object_set_property('interface_objects')
+    node_objects = _object_set_property('node_objects')
+    demand_objects = _object_set_property('demand_objects')
+    rsvp_lsp_objects = _object_set_property('rsvp_lsp_objects')
+
+    def _index(self, index_name):
+        """
+        Returns the dict index index_name over one of the model's object
+        sets.  The index is built on first use and then kept up to date by
+        the object set as objects are added and removed.
+
+        :param index_name: key in _index_definitions
+        :return: dict of key: object (unique keys) or key: list of objects
+        """
+        set_name, key_function, unique = self._index_definitions[index_name]
+        return getattr(self, set_name).index(index_name, key_function, unique)
+
+    def _lookup(self, index_name, key):
+        """
+        Returns the object with key from a unique index, or None
+        """
+        return self._index(index_name).get(key)
+
+    def _lookup_all(self, index_name, key):
+        """
+        Returns the list of objects with key from a grouped index; the list
+        is empty if there are none
+        """
+        return list(self._index(index_name).get(key, ()))
+
+    def _reverse_index(self, index_name):
+        """
+        Returns a reverse index built from the last simulation, or None if
+        there is none to read from:
+
+        - 'interface_demands': dict of Interface: {Demand: traffic from the Demand}
+        - 'interface_lsps': dict of Interface: list of routed RSVP LSPs egressing it
+        - 'lsp_demands': dict of routed RSVP LSP: list of Demands it carries
+
+        Demands aggregated per destination by the simulation are added to
+        'interface_demands' from their ECMP splits on first use.
+        """
+        if self._reverse_indexes is None:
+            return None
+
+        if index_name == 'interface_demands':
+            deferred_demands = self._reverse_indexes['deferred_demands']
+            interface_demands = self._reverse_indexes['interface_demands']
+            while deferred_demands:
+                demand = deferred_demands.pop()
+                for interface, traffic in self._demand_traffic_per_int(demand).items():
+                    interface_demands.setdefault(interface, {})[demand] = traffic
+
+        return self._reverse_indexes[index_name]
+
+    def _cached_graph(self, build_graph, include_failed_circuits, needed_bw, rsvp_required):
+        """
+        Returns the graph build_graph makes for the filter parameters.
+        Graphs that need no reservable bandwidth (needed_bw = 0) are cached
+        until the model's topology version changes or Interfaces or Nodes
+        are added or removed; graphs filtered on needed_bw > 0 depend on
+        the reserved bandwidth and are built on every call.  Callers must
+        not modify the returned graph.
+
+        :param build_graph: graph builder method of self
+        :param include_failed_circuits: include interfaces from currently failed circuits?
+        :param needed_bw: how much reservable_bandwidth is required?
+        :param rsvp_required: only consider rsvp_enabled interfaces?
+        :return: networkx graph
+        """
+        if needed_bw:
+            return build_graph(include_failed_circuits=include_failed_circuits, needed_bw=needed_bw,
+                               rsvp_required=rsvp_required)
+
+        version = (self._tracker.topology_version, self.interface_objects.version, self.node_objects.version)
+        if version != self._graph_cache_version:
+            self._graph_cache = {}
+            self._graph_cache_version = version
+
+        key = (build_graph.__name__, include_failed_circuits, rsvp_required)
+        try:
+            return self._graph_cache[key]
+        except KeyError:
+            G = build_graph(include_failed_circuits=include_failed_circuits, needed_bw=needed_bw,
+                            rsvp_required=rsvp_required)
+            self._graph_cache[key] = G
+            return G
+
+    def _circuit_edges(self, include_failed_circuits=True, multigraph=False):
+        """
+        Groups the Interfaces in a single pass the way the weighted network
+        graph for include_failed_circuits holds them, so circuits can be
+        matched with hashed lookups instead of a graph and a scan per edge.
+
+        :param include_failed_circuits: include interfaces from currently
+        failed circuits?
+        :param multigraph: group as a MultiDiGraph (one edge per Interface)
+        instead of a DiGraph (one edge per local and remote Node pair)
+        :return: (edges, interfaces_between); edges is a list of (local node
+        name, remote node name, edge data dict) in the graph's edge order,
+        interfaces_between is a dict of (local node name, remote node name):
+        list of all the Interfaces between them
+        """
+        node_order = {}
+        edge_data = {}
+        interfaces_between = {}
+
+        for interface in self.interface_objects:
+            node_pair = (interface.node_object.name, interface.remote_node_object.name)
+            interfaces_between.setdefault(node_pair, []).append(interface)
+
+            if (include_failed_circuits is False and interface.failed is not False) or \
+                    interface.reservable_bandwidth < 0:
+                continue
+            data = {'cost': interface.cost, 'interface': interface, 'circuit_id': interface.circuit_id}
+            for node_name in node_pair:
+                node_order.setdefault(node_name, len(node_order))
+            if multigraph:
+                edge_data.setdefault(node_pair, []).append(data)
+            else:
+                # A DiGraph keeps the position of the first edge and the data of the last
+                edge_data[node_pair] = [data]
+
+        # Edges are ordered by local node, then by the order they were added
+        edges = [(local_node_name, remote_node_name, data)
+                 for local_node_name, remote_node_name in sorted(edge_data, key=lambda pair: node_order[pair[0]])
+                 for data in edge_data[(local_node_name, remote_node_name)]]
+
+        return edges, interfaces_between
 
     def simulation_diagnostics(self):
         """
@@ -79,7 +335,7 @@ class _MasterModel(object):
         dmds_riding_lsps = set()
 
         # Find unrouted LSPs
-        for dmd in (dmd for dmd in self.demand_objects):
+        for dmd in (dmd for dmd in self.demand_objects if not dmd._igp_routed):
             for object in dmd.path:
                 if isinstance(object, RSVP_LSP):
                     dmds_riding_lsps.add(dmd)
@@ -170,6 +426,62 @@ class _MasterModel(object):
             'reserved_bandwidth'], 1):  # pragma: no cover  # noqa
             int_res_bw_sum_error.add((interface, interface.reserved_bandwidth, tuple(interface.lsps(self))))
 
+    def _route_demands(self, model):
+        """
+        Routes demands in input 'model'
+
+        :param model: input 'model' parameter object (may be different from self)
+        :return: model with routed demands
+        """
+
+        per_destination = self.traffic_propagation == 'per_destination'
+
+        if self.routing_engine == 'native':
+            igp_spf = partial(GraphEngine.from_model(self).interface_spf, reverse=per_destination)
+        else:
+            igp_spf = self._make_networkx_igp_spf(reverse=per_destination)
+
+        # Shortest path DAGs, keyed by root Node name: the source Node, or
+        # the destination Node for per_destination traffic propagation.  A
+        # single SPF run per root serves every demand sharing that root.
+        spf_dags = {}
+
+        for demand in model.demand_objects:
+            demand.path = []
+
+            src = demand.source_node_object.name
+            dest = demand.dest_node_object.name
+
+            # Find all LSPs that can carry the demand:
+            for lsp in model._lookup_all('lsp_groups', (src, dest)):
+                if 'Unrouted' not in lsp.path:
+                    demand.path.append(lsp)
+
+            if demand.path == []:
+                root, far_end = (dest, src) if per_destination else (src, dest)
+
+                if root not in spf_dags:
+                    spf_dags[root] = igp_spf(root)
+                dag, dist = spf_dags[root]
+
+                if far_end not in dist:
+                    # There is no path, demand.path = 'Unrouted'
+                    demand.path = 'Unrouted'
+                    continue
+
+                # The hop-by-hop ECMP splits come straight off the DAG; the
+                # splits and the path list are only computed when needed
+                if per_destination:
+                    demand._set_ecmp_route(partial(propagate_to_root, dag, dist, {src: 1.0}),
+                                           partial(dag_paths_to_root, dag, src, dest))
+                else:
+                    demand._set_ecmp_route(partial(ecmp_splits, dag, dist, src, dest),
+                                           partial(dag_paths, dag, src, dest))
+
+        self._update_interface_utilization(spf_dags if per_destination else None)
+
+        return self
+
     def _demand_traffic_per_int(self, demand):  # common between model and parallel_link_model
         """
         Given a Demand object, return the (key, value) pairs for how much traffic each
@@ -196,6 +508,11 @@ class _MasterModel(object):
 
         """
 
+        # Demands routed by the simulation carry their ECMP splits
+        if demand._igp_routed:
+            return {interface: round(demand.traffic * fraction, 1)
+                    for interface, fraction in demand._ecmp_splits.items()}
+
         shortest_path_int_list = []
         for path in demand.path:
             shortest_path_int_list += path
@@ -321,20 +638,37 @@ class _MasterModel(object):
 
         return traff_per_int
 
-    def _update_interface_utilization(self):  # common between model and parallel_link_model
+    def _update_interface_utilization(self, destination_dags=None):  # common between model and parallel_link_model
         """Updates each interface's utilization; returns Model object with
-        updated interface utilization."""
+        updated interface utilization.
 
-        # In the model, in an interface is failed, set the traffic attribute
-        # to 'Down', otherwise, initialize the traffic to zero
-        for interface_object in self.interface_objects:
-            if interface_object.failed:
-                interface_object.traffic = 'Down'
-            else:
-                interface_object.traffic = 0.0
+        :param destination_dags: dict of destination Node name: (next hop DAG, dist)
+        for per_destination traffic propagation; IGP routed demands are then
+        aggregated per destination instead of being added one at a time
+        """
+
+        # Traffic is accumulated in an array indexed by interface id and
+        # written to the Interface objects once, at the end
+        interface_list = list(self.interface_objects)
+        interface_ids = {interface: interface_id for interface_id, interface in enumerate(interface_list)}
+        interface_traffic = array('d', [0.0]) * len(interface_list)
 
         routed_demand_object_generator = (demand_object for demand_object in self.demand_objects if
-                                          'Unrouted' not in demand_object.path)
+                                          demand_object._routed)
+
+        # dict of destination Node name: {source Node name: summed traffic}
+        traffic_per_destination = {}
+
+        # Reverse indexes for Interface.demands, Interface.lsps and
+        # RSVP_LSP.demands_on_lsp; see _reverse_index
+        interface_demands = {}
+        interface_lsps = {}
+        lsp_demands = {}
+        deferred_demands = []
+        for lsp in (lsp for lsp in self.rsvp_lsp_objects if 'Unrouted' not in lsp.path):
+            lsp_demands[lsp] = []
+            for interface in lsp.path['interfaces']:
+                interface_lsps.setdefault(interface, []).append(lsp)
 
         # For each demand that is not Unrouted, add its traffic value to each
         # interface object in the path
@@ -346,12 +680,9 @@ class _MasterModel(object):
             # to the LSP's path interfaces.
 
             # Can demand take LSP?
-            routed_lsp_generator = (lsp for lsp in self.rsvp_lsp_objects if 'Unrouted' not in lsp.path)
-            lsps_for_demand = []
-            for lsp in routed_lsp_generator:
-                if (lsp.source_node_object == demand_object.source_node_object and
-                        lsp.dest_node_object == demand_object.dest_node_object):
-                    lsps_for_demand.append(lsp)
+            lsps_for_demand = [lsp for lsp in self._lookup_all('lsp_groups', (demand_object.source_node_object.name,
+                                                                              demand_object.dest_node_object.name))
+                               if 'Unrouted' not in lsp.path]
 
             if lsps_for_demand != []:
                 # Find each demands path list, determine the ECMP split across the
@@ -362,15 +693,25 @@ class _MasterModel(object):
 
                 # Get the interfaces for each LSP in the demand's path
                 for lsp in lsps_for_demand:
+                    lsp_demands[lsp].append(demand_object)
 
                     lsp_path_interfaces = lsp.path['interfaces']
 
                     # Now that all interfaces are known,
                     # update traffic on interfaces demand touches
                     for interface in lsp_path_interfaces:
-                        # Get the interface's existing traffic and add the
-                        # portion of the demand's traffic
-                        interface.traffic += traffic_per_demand_path
+                        # Add the portion of the demand's traffic
+                        interface_traffic[interface_ids[interface]] += traffic_per_demand_path
+                        demand_shares = interface_demands.setdefault(interface, {})
+                        demand_shares[demand_object] = demand_shares.get(demand_object, 0.0) + traffic_per_demand_path
+
+            # Aggregate IGP routed demands per destination; the sums are
+            # pushed through each destination's DAG below
+            elif destination_dags is not None and demand_object._igp_routed:
+                source_traffic = traffic_per_destination.setdefault(demand_object.dest_node_object.name, {})
+                source_name = demand_object.source_node_object.name
+                source_traffic[source_name] = source_traffic.get(source_name, 0) + demand_object.traffic
+                deferred_demands.append(demand_object)
 
             # If demand_object is not taking LSPs, IGP route it, using hop by hop ECMP
             else:
@@ -381,9 +722,28 @@ class _MasterModel(object):
                 # {'G-D': 2.5, 'A-B': 10.0, 'B-D': 2.5, 'A-D': 5.0, 'D-F': 10.0, 'B-G': 2.5}
                 demand_traffic_per_int = self._demand_traffic_per_int(demand_object)
 
-                # Get the interface objects and update them with the traffic
                 for interface, traffic_from_demand in demand_traffic_per_int.items():
-                    interface.traffic += traffic_from_demand
+                    interface_traffic[interface_ids[interface]] += traffic_from_demand
+                    interface_demands.setdefault(interface, {})[demand_object] = traffic_from_demand
+
+        # One pass per destination for the aggregated demands
+        for dest_name, source_traffic in traffic_per_destination.items():
+            succ, dist = destination_dags[dest_name]
+            for interface, traffic in propagate_to_root(succ, dist, source_traffic).items():
+                interface_traffic[interface_ids[interface]] += traffic
+
+        # In the model, if an interface is failed, set the traffic attribute
+        # to 'Down', otherwise set it to the accumulated traffic
+        for interface_id, interface in enumerate(interface_list):
+            if interface.failed:
+                interface.traffic = 'Down'
+            else:
+                interface.traffic = interface_traffic[interface_id]
+
+        self._reverse_indexes = {'interface_demands': interface_demands,
+                                 'interface_lsps': interface_lsps,
+                                 'lsp_demands': lsp_demands,
+                                 'deferred_demands': deferred_demands}
 
         return self
 
@@ -400,10 +760,10 @@ class _MasterModel(object):
             interface.reserved_bandwidth = 0
 
         # Find parallel LSP groups
-        parallel_lsp_groups = self.parallel_lsp_groups()  # TODO - can this be optimized?
+        parallel_lsp_groups = self.parallel_lsp_groups()
 
         # Find all the parallel demand groups
-        parallel_demand_groups = self.parallel_demand_groups()  # TODO - can this be optimized?
+        parallel_demand_groups = self.parallel_demand_groups()
 
         # Route the LSPs by parallel group
         self._route_parallel_lsp_groups(parallel_demand_groups, parallel_lsp_groups)
@@ -424,8 +784,22 @@ class _MasterModel(object):
         # Counter for LSP groups
         counter = 1
 
+        # The native engine tracks reservable bandwidth in one array for all the groups
+        use_cspf = self.routing_engine == 'native' or self.lsp_rerouting == 'incremental'
+        if use_cspf:
+            cspf_engine = GraphEngine.from_model(self)
+
+        # Incremental rerouting records this run's placements and replays the previous run's
+        warm_start = None
+        routing_log = None
+        if self.lsp_rerouting == 'incremental':
+            warm_start = LSPWarmStart.from_log(self._lsp_routing_log, cspf_engine,
+                                               list(parallel_lsp_groups.values()))
+            routing_log = LSPRoutingLog(cspf_engine.interfaces)
+        self._lsp_routing_log = routing_log
+
         # Route LSPs by source, dest (parallel) groups
-        for group, lsps in parallel_lsp_groups.items():
+        for group_index, (group, lsps) in enumerate(parallel_lsp_groups.items()):
 
             num_lsps_in_group = len(lsps)
 
@@ -449,7 +823,13 @@ class _MasterModel(object):
 
             # Determine LSP's specific path and reserved bandwidth; also consume
             # reserved bandwidth on transited Interfaces
-            self._determine_lsp_state_info(lsps, traff_on_each_group_lsp)
+            if use_cspf:
+                if routing_log is not None:
+                    routing_log.start_group(lsps)
+                self._determine_lsp_state_info_cspf(cspf_engine, lsps, traff_on_each_group_lsp,
+                                                    warm_start, group_index, routing_log)
+            else:
+                self._determine_lsp_state_info(lsps, traff_on_each_group_lsp)
 
             routed_lsps_in_group = [lsp for lsp in lsps if lsp.path != 'Unrouted']
 
@@ -458,9 +838,73 @@ class _MasterModel(object):
             # setup bandwidth, determine which LSPs can signal and for how much traffic
             if len(routed_lsps_in_group) != len(lsps) and len(routed_lsps_in_group) > 0:
                 self._optimize_parallel_lsp_group_res_bw(self, routed_lsps_in_group, traffic_in_demand_group)
+                if use_cspf:
+                    cspf_engine.update_reservable()
+                if routing_log is not None:
+                    routing_log.add_optimize_step(cspf_engine.interfaces)
+
+            if warm_start is not None:
+                warm_start.finish_group(group_index)
+                if len(routed_lsps_in_group) != len(lsps) and len(routed_lsps_in_group) > 0:
+                    warm_start.refresh(range(len(cspf_engine.interfaces)))
 
             counter += 1
 
+    def _determine_lsp_state_info_cspf(self, cspf_engine, lsps, traff_on_each_group_lsp,
+                                       warm_start=None, group_index=None, routing_log=None):
+        """
+        Same as _determine_lsp_state_info, but finds each LSP's path with
+        cspf_engine.cspf instead of building a networkx graph per LSP, and
+        updates cspf_engine's reservable bandwidth for the Interfaces each
+        LSP reserves bandwidth on.
+
+        :param cspf_engine: GraphEngine built from self
+        :param lsps: List of parallel LSPs (LSPs with common source/dest nodes)
+        :param traff_on_each_group_lsp: How much traffic each LSP should attempt
+        to carry
+        :param warm_start: LSPWarmStart for incremental rerouting; LSPs it
+        clears keep their previous placement
+        :param group_index: position of lsps in the routing order, for warm_start
+        :param routing_log: LSPRoutingLog to record the placements in
+        :return: None; determines path and reserved bandwidth for each LSP in lsps
+        and also consumes reservable bandwidth on each Interface each LSP transits
+        """
+        for lsp_index, lsp in enumerate(lsps):
+            # Check to see if configured_setup_bandwidth is set; if so,
+            # set reserved_bandwidth and setup_bandwidth equal to
+            # configured_setup_bandwidth value
+            if lsp.configured_setup_bandwidth is None:
+                lsp.reserved_bandwidth = traff_on_each_group_lsp
+                lsp.setup_bandwidth = traff_on_each_group_lsp
+            else:
+                lsp.reserved_bandwidth = lsp.configured_setup_bandwidth
+                lsp.setup_bandwidth = lsp.configured_setup_bandwidth
+
+            reuse = False
+            if warm_start is not None:
+                reuse, edges = warm_start.previous_result(group_index, lsp_index, lsp.setup_bandwidth)
+            if not reuse:
+                edges = cspf_engine.cspf(cspf_engine.node_ids[lsp.source_node_object.name],
+                                         cspf_engine.node_ids[lsp.dest_node_object.name],
+                                         lsp.setup_bandwidth)
+            if edges is None:
+                lsp.path = 'Unrouted'
+                lsp.reserved_bandwidth = 'Unrouted'
+                if routing_log is not None:
+                    routing_log.add_step(lsp.setup_bandwidth, None)
+                continue
+
+            # Change LSP path into more verbose form and set LSP's path
+            self._add_lsp_path_data(lsp, [cspf_engine.interfaces[edge] for edge in edges])
+
+            for interface in lsp.path['interfaces']:
+                interface.reserved_bandwidth += lsp.reserved_bandwidth
+            cspf_engine.update_reservable(edges)
+            if warm_start is not None:
+                warm_start.refresh(edges)
+            if routing_log is not None:
+                routing_log.add_step(lsp.setup_bandwidth, lsp.path['interfaces'])
+
     def _add_lsp_path_data(self, lsp, path):
         """
         Adds data about an LSP's path: cost of path and reservable bandwidth
@@ -540,29 +984,8 @@ class _MasterModel(object):
 
         """
 
-        if self._parallel_lsp_groups == {}:
-            src_node_names = set([lsp.source_node_object.name for lsp in self.rsvp_lsp_objects])
-            dest_node_names = set([lsp.dest_node_object.name for lsp in self.rsvp_lsp_objects])
-
-            parallel_lsp_groups = {}
-
-            for src_node_name in src_node_names:
-                for dest_node_name in dest_node_names:
-                    key = '{}-{}'.format(src_node_name, dest_node_name)
-                    parallel_lsp_groups[key] = []
-                    for lsp in self.rsvp_lsp_objects:
-                        if (lsp.source_node_object.name == src_node_name and
-                                lsp.dest_node_object.name == dest_node_name):
-                            parallel_lsp_groups[key].append(lsp)
-
-                    if parallel_lsp_groups[key] == []:
-                        del parallel_lsp_groups[key]
-
-            self._parallel_lsp_groups = parallel_lsp_groups
-            return parallel_lsp_groups
-
-        else:
-            return self._parallel_lsp_groups
+        return {'{}-{}'.format(src_node_name, dest_node_name): list(lsps)
+                for (src_node_name, dest_node_name), lsps in self._index('lsp_groups').items()}
 
     def parallel_demand_groups(self):
         """
@@ -580,24 +1003,8 @@ class _MasterModel(object):
             'F-E': [Demand(source = F, dest = E, traffic = 400, name = 'dmd_f_e_1')]}
         """
 
-        src_node_names = set([dmd.source_node_object.name for dmd in self.demand_objects])
-        dest_node_names = set([dmd.dest_node_object.name for dmd in self.demand_objects])
-
-        parallel_demand_groups = {}
-
-        for src_node_name in src_node_names:
-            for dest_node_name in dest_node_names:
-                key = '{}-{}'.format(src_node_name, dest_node_name)
-                parallel_demand_groups[key] = []
-                for dmd in self.demand_objects:
-                    if (dmd.source_node_object.name == src_node_name and
-                            dmd.dest_node_object.name == dest_node_name):
-                        parallel_demand_groups[key].append(dmd)
-
-                if parallel_demand_groups[key] == []:
-                    del parallel_demand_groups[key]
-
-        return parallel_demand_groups
+        return {'{}-{}'.format(src_node_name, dest_node_name): list(dmds)
+                for (src_node_name, dest_node_name), dmds in self._index('demand_groups').items()}
 
     def _unique_interface_per_node(self):
         """
@@ -607,17 +1014,16 @@ class _MasterModel(object):
 
         exception_interfaces = set()  # duplicate interfaces
 
-        for node in (node for node in self.node_objects):
-            node_int_list = [interface.name for interface in node.interfaces(self)]
-            node_int_set = set(node_int_list)
+        # Interface names that appear more than once on a node, by node name
+        name_counts = Counter((interface.node_object.name, interface.name) for interface in self.interface_objects)
+        duplicate_names = {}
+        for (node_name, interface_name), count in name_counts.items():
+            if count > 1:
+                duplicate_names.setdefault(node_name, []).append(interface_name)
 
-            if len(node_int_list) > len(node_int_set):
-                # Find which ints are duplicate
-                for item in node_int_set:
-                    node_int_list.remove(item)
-                # Add the remaining node and interface name to exception_interfaces
-                for item in node_int_list:
-                    exception_interfaces.add((node, item))
+        for node in (node for node in self.node_objects):
+            for item in duplicate_names.get(node.name, []):
+                exception_interfaces.add((node, item))
 
         if len(exception_interfaces) > 0:
             message = ("Interface names must be unique per node.  The following"
@@ -633,6 +1039,98 @@ class _MasterModel(object):
         """
         return set(interface.circuit_id for interface in self.interface_objects)
 
+    @contextmanager
+    def batch(self):
+        """
+        Context manager for bulk changes to the model.  Inside a batch the
+        add_* and unfail_interface methods do not validate the model; it
+        is validated once, when the outermost batch ends.  If the batch
+        raises, the objects added in it are removed again and the exception
+        is re-raised.  Batches nest; the inner ones have no effect.
+
+        Example::
+
+            with model.batch():
+                model.add_node(Node('X'))
+                model.add_circuit(model.get_node_object('A'), model.get_node_object('X'),
+                                  'A-to-X', 'X-to-A', circuit_id=99)
+                model.add_demands([('A', 'X', 10, 'dmd_a_x')])
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        batch = self._batch = {'validate': False, 'added': []}
+        try:
+            yield
+            self._batch = None
+            if batch['validate']:
+                self.validate_model()
+        except BaseException:
+            self._discard_added(batch, 0)
+            raise
+        finally:
+            self._batch = None
+
+    def _validate_or_defer(self):
+        """
+        Validates the model, or marks it for validation at the end of the batch
+        """
+        if self._batch is None:
+            self.validate_model()
+        else:
+            self._batch['validate'] = True
+
+    def _record_added(self, set_name, objs):
+        """
+        Notes objs, already added to the set named set_name, so a failed
+        batch can remove them again
+        """
+        if self._batch is not None:
+            self._batch['added'].append((set_name, list(objs)))
+
+    def _discard_added(self, batch, start):
+        """
+        Removes the objects added in batch since its start-th addition
+        """
+        for set_name, objs in reversed(batch['added'][start:]):
+            object_set = getattr(self, set_name)
+            for obj in objs:
+                object_set.discard(obj)
+        del batch['added'][start:]
+
+    def _add_objects(self, set_name, objs):
+        """
+        Adds objs to the set named set_name (such as 'demand_objects')
+        """
+        object_set = getattr(self, set_name)
+        for obj in objs:
+            object_set.add(obj)
+        self._record_added(set_name, objs)
+
+    def _add_in_bulk(self, description, rows, add_row):
+        """
+        Calls add_row(*row) for each row (add_row(row) for a dict) in a
+        batch.  The errors of all bad rows are collected and raised together,
+        after which none of the rows have been added.
+
+        :return: list of the return values of add_row
+        """
+        added = []
+        errors = []
+        with self.batch():
+            start = len(self._batch['added'])
+            for row in rows:
+                try:
+                    added.append(add_row(row) if isinstance(row, dict) else add_row(*row))
+                except (ModelException, ValueError, TypeError) as error:
+                    errors.append((row, error.args[0] if error.args else repr(error)))
+            if errors:
+                self._discard_added(self._batch, start)
+                message = "{} of the {} could not be added".format(len(errors), description)
+                raise ModelException((message, errors))
+        return added
+
     def add_demand(self, source_node_name, dest_node_name, traffic=0, name='none'):
         """
         Adds a traffic load (Demand) from point A to point B in the
@@ -647,111 +1145,234 @@ class _MasterModel(object):
         source_node_object = self.get_node_object(source_node_name)
         dest_node_object = self.get_node_object(dest_node_name)
         added_demand = Demand(source_node_object, dest_node_object, traffic, name)
-        if added_demand._key in set([demand._key for demand in self.demand_objects]):
+        if self._lookup('demand', added_demand._key) is not None:
             message = '{} already exists in demand_objects'.format(added_demand)
             raise ModelException(message)
-        self.demand_objects.add(added_demand)
+        self._add_objects('demand_objects', [added_demand])
+
+        self._validate_or_defer()
+
+    def add_demands(self, demands):
+        """
+        Adds many Demands at once; see add_demand.  The model is validated
+        once.  If any Demand cannot be added, none are: the error
+        for each bad row is listed in the ModelException.
 
-        self.validate_model()
+        :param demands: iterable of (source node name, dest node name,
+        traffic, name)
+        :return: list of the new Demand objects
+        """
+        def add_row(source_node_name, dest_node_name, traffic, name):
+            demand = Demand(self.get_node_object(source_node_name), self.get_node_object(dest_node_name),
+                            traffic, name)
+            if self._lookup('demand', demand._key) is not None:
+                raise ModelException('{} already exists in demand_objects'.format(demand))
+            self._add_objects('demand_objects', [demand])
+            return demand
+
+        return self._add_in_bulk('Demands', demands, add_row)
 
     @classmethod
-    def _add_lsp_from_data(cls, demands_info_end_index, lines, lsp_set, node_set):
+    def _read_model_file(cls, data_file):
+        """
+        Reads the tables of a model data file (see load_model_file) line by
+        line.  Duplicate Interfaces, Demands and RSVP LSPs are found and
+        endpoints are resolved with dicts, so reading is linear in the size
+        of the file.
+
+        :param data_file: file with model info
+        :return: interface_set, node_set, demand_set, lsp_set, srlg_members;
+        srlg_members is a dict of SRLG name: set of its member Nodes and
+        Interfaces (see _add_srlg_members)
+        """
+        interfaces = {}  # _key: Interface
+        nodes = {}  # name: Node
+        demands = {}  # _key: Demand
+        lsps = {}  # _key: RSVP_LSP
+        srlg_members = {}  # name: set of Nodes and Interfaces
+        circuit_ids = []
+        table = 0
+
+        for table, line_index, line in read_model_tables(data_file):
+            if table == 0:
+                new_interface = cls._interface_from_data(line_index, line)
+                circuit_ids.append(new_interface.circuit_id)
+                if new_interface._key not in interfaces:
+                    interfaces[new_interface._key] = new_interface
+                else:
+                    print("{} already exists in model; disregarding line {}".format(new_interface, line_index))
+
+                # Derive Nodes from the Interface data
+                nodes.setdefault(new_interface.node_object.name, new_interface.node_object)
+                nodes.setdefault(new_interface.remote_node_object.name, new_interface.remote_node_object)
+                continue
+
+            if circuit_ids is not None:
+                cls._check_circuit_ids(circuit_ids)
+                circuit_ids = None
+
+            if table == 1:
+                cls._add_node_from_data(line, nodes)
+            elif table == 2:
+                cls._add_demand_from_data(line_index, line, demands, nodes)
+            elif table == 3:
+                cls._add_lsp_from_data(line_index, line, lsps, nodes)
+            else:
+                cls._add_srlg_member_from_data(line, srlg_members, nodes, interfaces)
+
+        if circuit_ids is not None:
+            cls._check_circuit_ids(circuit_ids)
+
+        return set(interfaces.values()), set(nodes.values()), set(demands.values()), set(lsps.values()), \
+            srlg_members
+
+    @staticmethod
+    def _number_from_data(value):
+        """
+        Returns a number field of a model data file as an int, or as a
+        float if it is not a whole number
         """
-        Adds LSP data from info in a data file to Class
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
 
-        :param demands_info_end_index: line index where demand info ends
-        :param lines: input lines from data file
-        :param lsp_set: set of RSVP_LSP objects
-        :param node_set: set of Node objects
+    @classmethod
+    def _add_srlg_member_from_data(cls, srlg_line, srlg_members, nodes, interfaces):
+        """
+        Adds the Node or Interface in a line of the SRLG_TABLE to the
+        members of its SRLG
+
+        :param srlg_line: line of data for SRLG membership: SRLG name, Node
+        name and, for an Interface member, Interface name
+        :param srlg_members: dict of SRLG name: set of member Nodes and Interfaces
+        :param nodes: dict of Node name: Node object
+        :param interfaces: dict of Interface _key: Interface object
+        """
+        srlg_info = srlg_line.split()
+        if len(srlg_info) == 2:
+            member = nodes.get(srlg_info[1])
+        elif len(srlg_info) == 3:
+            member = interfaces.get((srlg_info[2], srlg_info[1]))
+        else:
+            raise ModelException("SRLG_TABLE lines need an SRLG name, a Node name and optionally an Interface "
+                                 "name; {}".format(srlg_info))
+        if member is None:
+            raise ModelException("No Node or Interface matching {} in Model".format(srlg_info))
+        srlg_members.setdefault(srlg_info[0], set()).add(member)
 
+    def _add_srlg_members(self, srlg_members):
         """
-        lsp_info_begin_index = demands_info_end_index + 3
-        lsp_lines = lines[lsp_info_begin_index:]
-        for lsp_line in lsp_lines:
-            lsp_info = lsp_line.split()
-            source = lsp_info[0]
-            try:
-                source_node = [node for node in node_set if node.name == source][0]
-            except IndexError:
-                err_msg = "No Node with name {} in Model; {}".format(source, lsp_info)
-                raise ModelException(err_msg)
-            dest = lsp_info[1]
+        Creates the SRLGs read from a model data file and adds their members
+
+        :param srlg_members: dict of SRLG name: set of member Nodes and Interfaces
+        """
+        for srlg_name, members in srlg_members.items():
+            srlg = SRLG(srlg_name, self)
+            for member in members:
+                member._srlgs.add(srlg)
+
+    @classmethod
+    def _check_circuit_ids(cls, circuit_ids):
+        """
+        Checks the circuit_ids read from the INTERFACES_TABLE of a model
+        data file; a model class that reads circuit_ids from the file
+        raises ModelException if they are not valid
+
+        :param circuit_ids: list of the circuit_id on each interface line
+        """
+        pass
+
+    @classmethod
+    def _endpoint_nodes(cls, info, nodes):
+        """
+        Returns the source and destination Node objects named in the first
+        two fields of a line of Demand or LSP data
+
+        :param info: fields of the line of data
+        :param nodes: dict of Node name: Node object
+        """
+        endpoints = []
+        for node_name in info[:2]:
             try:
-                dest_node = [node for node in node_set if node.name == dest][0]
-            except IndexError:
-                err_msg = "No Node with name {} in Model; {}".format(dest, lsp_info)
+                endpoints.append(nodes[node_name])
+            except KeyError:
+                err_msg = "No Node with name {} in Model; {}".format(node_name, info)
                 raise ModelException(err_msg)
-            name = lsp_info[2]
-            try:
-                configured_setup_bw = float(lsp_info[3])
-            except IndexError:
-                configured_setup_bw = None
-            new_lsp = RSVP_LSP(source_node, dest_node, name, configured_setup_bandwidth=configured_setup_bw)
+        return endpoints
 
-            if new_lsp._key not in set([lsp._key for lsp in lsp_set]):
-                lsp_set.add(new_lsp)
-            else:
-                print("{} already exists in model; disregarding line {}".format(new_lsp, lines.index(lsp_line)))
+    @classmethod
+    def _add_lsp_from_data(cls, line_index, lsp_line, lsps, nodes):
+        """
+        Adds LSP from line of data
+
+        :param line_index: index of lsp_line in the data file
+        :param lsp_line: line of data for LSP
+        :param lsps: dict of LSP _key: RSVP_LSP object
+        :param nodes: dict of Node name: Node object
+        """
+        lsp_info = lsp_line.split()
+        source_node, dest_node = cls._endpoint_nodes(lsp_info, nodes)
+        name = lsp_info[2]
+        try:
+            configured_setup_bw = float(lsp_info[3])
+        except IndexError:
+            configured_setup_bw = None
+        new_lsp = RSVP_LSP(source_node, dest_node, name, configured_setup_bandwidth=configured_setup_bw)
+
+        if new_lsp._key not in lsps:
+            lsps[new_lsp._key] = new_lsp
+        else:
+            print("{} already exists in model; disregarding line {}".format(new_lsp, line_index))
 
     @classmethod
-    def _add_demand_from_data(cls, demand_line, demand_set, lines, node_set):
+    def _add_demand_from_data(cls, line_index, demand_line, demands, nodes):
         """
         Adds Demand from line of data
 
+        :param line_index: index of demand_line in the data file
         :param demand_line: line of data for demand
-        :param demand_set: set of Demands in model
-        :param lines: lines of data from input file
-        :param node_set: set of Nodes from model
-
+        :param demands: dict of Demand _key: Demand object
+        :param nodes: dict of Node name: Node object
         """
         demand_info = demand_line.split()
-        source = demand_info[0]
-        try:
-            source_node = [node for node in node_set if node.name == source][0]
-        except IndexError:
-            err_msg = "No Node with name {} in Model; {}".format(source, demand_info)
-            raise ModelException(err_msg)
-        dest = demand_info[1]
-        try:
-            dest_node = [node for node in node_set if node.name == dest][0]
-        except IndexError:
-            err_msg = "No Node with name {} in Model; {}".format(dest, demand_info)
-            raise ModelException(err_msg)
+        source_node, dest_node = cls._endpoint_nodes(demand_info, nodes)
 
-        traffic = int(demand_info[2])
+        traffic = cls._number_from_data(demand_info[2])
         name = demand_info[3]
         if name == '':
             demand_name = 'none'
         else:
             demand_name = name
         new_demand = Demand(source_node, dest_node, traffic, demand_name)
-        if new_demand._key not in set([dmd._key for dmd in demand_set]):
-            demand_set.add(new_demand)
+        if new_demand._key not in demands:
+            demands[new_demand._key] = new_demand
         else:
-            print("{} already exists in model; disregarding line {}".format(new_demand,
-                                                                            lines.index(demand_line)))
+            print("{} already exists in model; disregarding line {}".format(new_demand, line_index))
 
     @classmethod
-    def _add_node_from_data(cls, demand_set, interface_set, lines, lsp_set, node_line, node_set):
+    def _add_node_from_data(cls, node_line, nodes):
+        """
+        Adds Node from line of data, or sets the lat and lon of a Node
+        implied by the interfaces
+
+        :param node_line: line of data for node
+        :param nodes: dict of Node name: Node object
+        """
         node_info = node_line.split()
         node_name = node_info[0]
         try:
-            node_lat = int(node_info[2])
+            node_lat = cls._number_from_data(node_info[2])
         except (ValueError, IndexError):
             node_lat = 0
         try:
-            node_lon = int(node_info[1])
+            node_lon = cls._number_from_data(node_info[1])
         except (ValueError, IndexError):
             node_lon = 0
-        new_node = Node(node_name)
-        if new_node.name not in set([node.name for node in node_set]):  # Pick up orphan nodes
-            node_set.add(new_node)
-            new_node.lat = node_lat
-            new_node.lon = node_lon
-        else:
-            existing_node = cls(interface_set, node_set, demand_set, lsp_set).get_node_object(node_name=node_name)
-            existing_node.lat = node_lat
-            existing_node.lon = node_lon
+        if node_name not in nodes:  # Pick up orphan nodes
+            nodes[node_name] = Node(node_name)
+        nodes[node_name].lat = node_lat
+        nodes[node_name].lon = node_lon
 
     def _does_interface_exist(self, interface_name, node_object_name):
         """
@@ -761,10 +1382,7 @@ class _MasterModel(object):
         :param interface_name: Interface name
         :param node_object_name: Node name
         """
-        int_key = (interface_name, node_object_name)
-        interface_key_iterator = (interface._key for interface in self.interface_objects)
-
-        if int_key not in (interface_key_iterator):
+        if self._lookup('interface', (interface_name, node_object_name)) is None:
             raise ModelException('specified interface does not exist')
 
     def get_circuit_object_from_interface(self, interface_name, node_name):
@@ -818,11 +1436,306 @@ class _MasterModel(object):
         """
         unrouted_demands = []
         for demand in (demand for demand in self.demand_objects):
-            if demand.path == "Unrouted":
+            if not demand._routed:
                 unrouted_demands.append(demand)
 
         return unrouted_demands
 
+    def routing_matrix(self):
+        """
+        Returns the routing result of the last update_simulation() as a
+        sparse Interfaces x Demands RoutingMatrix of the fraction of each
+        Demand's traffic on each Interface.  Use RoutingMatrix.evaluate to get
+        per-Interface traffic and utilization for a new traffic vector without
+        re-routing.
+        """
+        return RoutingMatrix.from_model(self)
+
+    def checkpoint(self):
+        """
+        Marks the current state of the model for rollback.  From the first
+        checkpoint on, the model keeps an undo journal: Interface, Node and
+        SRLG failures (fail_interface, unfail_interface, fail_node,
+        fail_srlg, ...), Interface cost and capacity edits and Demand
+        traffic edits record the previous value, and the first
+        update_simulation after each checkpoint records the simulation
+        results it replaces (the _simulation_attributes of the model and of
+        its Interfaces, Demands and RSVP LSPs).  Adding or removing objects,
+        renaming them and changing model settings such as routing_engine
+        are not journaled and are kept by rollback.
+
+        :return: checkpoint to pass to rollback
+        """
+        if self._tracker.journal is None:
+            self._tracker.journal = []
+        self._results_journaled = False
+        return len(self._tracker.journal)
+
+    def rollback(self, checkpoint):
+        """
+        Restores the model's state and simulation results to what they were
+        at checkpoint by undoing the journaled changes made since, newest
+        first; there is no need to run update_simulation afterwards.
+        Checkpoints taken after checkpoint can no longer be used.  Other
+        models, including forks of this one, are not affected.
+
+        :param checkpoint: value returned by checkpoint
+        """
+        journal = self._tracker.journal
+        if journal is None or not 0 <= checkpoint <= len(journal):
+            raise ModelException("{} is not a checkpoint of this model".format(checkpoint))
+
+        while len(journal) > checkpoint:
+            model_object, attribute, value = journal.pop()
+            if attribute is None:
+                # Simulation results replaced by an update_simulation
+                for simulated_object, state in value:
+                    for attribute, result in zip(simulated_object._simulation_attributes, state):
+                        if result is _MISSING:
+                            simulated_object.__dict__.pop(attribute, None)
+                        else:
+                            simulated_object.__dict__[attribute] = result
+            else:
+                model_object.__dict__[attribute] = value
+        self._results_journaled = False
+        topology_changed(self)
+
+    def release_checkpoints(self):
+        """
+        Stops journaling changes and drops all checkpoints
+        """
+        self._tracker.journal = None
+
+    def _journal_simulation(self):
+        """
+        Records the current simulation results in the undo journal before
+        update_simulation replaces them, if a checkpoint is open and they
+        have not been recorded since the last checkpoint
+        """
+        if self._tracker.journal is None or self._results_journaled:
+            return
+        self._results_journaled = True
+        state = []
+        for simulated_objects in ([self], self.interface_objects, self.demand_objects, self.rsvp_lsp_objects):
+            for simulated_object in simulated_objects:
+                attributes = simulated_object.__dict__
+                state.append((simulated_object, tuple(attributes.get(attribute, _MISSING)
+                                                      for attribute in simulated_object._simulation_attributes)))
+        self._tracker.journal.append((self, None, state))
+
+    def fork(self):
+        """
+        Returns a child model for what-if analysis, much cheaper than
+        copy.deepcopy(model).  The child gets its own Node, Interface, SRLG,
+        Demand and RSVP LSP objects whose attributes start as shallow copies
+        of the parent's: names, circuit ids and other definitions are shared,
+        while failure states, costs, capacities and traffic can be changed
+        in the child without touching the parent.  Simulation results are
+        not copied; run update_simulation on the child, and its results stay
+        in the child.
+
+        :return: model of the same class as self, not yet simulated
+
+        Example::
+
+            child = model.fork()
+            child.fail_node('A')
+            child.update_simulation()
+        """
+        child = self.__class__(set(), set(), set(), set())
+        child.routing_engine = self.routing_engine
+        child.traffic_propagation = self.traffic_propagation
+        child.lsp_rerouting = self.lsp_rerouting
+
+        srlgs = {}
+        for srlg in self.srlg_objects:
+            srlgs[srlg.name] = _fork_object(srlg)
+            srlgs[srlg.name].model = child
+        child.srlg_objects = set(srlgs.values())
+
+        nodes = {}
+
+        def fork_node(node):
+            if node.name not in nodes:
+                nodes[node.name] = _fork_object(node)
+                nodes[node.name]._srlgs = set(srlgs[srlg.name] for srlg in node._srlgs)
+            return nodes[node.name]
+
+        for node in self.node_objects:
+            fork_node(node)
+
+        for interface in self.interface_objects:
+            forked = _fork_object(interface)
+            forked.node_object = fork_node(interface.node_object)
+            forked.remote_node_object = fork_node(interface.remote_node_object)
+            forked._srlgs = set(srlgs[srlg.name] for srlg in interface._srlgs)
+            forked.traffic = 0.0
+            forked._reserved_bandwidth = 0.0
+            child.interface_objects.add(forked)
+
+        for demand in self.demand_objects:
+            forked = _fork_object(demand)
+            forked.source_node_object = fork_node(demand.source_node_object)
+            forked.dest_node_object = fork_node(demand.dest_node_object)
+            forked._ecmp_splits_cache = None
+            forked.path = 'Unrouted'
+            child.demand_objects.add(forked)
+
+        for lsp in self.rsvp_lsp_objects:
+            forked = _fork_object(lsp)
+            forked.source_node_object = fork_node(lsp.source_node_object)
+            forked.dest_node_object = fork_node(lsp.dest_node_object)
+            forked.path = 'Unrouted - initial'
+            forked.reserved_bandwidth = 'Unrouted - initial'
+            forked._setup_bandwidth = 'Unrouted - initial'
+            child.rsvp_lsp_objects.add(forked)
+
+        child.node_objects = set(nodes.values())
+        return child
+
+    def save_model(self, data_file):
+        """
+        Saves the model's Interfaces, Nodes, Demands, RSVP LSPs and SRLG
+        memberships to a model data file that load_model_file reads back
+        into the same model.  Each line is written to the file as it is
+        made.  Failure states, SRLGs without members and simulation
+        results are not saved; use save_snapshot for those.
+
+        :param data_file: path of the model data file
+
+        Example::
+
+            model.save_model('model.csv')
+            model = PerformanceModel.load_model_file('model.csv')
+        """
+        srlg_nodes = {}
+        for node in self.node_objects:
+            for srlg in node._srlgs:
+                srlg_nodes.setdefault(srlg.name, []).append([srlg.name, node.name])
+        srlg_interfaces = {}
+        for interface in self.interface_objects:
+            for srlg in interface._srlgs:
+                srlg_interfaces.setdefault(srlg.name, []).append([srlg.name, interface.node_object.name,
+                                                                  interface.name])
+
+        tables = [
+            ('INTERFACES_TABLE', self._interface_table_header,
+             (self._interface_to_data(interface)
+              for interface in sorted(self.interface_objects, key=lambda interface: interface._key))),
+            ('NODES_TABLE', ['name', 'lon', 'lat'],
+             ([node.name, node.lon, node.lat] for node in sorted(self.node_objects, key=lambda node: node.name))),
+            ('DEMANDS_TABLE', ['source', 'dest', 'traffic', 'name'],
+             ([demand.source_node_object.name, demand.dest_node_object.name, demand.traffic, demand.name]
+              for demand in sorted(self.demand_objects, key=lambda demand: demand._key))),
+            ('RSVP_LSP_TABLE', ['source', 'dest', 'name', 'configured_setup_bw'],
+             ([lsp.source_node_object.name, lsp.dest_node_object.name, lsp.lsp_name, lsp.configured_setup_bandwidth]
+              for lsp in sorted(self.rsvp_lsp_objects, key=lambda lsp: lsp._key))),
+        ]
+        if srlg_nodes or srlg_interfaces:
+            tables.append(('SRLG_TABLE', ['srlg_name', 'node_object_name', 'interface_name'],
+                           (row for srlg_name in sorted(set(srlg_nodes) | set(srlg_interfaces))
+                            for row in sorted(srlg_nodes.get(srlg_name, [])) +
+                            sorted(srlg_interfaces.get(srlg_name, [])))))
+
+        with open(data_file, 'w', buffering=1 << 20) as f:
+            for table_index, (title, header, rows) in enumerate(tables):
+                if table_index > 0:
+                    f.write('\n')
+                f.write(title + '\n' + '\t'.join(header) + '\n')
+                for row in rows:
+                    f.write('\t'.join(self._field_to_data(field) for field in row if field is not None) + '\n')
+
+    @staticmethod
+    def _field_to_data(field):
+        """
+        Returns field as text for a line of a model data file; whole
+        number floats are written as ints
+        """
+        if isinstance(field, float) and field.is_integer():
+            return str(int(field))
+        field = str(field)
+        if field == '' or len(field.split()) != 1:
+            raise ModelException("{!r} cannot be saved to a model data file; fields must be non-empty and may "
+                                 "not contain whitespace".format(field))
+        return field
+
+    def save_snapshot(self, snapshot_file, simulation=True):
+        """
+        Saves the model to a compact, versioned binary snapshot file; see
+        load_snapshot
+
+        :param snapshot_file: path of the snapshot file
+        :param simulation: also save the simulation results (Interface
+        traffic and reservations, circuits, LSP paths and reservations and
+        Demand paths)?
+        """
+        save_snapshot(self, snapshot_file, simulation)
+
+    @classmethod
+    def load_snapshot(cls, snapshot_file):
+        """
+        Loads a model saved with save_snapshot.  If the snapshot holds
+        simulation results, the model is ready to query without
+        update_simulation; Demand paths are enumerated the first time they
+        are read.  A snapshot of a FlexModel loads only as a FlexModel, and
+        one of a PerformanceModel only as a PerformanceModel.
+
+        :param snapshot_file: path of the snapshot file
+        :return: model of class cls
+
+        Example::
+
+            model = PerformanceModel.load_model_file('model.csv')
+            model.update_simulation()
+            model.save_snapshot('model.snapshot')
+
+            model = PerformanceModel.load_snapshot('model.snapshot')
+            model.get_interface_object('A-to-B', 'A').utilization
+        """
+        return load_snapshot(cls, snapshot_file)
+
+    def save_columnar_store(self, store_file):
+        """
+        Saves the model and the results of the last update_simulation() to a
+        columnar store file that ColumnarStore opens with mmap; processes
+        reading it share one copy of the data and only build the Node,
+        Interface and Demand objects they ask for.
+
+        :param store_file: path of the store file
+
+        Example::
+
+            model.update_simulation()
+            model.save_columnar_store('model.columns')
+
+            with ColumnarStore('model.columns') as store:
+                utilization = store.column('interface_utilization')
+                busy = [store.interface(interface_id) for interface_id in range(store.interface_count)
+                        if utilization[interface_id] > 80]
+        """
+        save_columnar_store(self, store_file)
+
+    def save_sqlite_store(self, db_file):
+        """
+        Saves the model and the results of the last update_simulation() to
+        a SQLite database with indexed tables of Nodes, Interfaces, Demands,
+        RSVP LSPs, LSP paths and per-Interface Demand traffic; SQLiteStore
+        queries it without loading the model.  Tables from an earlier save
+        to db_file are replaced.
+
+        :param db_file: path of the SQLite database file
+
+        Example::
+
+            model.update_simulation()
+            model.save_sqlite_store('model.db')
+
+            with SQLiteStore('model.db') as store:
+                store.interfaces_over(80)
+                store.demands_on_interface('A-to-B', 'A')
+        """
+        save_sqlite_store(self, db_file)
+
     def change_interface_name(self, node_name, current_interface_name, new_interface_name):
         """
         Changes interface name
@@ -833,7 +1746,12 @@ class _MasterModel(object):
         :return: Interface with new name
         """
         interface_to_edit = self.get_interface_object(current_interface_name, node_name)
+
+        # The Interface's hash and key change with its name
+        self.interface_objects.discard(interface_to_edit)
         interface_to_edit.name = new_interface_name
+        self.interface_objects.add(interface_to_edit)
+        self._reverse_indexes = None
 
         return interface_to_edit
 
@@ -896,7 +1814,7 @@ class _MasterModel(object):
             remote_interface.reserved_bandwidth = 0
             interface_object.failed = False
             interface_object.reserved_bandwidth = 0
-            self.validate_model()
+            self._validate_or_defer()
         else:
             if raise_exception:
                 message = ("Local and/or remote node are failed; cannot have "
@@ -912,12 +1830,11 @@ class _MasterModel(object):
         :return: Specified Interface object from self
         """
 
-        self._does_interface_exist(interface_name, node_name)
-
-        node_object = self.get_node_object(node_name)
+        interface = self._lookup('interface', (interface_name, node_name))
+        if interface is None:
+            raise ModelException('specified interface does not exist')
 
-        int_object = [interface for interface in node_object.interfaces(self) if interface.name == interface_name]
-        return int_object[0]
+        return interface
 
     # NODE CALLS ######
     def get_node_interfaces(self, node_name):
@@ -1158,6 +2075,51 @@ class _MasterModel(object):
             except ModelException:
                 pass
 
+    def failure_sweep(self, scenarios=None, element_types=('circuit', 'node', 'srlg'), max_failures=1):
+        """
+        Fails each scenario's circuits, Nodes and SRLGs in turn and reports
+        the worst case Interface utilization.  The baseline is simulated
+        once; each scenario only places again the RSVP LSPs and routes again
+        the Demands its failures affect.  The model is left as the baseline
+        simulation left it.
+
+        :param scenarios: list of scenarios; each is a tuple of failed
+        elements ('circuit', interface_name, node_name), ('node', node_name)
+        or ('srlg', srlg_name).  Default is every combination of up to
+        max_failures elements of element_types.
+        :param element_types: element types to combine when scenarios is None
+        :param max_failures: most elements failed at once when scenarios is None
+        :return: dict with keys 'scenarios' (dict of scenario: {'max_utilization',
+        'interface', 'unrouted_demands'}) and 'interfaces' (dict of Interface:
+        {'max_utilization', 'scenario'}); see FailureSweep.run
+
+        Example::
+
+            sweep = model.failure_sweep(element_types=('circuit',), max_failures=2)
+            worst = max(sweep['interfaces'].items(), key=lambda item: item[1]['max_utilization'])
+        """
+        sweep = FailureSweep(self)
+        if scenarios is None:
+            scenarios = sweep.scenarios(element_types, max_failures)
+        return sweep.run(scenarios)
+
+    def monte_carlo_failures(self, samples, seed=None, threshold=100, percentiles=(95, 99)):
+        """
+        Draws samples random failure states from the failure_probability of
+        the model's circuits, Nodes and SRLGs and reports the distribution
+        of each Interface's utilization.  Identical states are simulated
+        once.  The model is left as the baseline simulation left it.
+
+        :param samples: number of failure states to draw
+        :param seed: seed for the random failure states
+        :param threshold: utilization (percent) for exceed_probability
+        :param percentiles: utilization percentiles to report
+        :return: dict with keys 'samples', 'states' (dict of scenario: number
+        of draws) and 'interfaces' (dict of Interface: {'mean', 'p95', 'p99',
+        'exceed_probability', 'down_probability'}); see MonteCarloFailures.run
+        """
+        return MonteCarloFailures(self, seed).run(samples, threshold, percentiles)
+
     def add_srlg(self, srlg_name):
         """
         Adds SRLG object to Model
@@ -1200,13 +2162,13 @@ class _MasterModel(object):
         :param node_object: Node object to add to self
         """
 
-        if node_object.name in (node.name for node in self.node_objects):
+        if self._lookup('node', node_object.name) is not None:
             message = "A node with name {} already exists in the model".format(node_object.name)
             raise ModelException(message)
         else:
-            self.node_objects.add(node_object)
+            self._add_objects('node_objects', [node_object])
 
-        self.validate_model()
+        self._validate_or_defer()
 
     def get_node_object(self, node_name):
         """
@@ -1216,10 +2178,10 @@ class _MasterModel(object):
         :return: Node object with node_name
         """
 
-        matching_node = [node for node in self.node_objects if node.name == node_name]
+        matching_node = self._lookup('node', node_name)
 
-        if len(matching_node) > 0:
-            return matching_node[0]
+        if matching_node is not None:
+            return matching_node
         else:
             message = "No node with name %s exists in the model" % node_name
             raise ModelException(message)
@@ -1238,12 +2200,54 @@ class _MasterModel(object):
         dest_node_object = self.get_node_object(dest_node_name)
         added_lsp = RSVP_LSP(source_node_object, dest_node_object, name)
 
-        if added_lsp._key in set([lsp._key for lsp in self.rsvp_lsp_objects]):
+        if self._lookup('lsp', added_lsp._key) is not None:
             message = '{} already exists in rsvp_lsp_objects'.format(added_lsp)
             raise ModelException(message)
-        self.rsvp_lsp_objects.add(added_lsp)
+        self._add_objects('rsvp_lsp_objects', [added_lsp])
 
-        self.validate_model()
+        self._validate_or_defer()
+
+    def add_rsvp_lsps(self, lsps):
+        """
+        Adds many RSVP LSPs at once; see add_rsvp_lsp and add_demands.
+
+        :param lsps: iterable of (source node name, dest node name, name)
+        :return: list of the new RSVP_LSP objects
+        """
+        def add_row(source_node_name, dest_node_name, name):
+            lsp = RSVP_LSP(self.get_node_object(source_node_name), self.get_node_object(dest_node_name), name)
+            if self._lookup('lsp', lsp._key) is not None:
+                raise ModelException('{} already exists in rsvp_lsp_objects'.format(lsp))
+            self._add_objects('rsvp_lsp_objects', [lsp])
+            return lsp
+
+        return self._add_in_bulk('RSVP LSPs', lsps, add_row)
+
+    def add_circuits(self, circuits):
+        """
+        Adds many Circuits at once; see add_circuit and add_demands.
+
+        :param circuits: iterable of dicts with keys node_a, node_b (Node
+        names), interface_a, interface_b, and optionally cost_a, cost_b
+        (default 1), capacity (default 1000) and circuit_id
+        :return: list of (Interface a, Interface b) of the new Circuits
+        """
+        existing_int_keys = set(interface._key for interface in self.interface_objects)
+        circuit_ids = self.all_interface_circuit_ids
+
+        def add_row(circuit):
+            int_a, int_b = self._make_circuit_interfaces(
+                self.get_node_object(circuit['node_a']), self.get_node_object(circuit['node_b']),
+                circuit['interface_a'], circuit['interface_b'], circuit.get('cost_a', 1), circuit.get('cost_b', 1),
+                circuit.get('capacity', 1000), circuit.get('circuit_id'), existing_int_keys, circuit_ids)
+            if int_a._key == int_b._key:
+                raise ModelException("interface {} on node {} is given twice".format(int_a, int_a.node_object))
+            existing_int_keys.update((int_a._key, int_b._key))
+            circuit_ids.add(int_a.circuit_id)
+            self._add_objects('interface_objects', [int_a, int_b])
+            return int_a, int_b
+
+        return self._add_in_bulk('Circuits', circuits, add_row)
 
     def get_demand_object(self, source_node_name, dest_node_name, demand_name='none'):
         """
@@ -1255,20 +2259,13 @@ class _MasterModel(object):
         :param demand_name: name of Demand object
         :return: desired Demand object that matches parameters above
         """
-        model_demand_iterator = (demand for demand in self.demand_objects)
-
-        demand_to_return = None
-
-        for demand in model_demand_iterator:
-            if demand.source_node_object.name == source_node_name and \
-                    demand.dest_node_object.name == dest_node_name and \
-                    demand.name == demand_name:
-                demand_to_return = demand
-                return demand_to_return
+        demand_to_return = self._lookup('demand', (source_node_name, dest_node_name, demand_name))
 
         if demand_to_return is None:
             raise ModelException('no matching demand')
 
+        return demand_to_return
+
     def get_rsvp_lsp(self, source_node_name, dest_node_name, lsp_name='none'):
         """
         Returns the RSVP LSP from the model with the specified source node
@@ -1280,13 +2277,22 @@ class _MasterModel(object):
         :return: RSVP_LSP object
         """
 
-        needed_key = (source_node_name, dest_node_name, lsp_name)
+        lsp = self._lookup('lsp', (source_node_name, dest_node_name, lsp_name))
 
-        if needed_key not in (lsp._key for lsp in self.rsvp_lsp_objects):
+        if lsp is None:
             msg = ("LSP with source node %s, dest node %s, and name %s "
                    "does not exist in model" % (source_node_name, dest_node_name, lsp_name))
             raise ModelException(msg)
-        else:
-            for lsp in (lsp for lsp in self.rsvp_lsp_objects):
-                if lsp._key == needed_key:
-                    return lsp
+
+        return lsp
+
+
+def _fork_object(model_object):
+    """
+    Returns a new object of model_object's class with a shallow copy of
+    its attributes; the copy is not in a model yet
+    """
+    forked = model_object.__class__.__new__(model_object.__class__)
+    forked.__dict__.update(model_object.__dict__)
+    forked.__dict__.pop('_tracker', None)
+    return forked
@@ -0,0 +1,146 @@
+"""
+Monte Carlo failure simulation.
+
+Circuits, Nodes and SRLGs carry a failure_probability.  A
+MonteCarloFailures draws random failure states, each element failing
+independently with its probability, folds identical states together and
+evaluates each unique state once with a FailureSweep (or a
+ScenarioExecutor).  The per-Interface utilization across the samples is
+summarized as a distribution: mean, percentiles and the probability of
+exceeding a utilization threshold.
+"""
+
+import random
+
+from .failure_sweep import FailureSweep
+
+
+def _percentile(values_and_counts, total, percentile):
+    """
+    Nearest-rank percentile of values weighted by their counts
+
+    :param values_and_counts: list of (value, count) sorted by value
+    :param total: sum of the counts
+    :param percentile: percentile in the range 0 to 100
+    """
+    rank = max(1, -(-percentile * total // 100))
+    seen = 0
+    for value, count in values_and_counts:
+        seen += count
+        if seen >= rank:
+            return value
+    return values_and_counts[-1][0]
+
+
+class MonteCarloFailures(object):
+    """
+    Samples failure states of model from the failure_probability of its
+    circuits, Nodes and SRLGs.  Building a MonteCarloFailures runs
+    update_simulation on model (see FailureSweep); the model is left as the
+    baseline simulation left it.
+
+    :param model: PerformanceModel or FlexModel object
+    :param seed: seed for the random failure states, for repeatable runs
+    """
+
+    def __init__(self, model, seed=None):
+        self.model = model
+        self.random = random.Random(seed)
+        self.sweep = FailureSweep(model)
+
+        # (scenario element, probability) for every element that can fail
+        self.elements = []
+        for circuit in sorted(model.circuit_objects, key=lambda circuit: circuit._key()):
+            self.elements.append((('circuit', circuit.interface_a.name, circuit.interface_a.node_object.name),
+                                  circuit.failure_probability))
+        for node in sorted(model.node_objects, key=lambda node: node.name):
+            self.elements.append((('node', node.name), node.failure_probability))
+        for srlg in sorted(model.srlg_objects, key=lambda srlg: srlg.name):
+            self.elements.append((('srlg', srlg.name), srlg.failure_probability))
+        self.elements = [(element, probability) for element, probability in self.elements if probability > 0]
+
+    def sample(self, samples):
+        """
+        Draws samples random failure states
+
+        :param samples: number of failure states to draw
+        :return: dict of scenario: number of times it was drawn; the
+        scenario with no failures is ()
+        """
+        states = {}
+        rand = self.random.random
+        for _ in range(samples):
+            scenario = tuple(element for element, probability in self.elements if rand() < probability)
+            states[scenario] = states.get(scenario, 0) + 1
+        return states
+
+    def _utilization(self, scenarios, executor):
+        """
+        Generator of (scenario, dict of Interface: utilization) for each scenario
+        """
+        if executor is None:
+            for scenario in scenarios:
+                yield scenario, self.sweep.run_scenario(scenario)['utilization']
+        else:
+            for scenario, utilization, unrouted_demands in executor.map(scenarios):
+                yield scenario, {interface: 'Int is down' if util != util else util
+                                 for interface, util in zip(executor.interfaces, utilization)}
+
+    def run(self, samples, threshold=100, percentiles=(95, 99), executor=None):
+        """
+        Draws samples random failure states, evaluates each unique state
+        once and summarizes the utilization of each Interface
+
+        :param samples: number of failure states to draw
+        :param threshold: utilization (percent) for exceed_probability
+        :param percentiles: utilization percentiles to report
+        :param executor: optional ScenarioExecutor built from the same model
+        to evaluate the unique states in parallel
+        :return: dict with keys
+
+            - 'samples': number of failure states drawn
+            - 'states': dict of scenario: number of times it was drawn
+            - 'interfaces': dict of Interface: {'mean': <mean utilization>,
+              'p95': <95th percentile utilization>, ... one key per
+              percentile, 'exceed_probability': <probability that the
+              utilization is over threshold>, 'down_probability':
+              <probability that the Interface is down>}.  mean and the
+              percentiles are over the samples in which the Interface is
+              up, and are None if it is never up.
+
+        Example::
+
+            model.get_node_object('A').failure_probability = 0.001
+            results = MonteCarloFailures(model, seed=7).run(10000, threshold=90)
+        """
+        states = self.sample(samples)
+
+        # dict of Interface: {utilization: number of samples}
+        distributions = {}
+        down_samples = {}
+        for scenario, utilization in self._utilization(list(states), executor):
+            count = states[scenario]
+            for interface, util in utilization.items():
+                if util == 'Int is down':
+                    down_samples[interface] = down_samples.get(interface, 0) + count
+                else:
+                    distribution = distributions.setdefault(interface, {})
+                    distribution[util] = distribution.get(util, 0) + count
+
+        interface_results = {}
+        for interface in self.sweep.interfaces:
+            distribution = sorted(distributions.get(interface, {}).items())
+            up_samples = sum(count for util, count in distribution)
+            results = {'exceed_probability': sum(count for util, count in distribution
+                                                 if util > threshold) / samples,
+                       'down_probability': down_samples.get(interface, 0) / samples}
+            if up_samples:
+                results['mean'] = sum(util * count for util, count in distribution) / up_samples
+            else:
+                results['mean'] = None
+            for percentile in percentiles:
+                results['p%s' % percentile] = _percentile(distribution, up_samples, percentile) \
+                    if up_samples else None
+            interface_results[interface] = results
+
+        return {'samples': samples, 'states': states, 'interfaces': interface_results}
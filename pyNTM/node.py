@@ -1,5 +1,6 @@
 """A class to represent a layer 3 device in the Model"""
 
+from .change_tracking import record_change, topology_changed
 from .exceptions import ModelException
 from .srlg import SRLG
 
@@ -13,12 +14,15 @@ class Node(object):
 
     """
 
+    _tracker = None  # ChangeTracker of the model holding the node
+
     def __init__(self, name, lat=0, lon=0):
         self.name = name
         self._failed = False
         self._lat = lat
         self._lon = lon
         self._srlgs = set()
+        self._failure_probability = 0
 
         # Validate lat, lon values
         if not(isinstance(lat, float)) and not(isinstance(lat, int)):
@@ -36,7 +40,9 @@ class Node(object):
     # focus on the Node.name equivalency and and __hash__ to focus on the
     # hash of the Node.name will make equivalency testing possible
     def __eq__(self, other_node):
-        return self.__dict__ == other_node.__dict__
+        # The model a Node is in does not take part in the comparison
+        return ({attribute: value for attribute, value in self.__dict__.items() if attribute != '_tracker'} ==
+                {attribute: value for attribute, value in other_node.__dict__.items() if attribute != '_tracker'})
 
     def __hash__(self):
         # return hash(tuple(sorted(self.__dict__.items())))
@@ -60,6 +66,9 @@ class Node(object):
         if not isinstance(status, bool):
             raise ModelException('must be boolean')
 
+        record_change(self, '_failed', self._failed)
+        topology_changed(self)
+
         if status is False:  # False means Node would not be failed
             # Check for any SRLGs with self as a member and get status
             # of each SRLG
@@ -97,6 +106,17 @@ class Node(object):
         else:
             raise ValueError("lon attribute must be integer or float.")
 
+    @property
+    def failure_probability(self):
+        """Probability that the Node is failed, for Monte Carlo failure simulation"""
+        return self._failure_probability
+
+    @failure_probability.setter
+    def failure_probability(self, probability):
+        if not 0 <= probability <= 1:
+            raise ModelException("failure_probability must be between 0 and 1")
+        self._failure_probability = probability
+
     def interfaces(self, model):
         """
         Returns interfaces for a given node
@@ -104,15 +124,7 @@ class Node(object):
         :param model: model structure
         :return adjacency_list: (list) list of interfaces on the given node
         """
-        adjacency_list = []
-
-        interface_iterator = (interface for interface in model.interface_objects)
-
-        for interface in interface_iterator:
-            if interface.node_object.name == self.name:
-                adjacency_list.append(interface)
-
-        return adjacency_list
+        return model._lookup_all('node_interfaces', self.name)
 
     def adjacent_nodes(self, model):
         """
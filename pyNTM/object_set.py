@@ -0,0 +1,166 @@
+"""
+A set of model objects with lookup indexes that are kept up to date as
+objects are added and removed.
+
+The model's Node, Interface, Demand and RSVP LSP sets are ObjectSets.  An
+index is built from the set the first time it is asked for; after that,
+each add or remove updates every built index in place, so lookups never
+rescan the set.  Indexes are only rebuilt after an object's key was
+changed in place (the tracker's key_version was bumped).
+
+An object added to an ObjectSet gets the set's ChangeTracker as its
+_tracker, unless it is already in another model (the temporary models
+built by update_simulation share the objects of the real one).  Removing
+the object releases it again.
+"""
+
+
+class ObjectSet(set):
+    """
+    set of model objects with incrementally maintained dict indexes
+
+    - tracker: ChangeTracker of the model holding the set
+    - version: bumped by every add or remove
+    """
+
+    def __init__(self, objects=(), tracker=None):
+        super().__init__()
+        self.tracker = tracker
+        self.version = 0
+        self._indexes = {}  # index name: [key function, unique keys?, key version, dict]
+        self.update(objects)
+
+    def _key_version(self):
+        return self.tracker.key_version if self.tracker is not None else 0
+
+    def _current_indexes(self):
+        """
+        Drops the indexes that are stale since a key changed; returns the others
+        """
+        key_version = self._key_version()
+        for index_name in [index_name for index_name, index in self._indexes.items() if index[2] != key_version]:
+            del self._indexes[index_name]
+        return self._indexes.values()
+
+    def index(self, index_name, key_function, unique):
+        """
+        Returns the index_name dict over the set, building it if needed
+
+        :param index_name: name of the index
+        :param key_function: function of an object that returns its key
+        :param unique: True for a dict of key: object, False for a dict of
+        key: list of objects
+        :return: dict index
+        """
+        key_version = self._key_version()
+        index = self._indexes.get(index_name)
+        if index is None or index[2] != key_version:
+            entries = {}
+            if unique:
+                for item in self:
+                    entries[key_function(item)] = item
+            else:
+                for item in self:
+                    entries.setdefault(key_function(item), []).append(item)
+            index = [key_function, unique, key_version, entries]
+            self._indexes[index_name] = index
+        return index[3]
+
+    def _added(self, item):
+        if item._tracker is None:
+            item._tracker = self.tracker
+        self.version += 1
+        for key_function, unique, key_version, entries in self._current_indexes():
+            if unique:
+                entries[key_function(item)] = item
+            else:
+                entries.setdefault(key_function(item), []).append(item)
+
+    def _release(self, item):
+        if self.tracker is not None and item._tracker is self.tracker:
+            del item._tracker
+
+    def _removed(self, item):
+        self._release(item)
+        self.version += 1
+        for key_function, unique, key_version, entries in self._current_indexes():
+            key = key_function(item)
+            if unique:
+                if entries.get(key) == item:
+                    del entries[key]
+                continue
+            items = entries.get(key, [])
+            # Identity first: distinct objects can compare equal
+            position = next((position for position, other in enumerate(items) if other is item),
+                            None)
+            if position is None:
+                position = next((position for position, other in enumerate(items) if other == item),
+                                None)
+            if position is not None:
+                del items[position]
+                if not items:
+                    del entries[key]
+
+    def add(self, item):
+        if item not in self:
+            super().add(item)
+            self._added(item)
+
+    def discard(self, item):
+        if item in self:
+            super().discard(item)
+            self._removed(item)
+
+    def remove(self, item):
+        super().remove(item)
+        self._removed(item)
+
+    def pop(self):
+        item = super().pop()
+        self._removed(item)
+        return item
+
+    def clear(self):
+        for item in self:
+            self._release(item)
+        super().clear()
+        self.version += 1
+        self._indexes = {}
+
+    def update(self, *others):
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def difference_update(self, *others):
+        for other in others:
+            for item in list(other):
+                self.discard(item)
+
+    def intersection_update(self, *others):
+        keep = set.intersection(self, *others)
+        for item in [item for item in self if item not in keep]:
+            self.discard(item)
+
+    def symmetric_difference_update(self, other):
+        for item in set(other):
+            if item in self:
+                self.discard(item)
+            else:
+                self.add(item)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
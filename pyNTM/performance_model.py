@@ -26,6 +26,7 @@ This PerformanceModel class is the same as the legacy (version 1.6 and earlier)
 
 """
 
+from collections import Counter
 from pprint import pprint
 
 import itertools
@@ -36,13 +37,11 @@ from .circuit import Circuit
 from .interface import Interface
 from .exceptions import ModelException
 from .master_model import _MasterModel
-from .utilities import find_end_index
 from .node import Node
 
 # TODO - call to analyze model for Unrouted LSPs and LSPs not on shortest path
 # TODO - add simulation summary output with # failed nodes, interfaces, srlgs, unrouted lsp/demands,
 #  routed lsp/demands in dict form
-# TODO - add support for SRLGs in load_model_file
 # TODO - add attribute for Node/Interface whereby an object can be failed by itself
 #  and not unfail when a parent SRLG unfails
 
@@ -77,7 +76,6 @@ class PerformanceModel(_MasterModel):
         self.circuit_objects = set()
         self.rsvp_lsp_objects = rsvp_lsp_objects
         self.srlg_objects = set()
-        self._parallel_lsp_groups = {}
 
         super().__init__(interface_objects, node_objects, demand_objects, rsvp_lsp_objects)
 
@@ -108,10 +106,11 @@ class PerformanceModel(_MasterModel):
 
         new_interface_objects, new_node_objects = \
             self._make_network_interfaces(network_interfaces)
-        self.node_objects = self.node_objects.union(new_node_objects)
-        self.interface_objects = \
-            self.interface_objects.union(new_interface_objects)
-        self.validate_model()
+        self.node_objects.update(new_node_objects)
+        self.interface_objects.update(new_interface_objects)
+        self._record_added('node_objects', new_node_objects)
+        self._record_added('interface_objects', new_interface_objects)
+        self._validate_or_defer()
 
     def validate_model(self):
         """
@@ -167,10 +166,11 @@ class PerformanceModel(_MasterModel):
             error_data.append(int_status_error_dict)
 
         # Look for multiple links between nodes (not allowed in Model)
-        if len(self.multiple_links_between_nodes()) > 0:
+        parallel_links = self.multiple_links_between_nodes()
+        if len(parallel_links) > 0:
             multiple_links_between_nodes = {}
             multiple_links_between_nodes['multiple links between nodes detected; not allowed in Model object'
-                                         '(use Parallel_Link_Model)'] = self.multiple_links_between_nodes()
+                                         '(use Parallel_Link_Model)'] = parallel_links
             error_data.append(multiple_links_between_nodes)
 
         srlg_errors = self.validate_srlg_nodes()
@@ -223,7 +223,8 @@ class PerformanceModel(_MasterModel):
         results.
         """
 
-        self._parallel_lsp_groups = {}  # Reset the attribute
+        self._journal_simulation()
+        self._reverse_indexes = None
 
         # This set of interfaces can be used to route traffic
         non_failed_interfaces = set()
@@ -267,46 +268,28 @@ class PerformanceModel(_MasterModel):
 
         self.validate_model()
 
-    def _route_demands(self, model):
+    def _make_networkx_igp_spf(self, reverse=False):
         """
-        Routes demands in input 'model'
-
-        :param model: input 'model' parameter object (may be different from self)
-        :return: model with routed demands
+        Returns a function that runs SPF from a source Node name over the
+        networkx DiGraph of non-failed Interfaces.  The function returns
+        (pred, dist): pred is a dict of Node name: list of ECMP predecessor
+        (Interface, tail Node name) pairs, dist a dict of Node name: cost.
+        If reverse is True, the SPF is rooted at a destination Node and the
+        pairs are the next hop (Interface, head Node name) pairs toward it.
         """
 
         G = self._make_weighted_network_graph(include_failed_circuits=False)
+        if reverse:
+            # Edge data in the reversed view still holds the original Interface
+            G = G.reverse(copy=False)
 
-        for demand in model.demand_objects:
-            demand.path = []
-
-            # Find all LSPs that can carry the demand:
-            for lsp in (lsp for lsp in model.rsvp_lsp_objects):
-                if (lsp.source_node_object == demand.source_node_object and
-                        lsp.dest_node_object == demand.dest_node_object and
-                        'Unrouted' not in lsp.path):
-                    demand.path.append(lsp)
-
-            if demand.path == []:
-                src = demand.source_node_object.name
-                dest = demand.dest_node_object.name
-
-                # Shortest path in networkx multidigraph
-                try:
-                    nx_sp = list(nx.all_shortest_paths(G, src, dest, weight='cost'))
-                except nx.exception.NetworkXNoPath:
-                    # There is no path, demand.path = 'Unrouted'
-                    demand.path = 'Unrouted'
-                    continue
-
-                # all_paths is list of paths from source to destination
-                all_paths = self.convert_graph_path_to_model_path(nx_sp)
-
-                demand.path = all_paths
+        def igp_spf(source_node_name):
+            nx_pred, dist = nx.dijkstra_predecessor_and_distance(G, source_node_name, weight='cost')
+            pred = {node: [(G[tail][node]['interface'], tail) for tail in tails]
+                    for node, tails in nx_pred.items()}
+            return pred, dist
 
-        self._update_interface_utilization()
-
-        return self
+        return igp_spf
 
     def _determine_lsp_state_info(self, lsps, traff_on_each_group_lsp):
         """
@@ -424,17 +407,26 @@ class PerformanceModel(_MasterModel):
 
     def _make_weighted_network_graph(self, include_failed_circuits=True, needed_bw=0, rsvp_required=False):
         """
-        Returns a networkx weighted networkx multidigraph object from
-        the input Model object
+        Returns a networkx weighted DiGraph from the input Model object.
+        The graph is built once per topology version and filter parameters and
+        shared between callers, so it must not be modified.
 
         :param include_failed_circuits: include interfaces from currently failed
         circuits in the graph?
         :param needed_bw: how much reservable_bandwidth is required?
         :param rsvp_required: True|False; only consider rsvp_enabled interfaces?
 
-        :return: networkx multidigraph with edges that conform to the needed_bw and
+        :return: networkx DiGraph with edges that conform to the needed_bw and
         rsvp_required parameters
         """
+        return self._cached_graph(self._build_weighted_network_graph, include_failed_circuits,
+                                  needed_bw, rsvp_required)
+
+    def _build_weighted_network_graph(self, include_failed_circuits=True, needed_bw=0,
+                                      rsvp_required=False):
+        """
+        Builds the graph returned by _make_weighted_network_graph
+        """
 
         G = nx.DiGraph()
 
@@ -532,13 +524,15 @@ class PerformanceModel(_MasterModel):
                  comprised of two Interface objects
         """
 
-        G = self._make_weighted_network_graph(include_failed_circuits=include_failed_circuits)
+        # The edges of the weighted network graph, grouped without building it
+        edges, interfaces_between = self._circuit_edges(include_failed_circuits=include_failed_circuits)
+        edge_node_pairs = set((local_node_name, remote_node_name) for (local_node_name, remote_node_name, data)
+                              in edges)
 
-        # Determine which interfaces pair up into good circuits in G
+        # Determine which interfaces pair up into good circuits
         paired_interfaces = ((local_node_name, remote_node_name, data) for
                              (local_node_name, remote_node_name, data) in
-                             G.edges(data=True) if G.has_edge(remote_node_name,
-                                                              local_node_name))
+                             edges if (remote_node_name, local_node_name) in edge_node_pairs)
 
         # Set interface object in_ckt = False and baseline the circuit_id
         for interface in (interface for interface in self.interface_objects):
@@ -551,10 +545,8 @@ class PerformanceModel(_MasterModel):
         # the circuit object
         for interface in (interface for interface in paired_interfaces):
             # Get each interface from model for each
-            int1 = self.get_interface_object_from_nodes(interface[0],
-                                                        interface[1])
-            int2 = self.get_interface_object_from_nodes(interface[1],
-                                                        interface[0])
+            int1 = interfaces_between[(interface[0], interface[1])][0]
+            int2 = interfaces_between[(interface[1], interface[0])][0]
 
             if int1.in_ckt is False and int2.in_ckt is False:
                 # Mark interface objects as in_ckt = True
@@ -572,7 +564,7 @@ class PerformanceModel(_MasterModel):
         # Find any interfaces that don't have counterpart
         exception_ints_not_in_ckt = [(local_node_name, remote_node_name, data)
                                      for (local_node_name, remote_node_name, data) in
-                                     G.edges(data=True) if not (G.has_edge(remote_node_name, local_node_name))]
+                                     edges if (remote_node_name, local_node_name) not in edge_node_pairs]
 
         if len(exception_ints_not_in_ckt) > 0:
             exception_msg = ('WARNING: These interfaces were not matched '
@@ -593,10 +585,8 @@ class PerformanceModel(_MasterModel):
         :param remote_node_name:
         :return: Interface object with specified local node and remote node names
         """
-        for interface in (interface for interface in self.interface_objects):
-            if interface.node_object.name == local_node_name and \
-                    interface.remote_node_object.name == remote_node_name:
-                return interface
+        for interface in self._lookup_all('interfaces_between', (local_node_name, remote_node_name)):
+            return interface
 
     def add_circuit(self, node_a_object, node_b_object, node_a_interface_name,
                     node_b_interface_name, cost_intf_a=1, cost_intf_b=1,
@@ -617,8 +607,27 @@ class PerformanceModel(_MasterModel):
         :return: Model with new Circuit comprised of 2 new Interfaces
         """
 
+        existing_int_keys = self._index('interface')
+        circuit_ids = self.all_interface_circuit_ids
+
+        int_a, int_b = self._make_circuit_interfaces(node_a_object, node_b_object, node_a_interface_name,
+                                                     node_b_interface_name, cost_intf_a, cost_intf_b,
+                                                     capacity, circuit_id, existing_int_keys, circuit_ids)
+
+        self._add_objects('interface_objects', [int_a, int_b])
+
+        self._validate_or_defer()
+
+    def _make_circuit_interfaces(self, node_a_object, node_b_object, node_a_interface_name,
+                                 node_b_interface_name, cost_intf_a, cost_intf_b, capacity,
+                                 circuit_id, existing_int_keys, circuit_ids):
+        """
+        Returns the two component Interface objects of a new Circuit; see add_circuit
+
+        :param existing_int_keys: set (or dict) of the _key of each Interface in the model
+        :param circuit_ids: set of the circuit_ids in the model
+        """
         if circuit_id is None:
-            circuit_ids = self.all_interface_circuit_ids
             if len(circuit_ids) == 0:
                 circuit_id = 1
             else:
@@ -629,17 +638,12 @@ class PerformanceModel(_MasterModel):
         int_b = Interface(node_b_interface_name, cost_intf_b, capacity,
                           node_b_object, node_a_object, circuit_id)
 
-        existing_int_keys = set([interface._key for interface in self.interface_objects])
-
         if int_a._key in existing_int_keys:
             raise ModelException("interface {} on node {} already exists in model".format(int_a, node_a_object))
         elif int_b._key in existing_int_keys:
             raise ModelException("interface {} on node {} already exists in model".format(int_b, node_b_object))
 
-        self.interface_objects.add(int_a)
-        self.interface_objects.add(int_b)
-
-        self.validate_model()
+        return int_a, int_b
 
     def _make_network_interfaces(self, interface_info_list):
         """
@@ -944,6 +948,11 @@ class PerformanceModel(_MasterModel):
         configured_setup_bw - if LSP has a fixed, static configured setup bandwidth, place that static value here,
         if LSP is auto-bandwidth, then leave this blank for the LSP
 
+        SRLG_TABLE (this table is optional; it follows the RSVP_LSP_TABLE)
+        srlg_name - name of SRLG
+        node_object_name - name of a Node in the SRLG, or of the node where an Interface in the SRLG resides
+        interface_name - name of the Interface in the SRLG; leave this blank if the Node is in the SRLG
+
         Functional model files can be found in this directory in
         https://github.com/tim-fiola/network_traffic_modeler_py3/tree/master/examples
         Here is an example of a data file:
@@ -969,124 +978,73 @@ class PerformanceModel(_MasterModel):
             A	B	lsp_a_b_1   10
             A	B	lsp_a_b_2
 
+            SRLG_TABLE
+            srlg_name	node_object_name	interface_name
+            srlg_1	A	A-to-B
+            srlg_1	B	B-to-A
+            srlg_2	B
+
         :param data_file: file with model info
         :return: Model object
         """
         # TODO - allow user to add user-defined columns in NODES_TABLE and add that as an attribute to the Node
-        # TODO - add support for SRLGs
-
-        interface_set = set()
-        node_set = set()
-        demand_set = set()
-        lsp_set = set()
-
-        # Open the file with the data, read it, and split it into lines
-        with open(data_file, 'r') as f:
-            data = f.read()
-
-        lines = data.splitlines()
-
-        # Define the Interfaces from the data and extract the presence of
-        # Nodes from the Interface data
-        int_info_begin_index = 2
-        int_info_end_index = find_end_index(int_info_begin_index, lines)
-        interface_set, node_set = cls._extract_interface_data_and_implied_nodes(int_info_begin_index,
-                                                                                int_info_end_index, lines)
-
-        # Define the explicit nodes info from the file
-        nodes_info_begin_index = int_info_end_index + 3
-        nodes_info_end_index = find_end_index(nodes_info_begin_index, lines)
-        node_lines = lines[nodes_info_begin_index:nodes_info_end_index]
-        for node_line in node_lines:
-            cls._add_node_from_data(demand_set, interface_set, lines, lsp_set, node_line, node_set)
-
-        # Define the demands info
-        demands_info_begin_index = nodes_info_end_index + 3
-        demands_info_end_index = find_end_index(demands_info_begin_index, lines)
-        # There may or may not be LSPs in the model, so if there are not,
-        # set the demands_info_end_index as the last line in the file
-        if not demands_info_end_index:
-            demands_info_end_index = len(lines)
-
-        demands_lines = lines[demands_info_begin_index:demands_info_end_index]
-
-        for demand_line in demands_lines:
-            try:
-                cls._add_demand_from_data(demand_line, demand_set, lines, node_set)
-            except ModelException as e:
-                err_msg = e.args[0]
-                raise ModelException(err_msg)
-
-        # Define the LSP info (if present)
-        # If the demands_info_end_index is the same as the length of the
-        # lines list, then there is no LSP section
-        if demands_info_end_index != len(lines):
-            try:
-                cls._add_lsp_from_data(demands_info_end_index, lines, lsp_set, node_set)
-            except ModelException as e:
-                err_msg = e.args[0]
-                raise ModelException(err_msg)
 
-        return cls(interface_set, node_set, demand_set, lsp_set)
+        interface_set, node_set, demand_set, lsp_set, srlg_members = cls._read_model_file(data_file)
 
-    @classmethod
-    def _extract_interface_data_and_implied_nodes(cls, int_info_begin_index, int_info_end_index, lines):
+        model = cls(interface_set, node_set, demand_set, lsp_set)
+        model._add_srlg_members(srlg_members)
+        return model
+
+    _interface_table_header = ['node_object_name', 'remote_node_object_name', 'name', 'cost', 'capacity',
+                               'rsvp_enabled', 'percent_reservable_bandwidth']
+
+    @staticmethod
+    def _interface_to_data(interface):
         """
-        Extracts interface data from lines and adds Interface objects to a set.
-        Also extracts the implied Nodes from the Interfaces and adds those Nodes to a set.
+        Returns the fields of the INTERFACES_TABLE line for interface;
+        the reverse of _interface_from_data
+        """
+        return [interface.node_object.name, interface.remote_node_object.name, interface.name, interface.cost,
+                interface.capacity, interface.rsvp_enabled, interface.percent_reservable_bandwidth]
 
-        :param int_info_begin_index: Index position in lines where interface info begins
-        :param int_info_end_index:  Index position in lines where interface info ends
-        :param lines: lines of data describing a Model objects
-        :return: set of Interface objects, set of Node objects created from lines
+    @classmethod
+    def _interface_from_data(cls, line_index, interface_line):
         """
+        Returns the Interface object described by a line of the
+        INTERFACES_TABLE; its Node objects are new Nodes named after the
+        local and remote nodes in the line
 
-        interface_set = set()
-        node_set = set()
-        interface_lines = lines[int_info_begin_index:int_info_end_index]
-        # Add the Interfaces to a set
-        for interface_line in interface_lines:
-            # Read interface characteristics
-            if len(interface_line.split()) == 5:
-                node_name, remote_node_name, name, cost, capacity = interface_line.split()
+        :param line_index: index of interface_line in the data file
+        :param interface_line: line of interface data
+        :return: Interface object
+        """
+        interface_info = interface_line.split()
+        # Read interface characteristics
+        if len(interface_info) == 5:
+            node_name, remote_node_name, name, cost, capacity = interface_info
+            rsvp_enabled_bool = True
+            percent_reservable_bandwidth = 100
+        elif len(interface_info) == 6:
+            node_name, remote_node_name, name, cost, capacity, rsvp_enabled = interface_info
+            if rsvp_enabled in [True, 'T', 'True', 'true']:
                 rsvp_enabled_bool = True
-                percent_reservable_bandwidth = 100
-            elif len(interface_line.split()) == 6:
-                node_name, remote_node_name, name, cost, capacity, rsvp_enabled = interface_line.split()
-                if rsvp_enabled in [True, 'T', 'True', 'true']:
-                    rsvp_enabled_bool = True
-                else:
-                    rsvp_enabled_bool = False
-                percent_reservable_bandwidth = 100
-            elif len(interface_line.split()) >= 7:
-                node_name, remote_node_name, name, cost, capacity, \
-                    rsvp_enabled, percent_reservable_bandwidth = interface_line.split()
-                if rsvp_enabled in [True, 'T', 'True', 'true']:
-                    rsvp_enabled_bool = True
-                else:
-                    rsvp_enabled_bool = False
             else:
-                msg = ("node_name, remote_node_name, name, cost, and capacity "
-                       "must be defined for line {}, line index {}".format(interface_line,
-                                                                           lines.index(interface_line)))
-                raise ModelException(msg)
-
-            new_interface = Interface(name, int(cost), float(capacity), Node(node_name), Node(remote_node_name),
-                                      None, rsvp_enabled_bool, float(percent_reservable_bandwidth))
-
-            if new_interface._key not in set([interface._key for interface in interface_set]):
-                interface_set.add(new_interface)
+                rsvp_enabled_bool = False
+            percent_reservable_bandwidth = 100
+        elif len(interface_info) >= 7:
+            node_name, remote_node_name, name, cost, capacity, \
+                rsvp_enabled, percent_reservable_bandwidth = interface_info
+            if rsvp_enabled in [True, 'T', 'True', 'true']:
+                rsvp_enabled_bool = True
             else:
-                print("{} already exists in model; disregarding line {}".format(new_interface,
-                                                                                lines.index(interface_line)))
-
-            # Derive Nodes from the Interface data
-            if node_name not in set([node.name for node in node_set]):
-                node_set.add(new_interface.node_object)
-            if remote_node_name not in set([node.name for node in node_set]):
-                node_set.add(new_interface.remote_node_object)
+                rsvp_enabled_bool = False
+        else:
+            msg = ("node_name, remote_node_name, name, cost, and capacity "
+                   "must be defined for line {}, line index {}".format(interface_line, line_index))
+            raise ModelException(msg)
 
-        return interface_set, node_set
+        return Interface(name, int(cost), float(capacity), Node(node_name), Node(remote_node_name),
+                         None, rsvp_enabled_bool, float(percent_reservable_bandwidth))
 
     def multiple_links_between_nodes(self):
         """
@@ -1106,8 +1064,9 @@ class PerformanceModel(_MasterModel):
         # If there are parallel links between nodes, create a list of the
         # parallel links, sort it, and return the list
         if len(connected_nodes_list) != len(connected_nodes_set):
+            connection_counts = Counter(connected_nodes_list)
             parallel_links = [connection for connection in connected_nodes_list if
-                              connected_nodes_list.count(connection) > 1]
+                              connection_counts[connection] > 1]
             parallel_links.sort()
 
             return parallel_links
@@ -1132,6 +1091,5 @@ class Model(PerformanceModel):
         self.circuit_objects = set()
         self.rsvp_lsp_objects = rsvp_lsp_objects
         self.srlg_objects = set()
-        self._parallel_lsp_groups = {}
 
         super().__init__(interface_objects, node_objects, demand_objects, rsvp_lsp_objects)
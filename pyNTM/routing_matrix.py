@@ -0,0 +1,146 @@
+"""
+A sparse Interfaces x Demands routing matrix taken from a simulated model.
+
+Entry (i, j) is the fraction of Demand j's traffic that crosses Interface i,
+from the Demand's IGP ECMP splits or from the split across the RSVP LSPs
+carrying it.  Because routing does not depend on Demand traffic, a new
+traffic vector can be evaluated against the same routing with a single
+sparse matrix-vector product instead of another update_simulation()::
+
+    routing = model.routing_matrix()
+    traffic = [2 * demand_traffic for demand_traffic in routing.demand_traffic()]
+    results = routing.evaluate(traffic)
+
+"""
+
+from array import array
+
+from .exceptions import ModelException
+
+
+class RoutingMatrix(object):
+    """
+    Column-compressed Interfaces x Demands fraction matrix.
+
+    - interfaces: list of Interface objects; row i is interfaces[i]
+    - demands: list of Demand objects; column j is demands[j]
+    - column_offsets: the entries of column j are at positions
+      column_offsets[j]:column_offsets[j + 1] of row_ids/fractions
+    - row_ids: row of each entry
+    - fractions: fraction of the column Demand's traffic on the row Interface
+    - failed: failed mask for each row (1 = failed)
+    """
+
+    def __init__(self, interfaces, demands, column_offsets, row_ids, fractions, failed):
+        self.interfaces = interfaces
+        self.demands = demands
+        self.column_offsets = array('l', column_offsets)
+        self.row_ids = array('l', row_ids)
+        self.fractions = array('d', fractions)
+        self.failed = array('b', failed)
+
+    def __repr__(self):
+        return 'RoutingMatrix(Interfaces: %s, Demands: %s, Entries: %s)' % \
+               (len(self.interfaces), len(self.demands), len(self.fractions))
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Builds the routing matrix from the current simulation results in model;
+        run update_simulation() on model first.  Rows and columns are ordered
+        by Interface and Demand _key.
+
+        :param model: PerformanceModel or FlexModel object
+        :return: RoutingMatrix object
+        """
+        interfaces = sorted(model.interface_objects, key=lambda interface: interface._key)
+        demands = sorted(model.demand_objects, key=lambda demand: demand._key)
+        row_ids = {interface: row_id for row_id, interface in enumerate(interfaces)}
+
+        column_offsets = [0]
+        entry_rows = []
+        entry_fractions = []
+        for demand in demands:
+            for interface, fraction in cls._demand_fractions(demand).items():
+                entry_rows.append(row_ids[interface])
+                entry_fractions.append(fraction)
+            column_offsets.append(len(entry_rows))
+
+        return cls(interfaces, demands, column_offsets, entry_rows, entry_fractions,
+                   [interface.failed for interface in interfaces])
+
+    @staticmethod
+    def _demand_fractions(demand):
+        """
+        Returns dict of Interface: fraction of demand's traffic on the Interface
+        """
+        if demand._igp_routed:
+            return demand._ecmp_splits
+        if not demand._routed:
+            return {}
+
+        # Demand rides RSVP LSPs; its traffic is split evenly across them
+        lsp_fraction = 1.0 / len(demand.path)
+        fractions = {}
+        for lsp in demand.path:
+            for interface in lsp.path['interfaces']:
+                fractions[interface] = fractions.get(interface, 0.0) + lsp_fraction
+        return fractions
+
+    def entries(self):
+        """
+        Generator of (Interface, Demand, fraction) for each non-zero entry
+        """
+        for column, demand in enumerate(self.demands):
+            for position in range(self.column_offsets[column], self.column_offsets[column + 1]):
+                yield self.interfaces[self.row_ids[position]], demand, self.fractions[position]
+
+    def demand_traffic(self):
+        """
+        Returns the current traffic of each Demand as a list in column order
+        """
+        return [demand.traffic for demand in self.demands]
+
+    def interface_traffic(self, traffic_vector):
+        """
+        Sparse matrix-vector product of the routing matrix and traffic_vector.
+
+        :param traffic_vector: traffic for each Demand, in column order
+        :return: array of traffic on each Interface, in row order
+        """
+        if len(traffic_vector) != len(self.demands):
+            raise ModelException('traffic_vector has {} entries; routing matrix has {} Demands'.format(
+                len(traffic_vector), len(self.demands)))
+
+        column_offsets, row_ids, fractions = self.column_offsets, self.row_ids, self.fractions
+        traffic = array('d', [0.0]) * len(self.interfaces)
+        for column, demand_traffic in enumerate(traffic_vector):
+            if not demand_traffic:
+                continue
+            for position in range(column_offsets[column], column_offsets[column + 1]):
+                traffic[row_ids[position]] += fractions[position] * demand_traffic
+
+        return traffic
+
+    def evaluate(self, traffic_vector):
+        """
+        Per-Interface traffic and utilization for traffic_vector, without
+        re-routing.  Traffic is the unrounded sum of each Demand's share;
+        update_simulation rounds each Demand's IGP share to 1 decimal place,
+        so results may differ from it in the first decimal place.
+
+        :param traffic_vector: traffic for each Demand, in column order
+        :return: dict of Interface: {'traffic': <traffic>, 'utilization': <utilization>};
+        failed Interfaces have traffic 'Down' and utilization 'Int is down'
+        """
+        traffic = self.interface_traffic(traffic_vector)
+
+        results = {}
+        for row_id, interface in enumerate(self.interfaces):
+            if self.failed[row_id]:
+                results[interface] = {'traffic': 'Down', 'utilization': 'Int is down'}
+            else:
+                util = (traffic[row_id] / interface.capacity) * 100
+                results[interface] = {'traffic': traffic[row_id], 'utilization': float('%.2f' % util)}
+
+        return results
@@ -1,6 +1,7 @@
 """A class to represent an RSVP label-switched-path in the network model """
 
 import random
+from .change_tracking import key_changed
 from .exceptions import ModelException
 
 
@@ -29,6 +30,11 @@ class RSVP_LSP(object):
 
     """
 
+    _tracker = None  # ChangeTracker of the model holding the LSP
+
+    # Attributes written by update_simulation; see _MasterModel.checkpoint
+    _simulation_attributes = ('path', 'reserved_bandwidth', '_setup_bandwidth')
+
     def __init__(self, source_node_object, dest_node_object,
                  lsp_name='none', configured_setup_bandwidth=None):
 
@@ -40,6 +46,16 @@ class RSVP_LSP(object):
         self._setup_bandwidth = 'Unrouted - initial'
         self.configured_setup_bandwidth = configured_setup_bandwidth
 
+    @property
+    def lsp_name(self):
+        """Name of the LSP"""
+        return self._lsp_name
+
+    @lsp_name.setter
+    def lsp_name(self, lsp_name):
+        self._lsp_name = lsp_name
+        key_changed(self)
+
     @property
     def _key(self):
         """Unique identifier for the rsvp lsp: (Node('source').name, Node('dest').name, name)"""
@@ -172,8 +188,12 @@ class RSVP_LSP(object):
         :param model: model object containing LSP
         :return: List of demands in model object that LSP carries
         """
+        lsp_demands = model._reverse_index('lsp_demands')
+        if lsp_demands is not None:
+            return list(lsp_demands.get(self, []))
+
         demand_list = []
-        for demand in (demand for demand in model.demand_objects):
+        for demand in (demand for demand in model.demand_objects if not demand._igp_routed):
             if self in demand.path:
                 demand_list.append(demand)
 
@@ -188,11 +208,10 @@ class RSVP_LSP(object):
         """
 
         # Find all LSPs with same source and dest as self
-        parallel_lsp_groups = model.parallel_lsp_groups()
+        parallel_lsps = model._lookup_all('lsp_groups', (self.source_node_object.name, self.dest_node_object.name))
         total_traffic = sum([demand.traffic for demand in self.demands_on_lsp(model)])
 
-        key = "{}-{}".format(self.source_node_object.name, self.dest_node_object.name)
-        parallel_routed_lsps = [lsp for lsp in parallel_lsp_groups[key] if 'Unrouted' not in lsp.path]
+        parallel_routed_lsps = [lsp for lsp in parallel_lsps if 'Unrouted' not in lsp.path]
 
         traffic_on_lsp = total_traffic / len(parallel_routed_lsps)
 
@@ -0,0 +1,256 @@
+"""
+Runs failure scenarios across a pool of worker processes.
+
+The model's topology, Demands and RSVP LSPs are packed into flat arrays in
+shared memory (multiprocessing RawArrays) once, when the pool starts.  Each
+worker rebuilds its own copy of the model from the arrays, simulates the
+baseline once with a FailureSweep, and then runs the scenarios it is sent.
+Tasks carry only scenario tuples and results carry only compact vectors:
+the utilization of each Interface, by interface id, and the ids of the
+Demands that do not route.
+"""
+
+import json
+from array import array
+from multiprocessing import Pool, cpu_count
+from multiprocessing.sharedctypes import RawArray
+
+from .demand import Demand
+from .failure_sweep import FailureSweep, worst_case
+from .interface import Interface
+from .node import Node
+from .rsvp import RSVP_LSP
+from .srlg import SRLG
+
+NAME_SEPARATOR = '\0'
+
+# State of a worker process: its rebuilt model's FailureSweep and
+# Interfaces and Demands by id, or the error raised while building them
+_worker = {}
+
+
+def _shared(typecode, values):
+    return RawArray(typecode, list(values))
+
+
+def pack_model(model):
+    """
+    Packs a simulated model into flat shared memory arrays
+
+    :param model: PerformanceModel or FlexModel object; must have been
+    simulated so its circuits are known
+    :return: (interfaces, demands, arrays); interfaces and demands are the
+    model's Interfaces and Demands in id order and arrays is a dict of
+    array name: RawArray
+    """
+    nodes = sorted(model.node_objects, key=lambda node: node.name)
+    node_ids = {node.name: node_id for node_id, node in enumerate(nodes)}
+    interfaces = list(model.interface_objects)
+    interface_ids = {interface: interface_id for interface_id, interface in enumerate(interfaces)}
+    demands = list(model.demand_objects)
+    lsps = list(model.rsvp_lsp_objects)
+    srlgs = sorted(model.srlg_objects, key=lambda srlg: srlg.name)
+
+    srlg_nodes = []
+    srlg_interfaces = []
+    for srlg_id, srlg in enumerate(srlgs):
+        for node in srlg.node_objects:
+            srlg_nodes += [srlg_id, node_ids[node.name]]
+        for interface in srlg.interface_objects:
+            srlg_interfaces += [srlg_id, interface_ids[interface]]
+
+    names = [node.name for node in nodes] + [interface.name for interface in interfaces] + \
+        [demand.name for demand in demands] + [lsp.lsp_name for lsp in lsps] + [srlg.name for srlg in srlgs]
+
+    arrays = {
+        'names': _shared('B', NAME_SEPARATOR.join(names).encode('utf-8')),
+        'node_failed': _shared('b', (node.failed for node in nodes)),
+        'interface_node': _shared('i', (node_ids[interface.node_object.name] for interface in interfaces)),
+        'interface_remote_node': _shared('i', (node_ids[interface.remote_node_object.name]
+                                               for interface in interfaces)),
+        # Circuit ids can be ints or strings; they are kept as they are, so
+        # scenarios see the same ids in every process
+        'interface_circuit': _shared('B', json.dumps([interface.circuit_id for interface in interfaces])
+                                     .encode('utf-8')),
+        'interface_cost': _shared('q', (interface.cost for interface in interfaces)),
+        'interface_capacity': _shared('d', (interface.capacity for interface in interfaces)),
+        'interface_failed': _shared('b', (interface.failed for interface in interfaces)),
+        'interface_rsvp_enabled': _shared('b', (interface.rsvp_enabled for interface in interfaces)),
+        'interface_percent_reservable': _shared('d', (interface.percent_reservable_bandwidth
+                                                      for interface in interfaces)),
+        'demand_source': _shared('i', (node_ids[demand.source_node_object.name] for demand in demands)),
+        'demand_dest': _shared('i', (node_ids[demand.dest_node_object.name] for demand in demands)),
+        'demand_traffic': _shared('d', (demand.traffic for demand in demands)),
+        'lsp_source': _shared('i', (node_ids[lsp.source_node_object.name] for lsp in lsps)),
+        'lsp_dest': _shared('i', (node_ids[lsp.dest_node_object.name] for lsp in lsps)),
+        # NaN stands for no configured setup bandwidth
+        'lsp_setup_bandwidth': _shared('d', (float('nan') if lsp.configured_setup_bandwidth is None
+                                             else lsp.configured_setup_bandwidth for lsp in lsps)),
+        'srlg_failed': _shared('b', (srlg.failed for srlg in srlgs)),
+        'srlg_nodes': _shared('i', srlg_nodes),
+        'srlg_interfaces': _shared('i', srlg_interfaces),
+    }
+
+    return interfaces, demands, arrays
+
+
+def unpack_model(model_class, arrays, routing_engine='networkx'):
+    """
+    Builds a model of model_class from the arrays made by pack_model
+
+    :return: (model, interfaces, demands); interfaces and demands are the
+    new model's Interfaces and Demands in id order
+    """
+    names = bytes(arrays['names']).decode('utf-8').split(NAME_SEPARATOR)
+    num_nodes = len(arrays['node_failed'])
+    num_interfaces = len(arrays['interface_node'])
+    num_demands = len(arrays['demand_source'])
+    num_lsps = len(arrays['lsp_source'])
+    node_names = names[:num_nodes]
+    interface_names = names[num_nodes:num_nodes + num_interfaces]
+    demand_names = names[num_nodes + num_interfaces:num_nodes + num_interfaces + num_demands]
+    lsp_names = names[num_nodes + num_interfaces + num_demands:num_nodes + num_interfaces + num_demands + num_lsps]
+    srlg_names = names[num_nodes + num_interfaces + num_demands + num_lsps:]
+
+    circuit_ids = json.loads(bytes(arrays['interface_circuit']).decode('utf-8'))
+
+    nodes = [Node(name) for name in node_names]
+    for node_id, node in enumerate(nodes):
+        node._failed = bool(arrays['node_failed'][node_id])
+    interfaces = []
+    for interface_id, name in enumerate(interface_names):
+        interface = Interface(name, arrays['interface_cost'][interface_id], arrays['interface_capacity'][interface_id],
+                              nodes[arrays['interface_node'][interface_id]],
+                              nodes[arrays['interface_remote_node'][interface_id]],
+                              circuit_ids[interface_id],
+                              bool(arrays['interface_rsvp_enabled'][interface_id]),
+                              arrays['interface_percent_reservable'][interface_id])
+        interface._failed = bool(arrays['interface_failed'][interface_id])
+        interfaces.append(interface)
+    demands = [Demand(nodes[arrays['demand_source'][demand_id]], nodes[arrays['demand_dest'][demand_id]],
+                      arrays['demand_traffic'][demand_id], name)
+               for demand_id, name in enumerate(demand_names)]
+    lsps = []
+    for lsp_id, name in enumerate(lsp_names):
+        setup_bandwidth = arrays['lsp_setup_bandwidth'][lsp_id]
+        lsps.append(RSVP_LSP(nodes[arrays['lsp_source'][lsp_id]], nodes[arrays['lsp_dest'][lsp_id]], name,
+                             None if setup_bandwidth != setup_bandwidth else setup_bandwidth))
+
+    model = model_class(set(interfaces), set(nodes), set(demands), set(lsps))
+    model.routing_engine = routing_engine
+
+    srlgs = [SRLG(name, model) for name in srlg_names]
+    for srlg_id, srlg in enumerate(srlgs):
+        srlg._failed = bool(arrays['srlg_failed'][srlg_id])
+    members = arrays['srlg_nodes']
+    for position in range(0, len(members), 2):
+        nodes[members[position + 1]]._srlgs.add(srlgs[members[position]])
+    members = arrays['srlg_interfaces']
+    for position in range(0, len(members), 2):
+        interfaces[members[position + 1]]._srlgs.add(srlgs[members[position]])
+
+    return model, interfaces, demands
+
+
+def _init_worker(model_class, arrays, routing_engine):
+    try:
+        model, interfaces, demands = unpack_model(model_class, arrays, routing_engine)
+        _worker['sweep'] = FailureSweep(model)
+        _worker['interfaces'] = interfaces
+        _worker['demand_ids'] = {demand: demand_id for demand_id, demand in enumerate(demands)}
+    except Exception as error:
+        # An initializer that raises makes the pool start workers forever;
+        # report the error from the first task instead
+        _worker['error'] = error
+
+
+def _run_scenarios(scenarios):
+    """
+    Runs scenarios in a worker process
+
+    :return: list of (utilization, unrouted demand ids) for each scenario;
+    utilization is an array of each Interface's utilization by interface
+    id, NaN for failed Interfaces
+    """
+    if 'error' in _worker:
+        raise _worker['error']
+
+    results = []
+    for scenario in scenarios:
+        scenario_results = _worker['sweep'].run_scenario(scenario)
+        utilization = scenario_results['utilization']
+        results.append((array('d', [float('nan') if utilization[interface] == 'Int is down' else
+                                    utilization[interface] for interface in _worker['interfaces']]),
+                        array('i', sorted(_worker['demand_ids'][demand]
+                                          for demand in scenario_results['unrouted_demands']))))
+    return results
+
+
+class ScenarioExecutor(object):
+    """
+    Runs failure scenarios against model (see FailureSweep) in a pool of
+    worker processes.  Building a ScenarioExecutor runs update_simulation
+    on model; later changes to model are not seen by the workers.
+
+    Use as a context manager, or call close, to stop the workers.
+
+    Example::
+
+        with ScenarioExecutor(model, processes=16) as executor:
+            sweep = executor.run(FailureSweep(model).scenarios(max_failures=2))
+    """
+
+    def __init__(self, model, processes=None):
+        model.update_simulation()
+        self.interfaces, self.demands, arrays = pack_model(model)
+        self.processes = processes or cpu_count()
+        self._pool = Pool(self.processes, _init_worker, (type(model), arrays, model.routing_engine))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        self._pool.terminate()
+        self._pool.join()
+
+    def map(self, scenarios, chunksize=None):
+        """
+        Runs scenarios in the worker processes
+
+        :param scenarios: iterable of scenarios
+        :param chunksize: scenarios sent to a worker per task; default
+        spreads the scenarios over about 4 tasks per worker
+        :return: generator of (scenario, utilization, unrouted_demands) in
+        the order of scenarios; utilization is an array of each Interface's
+        utilization in the order of self.interfaces, NaN for failed
+        Interfaces, and unrouted_demands is a list of Demands
+        """
+        scenarios = [tuple(scenario) for scenario in scenarios]
+        if chunksize is None:
+            chunksize = max(1, len(scenarios) // (self.processes * 4))
+        chunks = [scenarios[start:start + chunksize] for start in range(0, len(scenarios), chunksize)]
+
+        scenario_iterator = iter(scenarios)
+        for chunk_results in self._pool.imap(_run_scenarios, chunks):
+            for utilization, unrouted_demand_ids in chunk_results:
+                yield (next(scenario_iterator), utilization,
+                       [self.demands[demand_id] for demand_id in unrouted_demand_ids])
+
+    def run(self, scenarios, chunksize=None):
+        """
+        Runs scenarios in the worker processes and collects the worst case
+        utilization; returns the same dict as FailureSweep.run
+        """
+        def scenario_results():
+            for scenario, utilization, unrouted_demands in self.map(scenarios, chunksize):
+                yield scenario, {'utilization': {interface: 'Int is down' if util != util else util
+                                                 for interface, util in zip(self.interfaces, utilization)},
+                                 'unrouted_demands': unrouted_demands}
+
+        return worst_case(scenario_results())
@@ -0,0 +1,314 @@
+"""
+Batch what-if scenarios read from a scenario file.
+
+A scenario file has one JSON object per line.  Every field but name is
+optional::
+
+    {"name": "G down, A-B metric 50",
+     "fail": [["circuit", "A-to-B", "A"], ["node", "G"], ["srlg", "srlg_1"]],
+     "demand_scale": 1.2,
+     "metrics": [["A-to-B", "A", 50], ["B-to-A", "B", 50]],
+     "add_circuits": [{"node_a": "A", "node_b": "G", "interface_a": "A-to-G",
+                       "interface_b": "G-to-A", "cost_a": 10, "cost_b": 10,
+                       "capacity": 100, "circuit_id": 90}]}
+
+- fail: failed elements, as in a FailureSweep scenario
+- demand_scale: factor for the traffic of every Demand, or a list of
+  [source, dest, demand name, factor] for individual Demands
+- metrics: [interface name, node name, new cost] for each changed Interface
+- add_circuits: circuits to add between existing Nodes; circuit_id is
+  optional in a PerformanceModel
+
+A ScenarioRunner applies each scenario as an overlay on one baseline model
+and takes the overlay off again afterwards, instead of copying or loading
+the model again for each scenario.  Every scenario is simulated with
+update_simulation, with the model's own settings, and rolled back from
+the model's undo journal (see _MasterModel.checkpoint).  By default the
+scenarios run in a pool of worker processes, one per CPU, each holding a
+copy of the model rebuilt from shared memory arrays (see
+scenario_executor); with processes=1 they run in this process.  Results
+are written to the output file as JSON lines in the order the scenarios
+finish.
+"""
+
+import json
+from multiprocessing import Pool, cpu_count
+
+from .exceptions import ModelException
+from .scenario_executor import pack_model, unpack_model
+
+SCENARIO_FIELDS = ('name', 'fail', 'demand_scale', 'metrics', 'add_circuits')
+CIRCUIT_FIELDS = ('node_a', 'node_b', 'interface_a', 'interface_b', 'cost_a', 'cost_b', 'capacity', 'circuit_id')
+
+# State of a worker process: its ScenarioEvaluator, or the error raised while building it
+_worker = {}
+
+
+def load_scenarios(scenario_file):
+    """
+    Generator of the scenarios in a scenario file
+
+    :param scenario_file: path of the scenario file
+    :return: generator of scenario dicts; a scenario with no name is named
+    after its line number
+    """
+    with open(scenario_file) as lines:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                scenario = json.loads(line)
+            except ValueError as error:
+                raise ModelException("line {} of {} is not valid JSON: {}".format(line_number, scenario_file, error))
+            if not isinstance(scenario, dict):
+                raise ModelException("line {} of {} is not a JSON object".format(line_number, scenario_file))
+            unknown_fields = set(scenario) - set(SCENARIO_FIELDS)
+            if unknown_fields:
+                msg = "line {} of {} has unknown fields {}".format(line_number, scenario_file, sorted(unknown_fields))
+                raise ModelException(msg)
+            scenario.setdefault('name', str(line_number))
+            yield scenario
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_name(value):
+    return isinstance(value, str)
+
+
+def _check_scenario(scenario):
+    """
+    Checks that a scenario dict is well formed, as described in the module
+    docstring; does not check that the elements it names exist in a model
+
+    :param scenario: scenario dict
+    :raises ModelException: if it is not
+    """
+    def check(condition, field, message):
+        if not condition:
+            raise ModelException("scenario {!r}: {} {}".format(scenario.get('name'), field, message))
+
+    check(_is_name(scenario.get('name')), 'name', 'must be a string')
+    unknown_fields = set(scenario) - set(SCENARIO_FIELDS)
+    check(not unknown_fields, 'fields', 'unknown: {}'.format(sorted(unknown_fields)))
+
+    fail = scenario.get('fail', [])
+    check(isinstance(fail, (list, tuple)), 'fail', 'must be a list')
+    for element in fail:
+        check(isinstance(element, (list, tuple)) and element and element[0] in ('circuit', 'node', 'srlg') and
+              len(element) == (3 if element[0] == 'circuit' else 2) and all(map(_is_name, element)),
+              'fail', "elements must be ['circuit', interface name, node name], ['node', name] "
+                      "or ['srlg', name], not {!r}".format(element))
+
+    demand_scale = scenario.get('demand_scale')
+    if isinstance(demand_scale, (list, tuple)):
+        for factor in demand_scale:
+            check(isinstance(factor, (list, tuple)) and len(factor) == 4 and all(map(_is_name, factor[:3])) and
+                  _is_number(factor[3]),
+                  'demand_scale', 'entries must be [source, dest, demand name, factor], not {!r}'.format(factor))
+    else:
+        check(demand_scale is None or _is_number(demand_scale), 'demand_scale', 'must be a number or a list')
+
+    metrics = scenario.get('metrics', [])
+    check(isinstance(metrics, (list, tuple)), 'metrics', 'must be a list')
+    for metric in metrics:
+        check(isinstance(metric, (list, tuple)) and len(metric) == 3 and all(map(_is_name, metric[:2])) and
+              _is_number(metric[2]),
+              'metrics', 'entries must be [interface name, node name, cost], not {!r}'.format(metric))
+
+    add_circuits = scenario.get('add_circuits', [])
+    check(isinstance(add_circuits, (list, tuple)), 'add_circuits', 'must be a list')
+    for circuit in add_circuits:
+        check(isinstance(circuit, dict) and
+              all(_is_name(circuit.get(key)) for key in ('node_a', 'node_b', 'interface_a', 'interface_b')) and
+              all(_is_number(circuit.get(key, 1)) for key in ('cost_a', 'cost_b', 'capacity')) and
+              not set(circuit) - set(CIRCUIT_FIELDS),
+              'add_circuits', 'entries must have the fields {}, not {!r}'.format(CIRCUIT_FIELDS, circuit))
+
+
+class ScenarioEvaluator(object):
+    """
+    Evaluates scenarios as overlays on model.  Building a ScenarioEvaluator
+    runs update_simulation on model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        model.update_simulation()
+
+    def evaluate(self, scenario):
+        """
+        Evaluates a scenario and takes its overlay off the model again
+
+        :param scenario: scenario dict
+        :return: JSON serializable dict with the scenario's 'name',
+        'max_utilization', the 'interface' ([name, node name]) with it,
+        'unrouted_demands' ([source, dest, name] of each) and the
+        'utilization' ([name, node name, utilization] of each Interface;
+        utilization is null if the Interface is down); or the 'name' and
+        the 'error' (a ModelException) if the scenario is malformed or
+        cannot be applied to the model
+        """
+        try:
+            _check_scenario(scenario)
+            utilization, unrouted_demands = self._simulate(scenario)
+        except ModelException as error:
+            # A malformed or inapplicable scenario is reported, not fatal to the batch
+            return {'name': scenario.get('name'), 'error': '{}: {}'.format(type(error).__name__, error)}
+
+        interfaces = sorted(utilization, key=lambda interface: interface._key)
+        worst = None
+        for interface in interfaces:
+            util = utilization[interface]
+            if util != 'Int is down' and (worst is None or util > utilization[worst]):
+                worst = interface
+
+        return {'name': scenario['name'],
+                'max_utilization': None if worst is None else utilization[worst],
+                'interface': None if worst is None else list(worst._key),
+                'unrouted_demands': sorted(list(demand._key) for demand in unrouted_demands),
+                'utilization': [list(interface._key) + [None if utilization[interface] == 'Int is down'
+                                                        else utilization[interface]]
+                                for interface in interfaces]}
+
+    def _simulate(self, scenario):
+        """
+        Applies scenario to the model, simulates it and takes it off again.
+        The edits are journaled (see _MasterModel.checkpoint) and rolled
+        back together with the simulation results, so each scenario starts
+        from the baseline's state and results.
+
+        :return: (dict of Interface: utilization, list of unrouted Demands)
+        """
+        model = self.model
+        journal_open = model._tracker.journal is not None
+        checkpoint = model.checkpoint()
+        added_interfaces = set()
+        try:
+            for circuit in scenario.get('add_circuits', []):
+                interfaces_before = set(model.interface_objects)
+                try:
+                    model.add_circuit(model.get_node_object(circuit['node_a']),
+                                      model.get_node_object(circuit['node_b']),
+                                      circuit['interface_a'], circuit['interface_b'],
+                                      circuit.get('cost_a', 1), circuit.get('cost_b', 1),
+                                      circuit.get('capacity', 1000), circuit_id=circuit.get('circuit_id'))
+                finally:
+                    added_interfaces.update(interface for interface in model.interface_objects
+                                            if interface not in interfaces_before)
+
+            for interface_name, node_name, cost in scenario.get('metrics', []):
+                model.get_interface_object(interface_name, node_name).cost = cost
+
+            demand_scale = scenario.get('demand_scale')
+            if isinstance(demand_scale, (list, tuple)):
+                demand_factors = [(model.get_demand_object(source, dest, name), factor)
+                                  for source, dest, name, factor in demand_scale]
+            elif demand_scale is not None:
+                demand_factors = [(demand, demand_scale) for demand in model.demand_objects]
+            else:
+                demand_factors = []
+            for demand, factor in demand_factors:
+                demand.traffic = demand.traffic * factor
+
+            for element in scenario.get('fail', []):
+                self._fail(element)
+
+            model.update_simulation()
+            return ({interface: interface.utilization for interface in model.interface_objects},
+                    [demand for demand in model.demand_objects if not demand._routed])
+        finally:
+            model.rollback(checkpoint)
+            if not journal_open:
+                model.release_checkpoints()
+            # The added Interfaces leave the lookup indexes with them; their
+            # circuits were made by validation and are not journaled
+            model.interface_objects.difference_update(added_interfaces)
+            model.circuit_objects = set(circuit for circuit in model.circuit_objects
+                                        if circuit.interface_a not in added_interfaces and
+                                        circuit.interface_b not in added_interfaces)
+
+    def _fail(self, element):
+        element_type = element[0]
+        if element_type == 'circuit':
+            self.model.fail_interface(element[1], element[2])
+        elif element_type == 'node':
+            self.model.fail_node(element[1])
+        else:
+            self.model.fail_srlg(element[1])
+
+
+def _init_worker(model_class, arrays, routing_engine):
+    try:
+        model = unpack_model(model_class, arrays, routing_engine)[0]
+        _worker['evaluator'] = ScenarioEvaluator(model)
+    except Exception as error:
+        # An initializer that raises makes the pool start workers forever;
+        # report the error from the first task instead
+        _worker['error'] = error
+
+
+def _evaluate(scenario):
+    if 'error' in _worker:
+        raise _worker['error']
+    return json.dumps(_worker['evaluator'].evaluate(scenario))
+
+
+class ScenarioRunner(object):
+    """
+    Runs what-if scenarios as overlays on model and streams the results
+    to a file of JSON lines.
+
+    :param model: PerformanceModel or FlexModel object
+    :param processes: number of worker processes, by default the number of
+    CPUs; 1 runs the scenarios in this process, on model itself
+
+    Example::
+
+        runner = ScenarioRunner(model, processes=32)
+        runner.run(load_scenarios('scenarios.jsonl'), 'results.jsonl')
+    """
+
+    def __init__(self, model, processes=None):
+        self.model = model
+        self.processes = processes or cpu_count()
+
+    def results(self, scenarios):
+        """
+        Generator of the JSON result line of each scenario, in the order
+        the scenarios finish; see ScenarioEvaluator.evaluate
+        """
+        if self.processes == 1:
+            evaluator = ScenarioEvaluator(self.model)
+            for scenario in scenarios:
+                yield json.dumps(evaluator.evaluate(scenario))
+            return
+
+        self.model.update_simulation()
+        arrays = pack_model(self.model)[2]
+        pool = Pool(self.processes, _init_worker, (type(self.model), arrays, self.model.routing_engine))
+        try:
+            for result in pool.imap_unordered(_evaluate, scenarios):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def run(self, scenarios, output_file):
+        """
+        Runs scenarios and writes one JSON result line per scenario to
+        output_file as each finishes
+
+        :param scenarios: iterable of scenario dicts, such as load_scenarios returns
+        :param output_file: path of the results file
+        :return: number of scenarios run
+        """
+        count = 0
+        with open(output_file, 'w') as output:
+            for result in self.results(scenarios):
+                output.write(result + '\n')
+                output.flush()
+                count += 1
+        return count
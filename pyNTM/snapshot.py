@@ -0,0 +1,338 @@
+"""
+Binary model snapshots.
+
+A snapshot holds a model's topology, Demands, RSVP LSPs, SRLG memberships
+and failure states and, optionally, its simulation results: Interface
+traffic and reservations, circuits, LSP paths and reservations, and the
+path of each Demand.  Loading a simulated snapshot gives a model that can
+be queried right away, without load_model_file and update_simulation.
+
+The file is a fixed header followed by a zlib compressed JSON body::
+
+    magic (8 bytes, b'PYNTMSNP') | format version (uint16) | flags (uint16) | body
+
+The body stores each object type as columns (one list per attribute) and
+refers to Nodes, Interfaces, SRLGs and LSPs by their position in their
+column.  IGP routed Demands keep their ECMP splits, from which their paths
+are enumerated again the first time they are read.
+"""
+
+import json
+import struct
+import zlib
+from functools import partial
+
+from .circuit import Circuit
+from .demand import Demand
+from .exceptions import ModelException
+from .graph_engine import dag_paths
+from .interface import Interface
+from .node import Node
+from .rsvp import RSVP_LSP
+from .srlg import SRLG
+
+MAGIC = b'PYNTMSNP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sHH')
+
+# Header flags
+SIMULATION = 1  # body holds simulation results
+SIMULATED = 2  # model had been simulated when saved; reverse indexes are rebuilt on load
+
+
+def _model_family(model_class):
+    """
+    Name of the model class directly under _MasterModel that model_class
+    derives from ('PerformanceModel' or 'FlexModel'); snapshots load into
+    any class of the same family
+    """
+    family = model_class
+    for klass in model_class.__mro__:
+        if klass.__name__ == '_MasterModel':
+            return family.__name__
+        family = klass
+    raise ModelException("{} is not a model class".format(model_class.__name__))
+
+
+def _encode_demand_path(demand, interface_ids, lsp_ids):
+    """
+    Returns demand's path in JSON form: ['unrouted'], ['ecmp', [[interface
+    id, fraction], ...]], ['lsps', [lsp id, ...]] or ['interfaces', [[interface
+    id, ...], ...]]
+    """
+    if demand._igp_routed:
+        return ['ecmp', [[interface_ids[interface], fraction] for interface, fraction in demand._ecmp_splits.items()]]
+    path = demand.path
+    if path == 'Unrouted':
+        return ['unrouted']
+    if all(isinstance(hop, RSVP_LSP) for hop in path):
+        return ['lsps', [lsp_ids[lsp] for lsp in path]]
+    return ['interfaces', [[interface_ids[interface] for interface in hops] for hops in path]]
+
+
+def _encode_lsp_path(path, interface_ids):
+    if not isinstance(path, dict):
+        return path
+    encoded = dict(path)
+    encoded['interfaces'] = [interface_ids[interface] for interface in path['interfaces']]
+    return encoded
+
+
+def _ecmp_paths(splits, source_name, dest_name):
+    """
+    Returns every path of an IGP routed demand; the Interfaces with a
+    share of the demand's traffic make up its shortest path DAG
+    """
+    pred = {}
+    for interface in splits:
+        pred.setdefault(interface.remote_node_object.name, []).append((interface, interface.node_object.name))
+    return dag_paths(pred, source_name, dest_name)
+
+
+def _save_body(model, simulation):
+    nodes = sorted(model.node_objects, key=lambda node: node.name)
+    node_ids = {node.name: node_id for node_id, node in enumerate(nodes)}
+    srlgs = sorted(model.srlg_objects, key=lambda srlg: srlg.name)
+    srlg_ids = {srlg.name: srlg_id for srlg_id, srlg in enumerate(srlgs)}
+    interfaces = sorted(model.interface_objects, key=lambda interface: interface._key)
+    interface_ids = {interface: interface_id for interface_id, interface in enumerate(interfaces)}
+    demands = sorted(model.demand_objects, key=lambda demand: demand._key)
+    lsps = sorted(model.rsvp_lsp_objects, key=lambda lsp: lsp._key)
+    lsp_ids = {lsp: lsp_id for lsp_id, lsp in enumerate(lsps)}
+
+    body = {
+        'model_family': _model_family(type(model)),
+        'settings': {'routing_engine': model.routing_engine,
+                     'traffic_propagation': model.traffic_propagation,
+                     'lsp_rerouting': model.lsp_rerouting},
+        'srlgs': {'name': [srlg.name for srlg in srlgs],
+                  'failed': [srlg._failed for srlg in srlgs],
+                  'failure_probability': [srlg._failure_probability for srlg in srlgs]},
+        'nodes': {'name': [node.name for node in nodes],
+                  'lat': [node._lat for node in nodes],
+                  'lon': [node._lon for node in nodes],
+                  'failed': [node._failed for node in nodes],
+                  'failure_probability': [node._failure_probability for node in nodes],
+                  'srlgs': [sorted(srlg_ids[srlg.name] for srlg in node._srlgs) for node in nodes]},
+        'interfaces': {'name': [interface.name for interface in interfaces],
+                       'node': [node_ids[interface.node_object.name] for interface in interfaces],
+                       'remote_node': [node_ids[interface.remote_node_object.name] for interface in interfaces],
+                       'cost': [interface.cost for interface in interfaces],
+                       'capacity': [interface.capacity for interface in interfaces],
+                       'circuit_id': [interface.circuit_id for interface in interfaces],
+                       'rsvp_enabled': [interface.rsvp_enabled for interface in interfaces],
+                       'percent_reservable_bandwidth': [interface.percent_reservable_bandwidth
+                                                        for interface in interfaces],
+                       'failed': [interface._failed for interface in interfaces],
+                       'failure_probability': [interface._failure_probability for interface in interfaces],
+                       'srlgs': [sorted(srlg_ids[srlg.name] for srlg in interface._srlgs)
+                                 for interface in interfaces]},
+        'demands': {'source': [node_ids[demand.source_node_object.name] for demand in demands],
+                    'dest': [node_ids[demand.dest_node_object.name] for demand in demands],
+                    'traffic': [demand.traffic for demand in demands],
+                    'name': [demand.name for demand in demands]},
+        'lsps': {'source': [node_ids[lsp.source_node_object.name] for lsp in lsps],
+                 'dest': [node_ids[lsp.dest_node_object.name] for lsp in lsps],
+                 'name': [lsp.lsp_name for lsp in lsps],
+                 'configured_setup_bandwidth': [lsp.configured_setup_bandwidth for lsp in lsps]},
+    }
+
+    if simulation:
+        body['simulation'] = {
+            'interface_traffic': [interface.traffic for interface in interfaces],
+            'interface_reserved_bandwidth': [interface._reserved_bandwidth for interface in interfaces],
+            'interface_in_ckt': [getattr(interface, 'in_ckt', None) for interface in interfaces],
+            'circuits': [[interface_ids[circuit.interface_a], interface_ids[circuit.interface_b]]
+                         for circuit in model.circuit_objects],
+            'lsp_path': [_encode_lsp_path(lsp.path, interface_ids) for lsp in lsps],
+            'lsp_reserved_bandwidth': [lsp.reserved_bandwidth for lsp in lsps],
+            'lsp_setup_bandwidth': [lsp._setup_bandwidth for lsp in lsps],
+            'demand_path': [_encode_demand_path(demand, interface_ids, lsp_ids) for demand in demands],
+        }
+
+    return body
+
+
+def save_snapshot(model, snapshot_file, simulation=True):
+    """
+    Writes model to a snapshot file
+
+    :param model: PerformanceModel or FlexModel object
+    :param snapshot_file: path of the snapshot file
+    :param simulation: also save the simulation results?
+    """
+    flags = 0
+    if simulation:
+        flags |= SIMULATION
+        if model._reverse_indexes is not None:
+            flags |= SIMULATED
+
+    body = json.dumps(_save_body(model, simulation), separators=(',', ':')).encode('utf-8')
+    with open(snapshot_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags))
+        f.write(zlib.compress(body, 6))
+
+
+def _read_snapshot(snapshot_file):
+    """
+    Returns (flags, body) of a snapshot file
+    """
+    with open(snapshot_file, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ModelException("{} is not a model snapshot".format(snapshot_file))
+    magic, version, flags = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ModelException("{} is not a model snapshot".format(snapshot_file))
+    if version > FORMAT_VERSION:
+        msg = "{} is snapshot format version {}; this version of pyNTM reads up to version {}".format(
+            snapshot_file, version, FORMAT_VERSION)
+        raise ModelException(msg)
+
+    try:
+        body = json.loads(zlib.decompress(data[HEADER.size:]).decode('utf-8'))
+    except (zlib.error, ValueError) as error:
+        raise ModelException("{} is a damaged model snapshot: {}".format(snapshot_file, error))
+    return flags, body
+
+
+def _restore_simulation(model, simulation, interfaces, demands, lsps, simulated):
+    """
+    Puts the simulation results in a snapshot body back on the model objects
+    """
+    interface_results = zip(interfaces, simulation['interface_traffic'], simulation['interface_reserved_bandwidth'],
+                            simulation['interface_in_ckt'])
+    for interface, traffic, reserved_bandwidth, in_ckt in interface_results:
+        interface.traffic = traffic
+        interface._reserved_bandwidth = reserved_bandwidth
+        if in_ckt is not None:
+            interface.in_ckt = in_ckt
+    model.circuit_objects = set(Circuit(interfaces[interface_a], interfaces[interface_b])
+                                for interface_a, interface_b in simulation['circuits'])
+
+    for lsp, path, reserved_bandwidth, setup_bandwidth in zip(lsps, simulation['lsp_path'],
+                                                              simulation['lsp_reserved_bandwidth'],
+                                                              simulation['lsp_setup_bandwidth']):
+        if isinstance(path, dict):
+            path['interfaces'] = [interfaces[interface_id] for interface_id in path['interfaces']]
+        lsp.path = path
+        lsp.reserved_bandwidth = reserved_bandwidth
+        lsp._setup_bandwidth = setup_bandwidth
+
+    # Reverse indexes, as update_simulation leaves them; see _MasterModel._reverse_index
+    interface_demands = {}
+    interface_lsps = {}
+    lsp_demands = {}
+    deferred_demands = []
+    for lsp in (lsp for lsp in lsps if 'Unrouted' not in lsp.path):
+        lsp_demands[lsp] = []
+        for interface in lsp.path['interfaces']:
+            interface_lsps.setdefault(interface, []).append(lsp)
+
+    for demand, encoded_path in zip(demands, simulation['demand_path']):
+        kind = encoded_path[0]
+        if kind == 'unrouted':
+            demand.path = 'Unrouted'
+            continue
+        path = encoded_path[1]
+        if kind == 'ecmp':
+            splits = dict((interfaces[interface_id], fraction) for interface_id, fraction in path)
+            demand._set_ecmp_route(partial(dict, splits),
+                                   partial(_ecmp_paths, splits, demand.source_node_object.name,
+                                           demand.dest_node_object.name))
+            deferred_demands.append(demand)
+        elif kind == 'lsps':
+            demand.path = [lsps[lsp_id] for lsp_id in path]
+            traffic_per_lsp = demand.traffic / len(demand.path)
+            for lsp in demand.path:
+                lsp_demands.setdefault(lsp, []).append(demand)
+                for interface in lsp.path['interfaces']:
+                    demand_shares = interface_demands.setdefault(interface, {})
+                    demand_shares[demand] = demand_shares.get(demand, 0.0) + traffic_per_lsp
+        else:
+            demand.path = [[interfaces[interface_id] for interface_id in hops] for hops in path]
+            deferred_demands.append(demand)
+
+    if simulated:
+        model._reverse_indexes = {'interface_demands': interface_demands,
+                                  'interface_lsps': interface_lsps,
+                                  'lsp_demands': lsp_demands,
+                                  'deferred_demands': deferred_demands}
+
+
+def load_snapshot(model_class, snapshot_file):
+    """
+    Reads a snapshot file into a new model
+
+    :param model_class: PerformanceModel or FlexModel (or a subclass); must
+    be of the same family as the class of the saved model
+    :param snapshot_file: path of the snapshot file
+    :return: model_class object, with the simulation results if they were saved
+    """
+    flags, body = _read_snapshot(snapshot_file)
+
+    if body['model_family'] != _model_family(model_class):
+        msg = "{} holds a {}; it cannot be loaded as a {}".format(snapshot_file, body['model_family'],
+                                                                  model_class.__name__)
+        raise ModelException(msg)
+
+    model = model_class(set(), set(), set(), set())
+    settings = body['settings']
+    model.routing_engine = settings['routing_engine']
+    model.traffic_propagation = settings['traffic_propagation']
+    model.lsp_rerouting = settings['lsp_rerouting']
+
+    columns = body['srlgs']
+    srlgs = []
+    for name, failed, failure_probability in zip(columns['name'], columns['failed'], columns['failure_probability']):
+        srlg = SRLG(name, model)
+        srlg._failed = failed
+        srlg._failure_probability = failure_probability
+        srlgs.append(srlg)
+        model.srlg_objects.add(srlg)
+
+    columns = body['nodes']
+    nodes = []
+    for name, lat, lon, failed, failure_probability, srlg_ids in zip(
+            columns['name'], columns['lat'], columns['lon'], columns['failed'], columns['failure_probability'],
+            columns['srlgs']):
+        node = Node(name, lat, lon)
+        node._failed = failed
+        node._failure_probability = failure_probability
+        node._srlgs = set(srlgs[srlg_id] for srlg_id in srlg_ids)
+        nodes.append(node)
+
+    columns = body['interfaces']
+    interfaces = []
+    for (name, node_id, remote_node_id, cost, capacity, circuit_id, rsvp_enabled, percent_reservable_bandwidth,
+         failed, failure_probability, srlg_ids) in zip(
+            columns['name'], columns['node'], columns['remote_node'], columns['cost'], columns['capacity'],
+            columns['circuit_id'], columns['rsvp_enabled'], columns['percent_reservable_bandwidth'],
+            columns['failed'], columns['failure_probability'], columns['srlgs']):
+        interface = Interface(name, cost, capacity, nodes[node_id], nodes[remote_node_id], circuit_id,
+                              rsvp_enabled, percent_reservable_bandwidth)
+        interface._failed = failed
+        interface._failure_probability = failure_probability
+        interface._srlgs = set(srlgs[srlg_id] for srlg_id in srlg_ids)
+        interfaces.append(interface)
+
+    columns = body['demands']
+    demands = [Demand(nodes[source], nodes[dest], traffic, name)
+               for source, dest, traffic, name in zip(columns['source'], columns['dest'], columns['traffic'],
+                                                      columns['name'])]
+
+    columns = body['lsps']
+    lsps = [RSVP_LSP(nodes[source], nodes[dest], name, configured_setup_bandwidth)
+            for source, dest, name, configured_setup_bandwidth in zip(
+                columns['source'], columns['dest'], columns['name'], columns['configured_setup_bandwidth'])]
+
+    model.node_objects = set(nodes)
+    model.interface_objects = set(interfaces)
+    model.demand_objects = set(demands)
+    model.rsvp_lsp_objects = set(lsps)
+
+    if flags & SIMULATION:
+        _restore_simulation(model, body['simulation'], interfaces, demands, lsps, bool(flags & SIMULATED))
+
+    return model
@@ -0,0 +1,289 @@
+"""
+SQLite store of a model and its simulation results.
+
+model.save_sqlite_store writes the model into a local SQLite database with
+indexed tables, and SQLiteStore answers questions about the simulated
+model from the database, without the model in memory::
+
+    model.update_simulation()
+    model.save_sqlite_store('model.db')
+
+    with SQLiteStore('model.db') as store:
+        store.interfaces_over(80)
+        store.demands_on_interface('A-to-B', 'A')
+        store.lsps_from_node('A')
+
+Tables:
+
+- nodes: node_id, name, lat, lon, failed
+- interfaces: interface_id, name, node_id, remote_node_id, circuit_id,
+  cost, capacity, rsvp_enabled, percent_reservable_bandwidth, failed,
+  traffic, utilization, reserved_bandwidth; traffic and utilization are
+  NULL for failed Interfaces
+- demands: demand_id, source_id, dest_id, name, traffic, routed
+- lsps: lsp_id, source_id, dest_id, name, configured_setup_bandwidth,
+  setup_bandwidth, reserved_bandwidth, routed
+- lsp_paths: lsp_id, hop, interface_id; the Interfaces of each routed LSP
+  in path order
+- demand_lsps: demand_id, lsp_id; the LSPs carrying each Demand
+- demand_interfaces: demand_id, interface_id, traffic; how much of each
+  Demand's traffic egresses each Interface
+- metadata: key, value; format_version and model_family
+"""
+
+import sqlite3
+
+from .exceptions import ModelException
+from .routing_matrix import RoutingMatrix
+from .rsvp import RSVP_LSP
+from .snapshot import _model_family
+
+FORMAT_VERSION = 1
+
+SCHEMA = """
+DROP TABLE IF EXISTS metadata;
+DROP TABLE IF EXISTS demand_interfaces;
+DROP TABLE IF EXISTS demand_lsps;
+DROP TABLE IF EXISTS lsp_paths;
+DROP TABLE IF EXISTS lsps;
+DROP TABLE IF EXISTS demands;
+DROP TABLE IF EXISTS interfaces;
+DROP TABLE IF EXISTS nodes;
+
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE nodes (node_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, lat REAL, lon REAL,
+                    failed INTEGER);
+CREATE TABLE interfaces (interface_id INTEGER PRIMARY KEY, name TEXT NOT NULL, node_id INTEGER NOT NULL,
+                         remote_node_id INTEGER NOT NULL, circuit_id TEXT, cost INTEGER, capacity REAL,
+                         rsvp_enabled INTEGER, percent_reservable_bandwidth REAL, failed INTEGER, traffic REAL,
+                         utilization REAL, reserved_bandwidth REAL, UNIQUE (node_id, name));
+CREATE INDEX interfaces_utilization ON interfaces (utilization);
+CREATE TABLE demands (demand_id INTEGER PRIMARY KEY, source_id INTEGER NOT NULL, dest_id INTEGER NOT NULL,
+                      name TEXT NOT NULL, traffic REAL, routed INTEGER, UNIQUE (source_id, dest_id, name));
+CREATE INDEX demands_dest ON demands (dest_id);
+CREATE TABLE lsps (lsp_id INTEGER PRIMARY KEY, source_id INTEGER NOT NULL, dest_id INTEGER NOT NULL,
+                   name TEXT NOT NULL, configured_setup_bandwidth REAL, setup_bandwidth REAL,
+                   reserved_bandwidth REAL, routed INTEGER, UNIQUE (source_id, dest_id, name));
+CREATE INDEX lsps_dest ON lsps (dest_id);
+CREATE TABLE lsp_paths (lsp_id INTEGER NOT NULL, hop INTEGER NOT NULL, interface_id INTEGER NOT NULL,
+                        PRIMARY KEY (lsp_id, hop));
+CREATE INDEX lsp_paths_interface ON lsp_paths (interface_id);
+CREATE TABLE demand_lsps (demand_id INTEGER NOT NULL, lsp_id INTEGER NOT NULL, PRIMARY KEY (demand_id, lsp_id));
+CREATE INDEX demand_lsps_lsp ON demand_lsps (lsp_id);
+CREATE TABLE demand_interfaces (demand_id INTEGER NOT NULL, interface_id INTEGER NOT NULL, traffic REAL,
+                                PRIMARY KEY (demand_id, interface_id));
+CREATE INDEX demand_interfaces_interface ON demand_interfaces (interface_id);
+"""
+
+
+def _number(value):
+    """
+    Returns value if it is a number, otherwise None; unrouted LSPs have
+    text in their bandwidth attributes
+    """
+    return value if isinstance(value, (int, float)) else None
+
+
+def save_sqlite_store(model, db_file):
+    """
+    Writes model and its simulation results to a SQLite database, replacing
+    the tables of an earlier save
+
+    :param model: PerformanceModel or FlexModel object; run
+    update_simulation() on it first
+    :param db_file: path of the SQLite database file
+    """
+    routing = RoutingMatrix.from_model(model)
+    nodes = sorted(model.node_objects, key=lambda node: node.name)
+    node_ids = {node.name: node_id for node_id, node in enumerate(nodes)}
+    interface_ids = {interface: interface_id for interface_id, interface in enumerate(routing.interfaces)}
+    lsps = sorted(model.rsvp_lsp_objects, key=lambda lsp: lsp._key)
+    lsp_ids = {lsp: lsp_id for lsp_id, lsp in enumerate(lsps)}
+    routed_lsps = [lsp for lsp in lsps if 'Unrouted' not in lsp.path]
+
+    connection = sqlite3.connect(db_file)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany('INSERT INTO metadata VALUES (?, ?)',
+                                   [('format_version', str(FORMAT_VERSION)),
+                                    ('model_family', _model_family(type(model)))])
+            connection.executemany('INSERT INTO nodes VALUES (?, ?, ?, ?, ?)',
+                                   ((node_id, node.name, node.lat, node.lon, node.failed)
+                                    for node_id, node in enumerate(nodes)))
+            connection.executemany(
+                'INSERT INTO interfaces VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((interface_id, interface.name, node_ids[interface.node_object.name],
+                  node_ids[interface.remote_node_object.name],
+                  None if interface.circuit_id is None else str(interface.circuit_id), interface.cost,
+                  interface.capacity, interface.rsvp_enabled, interface.percent_reservable_bandwidth,
+                  interface.failed, None if interface.failed else interface.traffic,
+                  None if interface.failed else interface.utilization, interface.reserved_bandwidth)
+                 for interface_id, interface in enumerate(routing.interfaces)))
+            connection.executemany('INSERT INTO demands VALUES (?, ?, ?, ?, ?, ?)',
+                                   ((demand_id, node_ids[demand.source_node_object.name],
+                                     node_ids[demand.dest_node_object.name], demand.name, demand.traffic,
+                                     demand._routed)
+                                    for demand_id, demand in enumerate(routing.demands)))
+            connection.executemany('INSERT INTO lsps VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                   ((lsp_id, node_ids[lsp.source_node_object.name],
+                                     node_ids[lsp.dest_node_object.name], lsp.lsp_name,
+                                     lsp.configured_setup_bandwidth, _number(lsp.setup_bandwidth),
+                                     _number(lsp.reserved_bandwidth),
+                                     'Unrouted' not in lsp.path)
+                                    for lsp_id, lsp in enumerate(lsps)))
+            connection.executemany('INSERT INTO lsp_paths VALUES (?, ?, ?)',
+                                   ((lsp_ids[lsp], hop, interface_ids[interface])
+                                    for lsp in routed_lsps
+                                    for hop, interface in enumerate(lsp.path['interfaces'])))
+            connection.executemany('INSERT INTO demand_lsps VALUES (?, ?)',
+                                   ((demand_id, lsp_ids[lsp])
+                                    for demand_id, demand in enumerate(routing.demands)
+                                    if demand._routed and not demand._igp_routed
+                                    for lsp in demand.path if isinstance(lsp, RSVP_LSP)))
+            connection.executemany('INSERT INTO demand_interfaces VALUES (?, ?, ?)',
+                                   ((demand_id, routing.row_ids[position],
+                                     routing.fractions[position] * demand.traffic)
+                                    for demand_id, demand in enumerate(routing.demands)
+                                    for position in range(routing.column_offsets[demand_id],
+                                                          routing.column_offsets[demand_id + 1])))
+    finally:
+        connection.close()
+
+
+class SQLiteStore(object):
+    """
+    Queries a model saved by save_sqlite_store (or model.save_sqlite_store).
+
+    Query helpers return lists of dicts of column name: value; query runs
+    any SELECT against the tables described in the module docstring.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file)
+        self.connection.row_factory = sqlite3.Row
+        try:
+            metadata = dict(self.connection.execute('SELECT key, value FROM metadata').fetchall())
+        except sqlite3.DatabaseError as error:
+            self.connection.close()
+            raise ModelException("{} is not a model SQLite store: {}".format(db_file, error))
+        if int(metadata['format_version']) > FORMAT_VERSION:
+            self.connection.close()
+            msg = "{} is SQLite store format version {}; this version of pyNTM reads up to version {}".format(
+                db_file, metadata['format_version'], FORMAT_VERSION)
+            raise ModelException(msg)
+        self.model_family = metadata['model_family']
+
+    def __repr__(self):
+        return 'SQLiteStore(%r)' % self.db_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def query(self, sql, parameters=()):
+        """
+        Runs sql with parameters and returns its rows
+
+        :param sql: SQL statement
+        :param parameters: values for the statement's placeholders
+        :return: list of dicts of column name: value
+        """
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def _interface_id(self, interface_name, node_name):
+        row = self.connection.execute('SELECT interface_id FROM interfaces JOIN nodes USING (node_id) '
+                                      'WHERE nodes.name = ? AND interfaces.name = ?',
+                                      (node_name, interface_name)).fetchone()
+        if row is None:
+            raise ModelException('specified interface does not exist')
+        return row[0]
+
+    def _node_id(self, node_name):
+        row = self.connection.execute('SELECT node_id FROM nodes WHERE name = ?', (node_name,)).fetchone()
+        if row is None:
+            raise ModelException('No node with name %s exists in the model' % node_name)
+        return row[0]
+
+    def interfaces_over(self, utilization):
+        """
+        Returns the Interfaces with a utilization above utilization percent,
+        busiest first
+
+        :param utilization: utilization percent, such as 80
+        :return: list of dicts with the name, node, remote_node, capacity,
+        traffic and utilization of each Interface
+        """
+        return self.query('SELECT interfaces.name AS name, local.name AS node, remote.name AS remote_node, '
+                          'capacity, traffic, utilization FROM interfaces '
+                          'JOIN nodes AS local ON local.node_id = interfaces.node_id '
+                          'JOIN nodes AS remote ON remote.node_id = interfaces.remote_node_id '
+                          'WHERE utilization > ? ORDER BY utilization DESC', (utilization,))
+
+    def demands_on_interface(self, interface_name, node_name):
+        """
+        Returns the Demands that egress the Interface named interface_name
+        on node_name
+
+        :param interface_name: name of the Interface
+        :param node_name: name of the Interface's Node
+        :return: list of dicts with the source, dest, name and traffic of each
+        Demand and traffic_on_interface, how much of its traffic egresses the
+        Interface
+        """
+        interface_id = self._interface_id(interface_name, node_name)
+        return self.query('SELECT source.name AS source, dest.name AS dest, demands.name AS name, '
+                          'demands.traffic AS traffic, demand_interfaces.traffic AS traffic_on_interface '
+                          'FROM demand_interfaces JOIN demands USING (demand_id) '
+                          'JOIN nodes AS source ON source.node_id = demands.source_id '
+                          'JOIN nodes AS dest ON dest.node_id = demands.dest_id '
+                          'WHERE interface_id = ? ORDER BY source.name, dest.name, demands.name', (interface_id,))
+
+    def lsps_on_interface(self, interface_name, node_name):
+        """
+        Returns the RSVP LSPs routed over the Interface named interface_name
+        on node_name
+
+        :param interface_name: name of the Interface
+        :param node_name: name of the Interface's Node
+        :return: list of dicts with the source, dest, name and
+        reserved_bandwidth of each LSP
+        """
+        interface_id = self._interface_id(interface_name, node_name)
+        return self.query('SELECT source.name AS source, dest.name AS dest, lsps.name AS name, reserved_bandwidth '
+                          'FROM lsp_paths JOIN lsps USING (lsp_id) '
+                          'JOIN nodes AS source ON source.node_id = lsps.source_id '
+                          'JOIN nodes AS dest ON dest.node_id = lsps.dest_id '
+                          'WHERE interface_id = ? ORDER BY source.name, dest.name, lsps.name', (interface_id,))
+
+    def lsps_from_node(self, node_name):
+        """
+        Returns the RSVP LSPs that start at node_name
+
+        :param node_name: name of the source Node
+        :return: list of dicts with the source, dest, name, setup_bandwidth,
+        reserved_bandwidth and routed (0 or 1) of each LSP
+        """
+        node_id = self._node_id(node_name)
+        return self.query('SELECT source.name AS source, dest.name AS dest, lsps.name AS name, setup_bandwidth, '
+                          'reserved_bandwidth, routed FROM lsps '
+                          'JOIN nodes AS source ON source.node_id = lsps.source_id '
+                          'JOIN nodes AS dest ON dest.node_id = lsps.dest_id '
+                          'WHERE source_id = ? ORDER BY dest.name, lsps.name', (node_id,))
+
+    def unrouted_demands(self):
+        """
+        Returns the Demands the simulation could not route
+
+        :return: list of dicts with the source, dest, name and traffic of each Demand
+        """
+        return self.query('SELECT source.name AS source, dest.name AS dest, demands.name AS name, traffic '
+                          'FROM demands JOIN nodes AS source ON source.node_id = demands.source_id '
+                          'JOIN nodes AS dest ON dest.node_id = demands.dest_id '
+                          'WHERE NOT routed ORDER BY source.name, dest.name, demands.name')
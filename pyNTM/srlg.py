@@ -1,4 +1,5 @@
 """A Class to represent Shared Risk Link Groups (SRLGs) in a Model"""
+from .change_tracking import record_change
 from .exceptions import ModelException
 
 
@@ -24,11 +25,17 @@ class SRLG(object):
             self.name = name
             self.model = model
             self._failed = False
+            self._failure_probability = 0
             model.srlg_objects.add(self)
 
     def __repr__(self):
         return "SRLG(Name: {})".format(self.name)
 
+    @property
+    def _tracker(self):
+        """ChangeTracker of the model holding the SRLG"""
+        return self.model._tracker
+
     @property
     def failed(self):
         return self._failed
@@ -36,10 +43,22 @@ class SRLG(object):
     @failed.setter
     def failed(self, status):
         if isinstance(status, bool):
+            record_change(self, '_failed', self._failed)
             self._failed = status
         else:
             raise ModelException('must be boolean')
 
+    @property
+    def failure_probability(self):
+        """Probability that the SRLG is failed, for Monte Carlo failure simulation"""
+        return self._failure_probability
+
+    @failure_probability.setter
+    def failure_probability(self, probability):
+        if not 0 <= probability <= 1:
+            raise ModelException("failure_probability must be between 0 and 1")
+        self._failure_probability = probability
+
     @property
     def node_objects(self):
         nodes = set([node for node in self.model.node_objects if self in node.srlgs])
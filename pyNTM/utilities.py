@@ -10,3 +10,35 @@ def find_end_index(start_index, lines):
             end_index = lines.index(line, start_index)
             break
     return end_index
+
+
+def read_model_tables(data_file):
+    """
+    Reads a model data file line by line.  Each table in the file is a
+    title line and a header line followed by data lines up to the first
+    line that contains only ''; RSVP_LSP_TABLE runs to the end of the file
+    or to an SRLG_TABLE title line, and SRLG_TABLE runs to the end of the
+    file.
+
+    :param data_file: path of the model data file
+    :return: generator of (table, line_index, line) for each data line;
+    table counts the tables from 0 (0 is INTERFACES_TABLE, 1 NODES_TABLE,
+    2 DEMANDS_TABLE, 3 RSVP_LSP_TABLE and 4 SRLG_TABLE) and line_index
+    counts the lines of the file from 0
+    """
+    table = 0
+    skip_lines = 2  # title and header lines of the table
+    with open(data_file, 'r') as f:
+        for line_index, line in enumerate(f):
+            line = line.rstrip('\r\n')
+            if skip_lines > 0:
+                skip_lines -= 1
+            elif line == '':
+                if table < 3:
+                    table += 1
+                    skip_lines = 2
+            elif table == 3 and line.strip() == 'SRLG_TABLE':
+                table = 4
+                skip_lines = 1  # header line
+            else:
+                yield table, line_index, line
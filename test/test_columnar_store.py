@@ -0,0 +1,89 @@
+import math
+import os
+import tempfile
+import unittest
+
+from pyNTM import ColumnarStore
+from pyNTM import FlexModel
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+
+
+class TestColumnarStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.model = FlexModel.load_model_file('test/parallel_link_model_w_lsps.csv')
+        self.model.fail_interface('A-to-B_2', 'A')
+        self.model.update_simulation()
+        self.routing = self.model.routing_matrix()
+        self.directory = tempfile.mkdtemp()
+        self.store_file = os.path.join(self.directory, 'model.columns')
+        self.model.save_columnar_store(self.store_file)
+        self.store = ColumnarStore(self.store_file)
+
+    @classmethod
+    def tearDownClass(self):
+        self.store.close()
+        os.remove(self.store_file)
+        os.rmdir(self.directory)
+
+    def test_counts(self):
+        self.assertEqual(self.store.node_count, len(self.model.node_objects))
+        self.assertEqual(self.store.interface_count, len(self.model.interface_objects))
+        self.assertEqual(self.store.demand_count, len(self.model.demand_objects))
+
+    def test_interface_columns(self):
+        utilization = self.store.column('interface_utilization')
+        for interface_id, interface in enumerate(self.routing.interfaces):
+            self.assertEqual(self.store.string('interface_name', interface_id), interface.name)
+            if interface.failed:
+                self.assertTrue(math.isnan(utilization[interface_id]))
+            else:
+                self.assertEqual(utilization[interface_id], interface.utilization)
+
+    def test_interface_view(self):
+        interface = self.model.get_interface_object('A-to-B', 'A')
+        view = self.store.interface(self.store.interface_id('A-to-B', 'A'))
+        self.assertEqual(view, interface)
+        self.assertEqual(view.traffic, interface.traffic)
+        self.assertEqual(view.reserved_bandwidth, interface.reserved_bandwidth)
+        self.assertIs(view, self.store.interface(self.store.interface_id('A-to-B', 'A')))
+
+        failed_view = self.store.interface(self.store.interface_id('A-to-B_2', 'A'))
+        self.assertTrue(failed_view.failed)
+        self.assertEqual(failed_view.traffic, 'Down')
+
+        with self.assertRaises(ModelException):
+            self.store.interface_id('A-to-Z', 'A')
+
+    def test_demand_view_and_routing(self):
+        demand = self.model.get_demand_object('A', 'D', 'dmd_a_d_1')
+        demand_id = self.store.demand_id('A', 'D', 'dmd_a_d_1')
+        view = self.store.demand(demand_id)
+        self.assertEqual((view.source_node_object.name, view.dest_node_object.name, view.traffic),
+                         ('A', 'D', demand.traffic))
+        self.assertEqual({self.routing.interfaces[interface_id]: fraction
+                          for interface_id, fraction in self.store.demand_routing(demand_id)},
+                         self.routing._demand_fractions(demand))
+
+    def test_bad_file(self):
+        bad_file = os.path.join(self.directory, 'bad.columns')
+        with open(bad_file, 'wb') as f:
+            f.write(b'not a columnar store')
+        with self.assertRaises(ModelException):
+            ColumnarStore(bad_file)
+        os.remove(bad_file)
+
+    def test_performance_model(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        store_file = os.path.join(self.directory, 'igp.columns')
+        model.save_columnar_store(store_file)
+        with ColumnarStore(store_file) as store:
+            traffic = store.column('interface_traffic')
+            for interface_id in range(store.interface_count):
+                interface = store.interface(interface_id)
+                self.assertEqual(traffic[interface_id],
+                                 model.get_interface_object(interface.name, interface.node_object.name).traffic)
+            del traffic
+        os.remove(store_file)
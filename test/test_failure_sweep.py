@@ -0,0 +1,99 @@
+import unittest
+
+from pyNTM import FailureSweep
+from pyNTM import FlexModel
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+
+
+class TestFailureSweep(unittest.TestCase):
+
+    def _fail(self, model, scenario, fail=True):
+        for element in scenario:
+            if element[0] == 'circuit':
+                if fail:
+                    model.fail_interface(element[1], element[2])
+                else:
+                    model.unfail_interface(element[1], element[2])
+            elif element[0] == 'node':
+                if fail:
+                    model.fail_node(element[1])
+                else:
+                    model.unfail_node(element[1])
+            elif fail:
+                model.fail_srlg(element[1])
+            else:
+                model.unfail_srlg(element[1])
+
+    def test_matches_full_simulation(self):
+        for model_class, model_file in ((PerformanceModel, 'test/igp_routing_topology.csv'),
+                                        (FlexModel, 'test/parallel_link_model_test_topology_igp_only.csv')):
+            model = model_class.load_model_file(model_file)
+            model.update_simulation()
+            sweep = FailureSweep(model)
+
+            for scenario in sweep.scenarios(('circuit', 'node'), max_failures=2):
+                results = sweep.run_scenario(scenario)
+
+                self._fail(model, scenario)
+                model.update_simulation()
+                for interface in model.interface_objects:
+                    self.assertAlmostEqual(results['utilization'][interface], interface.utilization, places=1)
+                self.assertEqual(set(results['unrouted_demands']),
+                                 set(demand for demand in model.demand_objects if demand.path == 'Unrouted'))
+                self._fail(model, scenario, fail=False)
+                model.update_simulation()
+
+    def test_srlg_scenario(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        model.add_srlg('srlg_b_d')
+        model.get_interface_object('B-to-D', 'B').add_to_srlg('srlg_b_d', model)
+        model.get_interface_object('C-to-D', 'C').add_to_srlg('srlg_b_d', model)
+
+        sweep = model.failure_sweep(scenarios=[(('srlg', 'srlg_b_d'),)])
+        worst = sweep['scenarios'][(('srlg', 'srlg_b_d'),)]
+
+        model.fail_srlg('srlg_b_d')
+        model.update_simulation()
+        max_utilization = max(interface.utilization for interface in model.interface_objects
+                              if not interface.failed)
+        self.assertAlmostEqual(worst['max_utilization'], max_utilization, places=1)
+
+    def test_model_restored(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        sweep = FailureSweep(model)
+        utilization = {interface: interface.utilization for interface in model.interface_objects}
+        reserved_bandwidth = {interface: interface.reserved_bandwidth for interface in model.interface_objects}
+        lsp_paths = {lsp: lsp.path for lsp in model.rsvp_lsp_objects}
+
+        sweep.run(sweep.scenarios(max_failures=2))
+
+        self.assertFalse(any(interface.failed for interface in model.interface_objects))
+        self.assertFalse(any(node.failed for node in model.node_objects))
+        self.assertEqual(model.lsp_rerouting, 'full')
+        self.assertEqual({interface: interface.utilization for interface in model.interface_objects}, utilization)
+        self.assertEqual({interface: interface.reserved_bandwidth for interface in model.interface_objects},
+                         reserved_bandwidth)
+        self.assertEqual({lsp: lsp.path for lsp in model.rsvp_lsp_objects}, lsp_paths)
+
+    def test_worst_case(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_w_lsps.csv')
+        sweep = model.failure_sweep(element_types=('circuit',))
+        self.assertEqual(len(sweep['scenarios']), len(model.circuit_objects))
+
+        for scenario, results in sweep['scenarios'].items():
+            worst = sweep['interfaces'][results['interface']]
+            self.assertGreaterEqual(worst['max_utilization'], results['max_utilization'])
+            self.assertLessEqual(worst['max_utilization'],
+                                 sweep['scenarios'][worst['scenario']]['max_utilization'])
+
+    def test_bad_element_type(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+
+        with self.assertRaises(ModelException):
+            model.failure_sweep(element_types=('link',))
+        with self.assertRaises(ModelException):
+            model.failure_sweep(scenarios=[(('link', 'A'),)])
+        self.assertFalse(any(interface.failed for interface in model.interface_objects))
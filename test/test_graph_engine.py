@@ -0,0 +1,157 @@
+import random
+import unittest
+
+from pyNTM import FlexModel
+from pyNTM import GraphEngine
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+from pyNTM.graph_engine import dag_paths, ecmp_splits
+
+
+class TestGraphEngine(unittest.TestCase):
+
+    def _routing_results(self, model):
+        demand_paths = {}
+        for demand in model.demand_objects:
+            if demand.path == 'Unrouted':
+                demand_paths[demand.name] = 'Unrouted'
+            else:
+                demand_paths[demand.name] = sorted(tuple(interface._key for interface in path)
+                                                   if isinstance(path, list) else path.lsp_name
+                                                   for path in demand.path)
+        interface_traffic = {interface._key: interface.traffic for interface in model.interface_objects}
+        return demand_paths, interface_traffic
+
+    def _assert_engines_match(self, model_class, model_file, failed_interface=None):
+        results = []
+        for routing_engine in ('networkx', 'native'):
+            # Make the random tie-break between equal RSVP LSP paths repeatable
+            random.seed(1)
+            model = model_class.load_model_file(model_file)
+            model.routing_engine = routing_engine
+            if failed_interface is not None:
+                model.update_simulation()
+                model.fail_interface(*failed_interface)
+            model.update_simulation()
+            results.append(self._routing_results(model))
+
+        self.assertEqual(results[0], results[1])
+
+    def test_performance_model_parity(self):
+        self._assert_engines_match(PerformanceModel, 'test/model_test_topology.csv')
+        self._assert_engines_match(PerformanceModel, 'test/igp_routing_topology.csv')
+
+    def test_performance_model_parity_failed_interface(self):
+        self._assert_engines_match(PerformanceModel, 'test/model_test_topology.csv',
+                                   failed_interface=('A-to-B', 'A'))
+
+    def test_flex_model_parity(self):
+        self._assert_engines_match(FlexModel, 'test/parallel_link_model_test_topology.csv')
+        self._assert_engines_match(FlexModel, 'test/parallel_link_model_w_lsps.csv')
+
+    def test_spf(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        engine = GraphEngine.from_model(model)
+
+        src = engine.node_ids['A']
+        dist, pred = engine.spf(src)
+
+        self.assertEqual(dist[engine.node_ids['F']], 50)
+        self.assertEqual(len(pred[engine.node_ids['D']]), 3)
+        self.assertEqual(pred[src], [])
+        for edge, tail in pred[engine.node_ids['D']]:
+            self.assertEqual(engine.interfaces[edge].remote_node_object.name, 'D')
+            self.assertEqual(engine.tails[edge], tail)
+
+    def test_dag_paths(self):
+        pred = {'A': [], 'B': [('a-b', 'A')], 'G': [('b-g', 'B')],
+                'D': [('a-d', 'A'), ('b-d', 'B'), ('g-d', 'G')], 'F': [('d-f', 'D')], 'E': [('a-e', 'A')]}
+
+        paths = dag_paths(pred, 'A', 'F')
+
+        self.assertEqual(paths, [['a-d', 'd-f'], ['a-b', 'b-d', 'd-f'], ['a-b', 'b-g', 'g-d', 'd-f']])
+        self.assertEqual(dag_paths(pred, 'A', 'X'), [])
+
+    def test_ecmp_splits(self):
+        pred = {'A': [], 'B': [('a-b', 'A')], 'G': [('b-g', 'B')],
+                'D': [('a-d', 'A'), ('b-d', 'B'), ('g-d', 'G')], 'F': [('d-f', 'D')], 'E': [('a-e', 'A')]}
+        dist = {'A': 0, 'B': 20, 'G': 30, 'D': 40, 'F': 50, 'E': 10}
+
+        splits = ecmp_splits(pred, dist, 'A', 'F')
+
+        self.assertEqual(splits, {'a-d': 0.5, 'a-b': 0.5, 'b-d': 0.25, 'b-g': 0.25, 'g-d': 0.25, 'd-f': 1.0})
+
+    def test_parallel_link_bundles_not_enumerated(self):
+        """
+        A demand over a chain of 4-way parallel link bundles has 4 ** hops
+        paths; the simulation splits traffic off the DAG and only enumerates
+        the paths when demand.path is read
+        """
+        model = FlexModel()
+        hops = 8
+        int_list = []
+        for hop in range(hops):
+            for link in range(4):
+                circuit_id = '{}_{}'.format(hop, link)
+                int_list.append({'name': 'n{}-n{}_{}'.format(hop, hop + 1, link), 'cost': 10, 'capacity': 100,
+                                 'node': 'n{}'.format(hop), 'remote_node': 'n{}'.format(hop + 1),
+                                 'circuit_id': circuit_id, 'failed': False})
+                int_list.append({'name': 'n{}-n{}_{}'.format(hop + 1, hop, link), 'cost': 10, 'capacity': 100,
+                                 'node': 'n{}'.format(hop + 1), 'remote_node': 'n{}'.format(hop),
+                                 'circuit_id': circuit_id, 'failed': False})
+        model.add_network_interfaces_from_list(int_list)
+        model.add_demand('n0', 'n{}'.format(hops), 80, 'dmd_chain')
+        model.update_simulation()
+
+        demand = model.get_demand_object('n0', 'n{}'.format(hops), 'dmd_chain')
+
+        self.assertIsNotNone(demand._path_generator)
+        for interface in model.interface_objects:
+            if interface.node_object.name < interface.remote_node_object.name:
+                self.assertEqual(interface.traffic, 20.0)
+            else:
+                self.assertEqual(interface.traffic, 0.0)
+
+    def test_cspf(self):
+        # A-B-D and A-C-D cost 20 in 2 hops; A-E-F-D costs 20 in 3 hops; A-D costs 30
+        node_names = ['A', 'B', 'C', 'D', 'E', 'F']
+        links = [(0, 1, 10, 50), (1, 3, 10, 50), (0, 2, 10, 50), (2, 3, 10, 100),
+                 (0, 4, 5, 100), (4, 5, 5, 100), (5, 3, 10, 100), (0, 3, 30, 100)]
+        engine = GraphEngine(node_names, [link[0] for link in links], [link[1] for link in links],
+                             [link[2] for link in links], [100] * len(links), [0] * len(links),
+                             [link[3] for link in links])
+
+        # Lowest cost, then fewest hops, then a random choice
+        random.seed(1)
+        paths = set(tuple(engine.cspf(0, 3, 10)) for _ in range(20))
+        self.assertEqual(paths, {(0, 1), (2, 3)})
+
+        # Interfaces short of the needed bandwidth are skipped
+        self.assertEqual(engine.cspf(0, 3, 60), [4, 5, 6])
+        engine.reservable[5] = 0
+        self.assertEqual(engine.cspf(0, 3, 60), [7])
+        self.assertIsNone(engine.cspf(0, 3, 200))
+
+    def test_lsp_placement_parity(self):
+        for model_class, model_file in ((PerformanceModel, 'test/model_test_topology.csv'),
+                                        (PerformanceModel, 'test/lsp_configured_setup_bw_model.csv'),
+                                        (FlexModel, 'test/parallel_link_model_w_lsps.csv'),
+                                        (FlexModel, 'test/traffic_eng_test_parallel_link_model.csv')):
+            results = []
+            for routing_engine in ('networkx', 'native'):
+                model = model_class.load_model_file(model_file)
+                model.routing_engine = routing_engine
+                model.update_simulation()
+                # Which LSP of a parallel group gets which path follows set iteration order
+                results.append(sorted((lsp._key[:2], lsp.reserved_bandwidth,
+                                       'Unrouted' if lsp.path == 'Unrouted' else
+                                       (lsp.path['path_cost'], len(lsp.path['interfaces'])))
+                                      for lsp in model.rsvp_lsp_objects))
+
+            self.assertEqual(results[0], results[1])
+
+    def test_bad_routing_engine(self):
+        model = PerformanceModel()
+
+        with self.assertRaises(ModelException):
+            model.routing_engine = 'bad_engine'
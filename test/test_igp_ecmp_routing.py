@@ -1,5 +1,8 @@
 import unittest
 
+import networkx as nx
+
+from pyNTM import FlexModel
 from pyNTM import PerformanceModel
 
 
@@ -74,3 +77,78 @@ class TestIGPRouting(unittest.TestCase):
         self.assertEqual(int_a_c.traffic, 0)
         self.assertEqual(int_c_d.traffic, 0)
         self.assertEqual(int_a_d.traffic, 20)
+
+    def test_demands_from_common_source(self):
+        """
+        Demands from the same source Node are routed from a single shared SPF
+        DAG; the resulting paths must match networkx.all_shortest_paths
+        """
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.add_demand('A', 'D', 30, 'dmd_a_d_1')
+        model.add_demand('A', 'G', 20, 'dmd_a_g_1')
+        model.add_demand('A', 'D', 10, 'dmd_a_d_2')
+        model.update_simulation()
+
+        G = model._make_weighted_network_graph(include_failed_circuits=False)
+
+        for demand in model.demand_objects:
+            nx_sp = nx.all_shortest_paths(G, demand.source_node_object.name, demand.dest_node_object.name,
+                                          weight='cost')
+            self.assertEqual(demand.path, model.convert_graph_path_to_model_path(nx_sp))
+
+    def _full_mesh_simulation(self, model_class, model_file, traffic_propagation, routing_engine):
+        model = model_class.load_model_file(model_file)
+        model.traffic_propagation = traffic_propagation
+        model.routing_engine = routing_engine
+        node_names = sorted(node.name for node in model.node_objects)
+        for source in node_names:
+            for dest in node_names:
+                if source != dest:
+                    model.add_demand(source, dest, 17, 'dmd_{}_{}'.format(source, dest))
+        model.update_simulation()
+        return model
+
+    @staticmethod
+    def _path_keys(demand):
+        if demand.path == 'Unrouted':
+            return 'Unrouted'
+        return sorted(tuple(interface._key for interface in path) for path in demand.path)
+
+    def _assert_propagation_modes_match(self, model_class, model_file):
+        for routing_engine in ('networkx', 'native'):
+            per_demand = self._full_mesh_simulation(model_class, model_file, 'per_demand', routing_engine)
+            per_dest = self._full_mesh_simulation(model_class, model_file, 'per_destination', routing_engine)
+
+            # per_demand rounds each demand's traffic per Interface to 1 decimal place
+            tolerance = 0.05 * len(per_demand.demand_objects)
+            for interface in per_demand.interface_objects:
+                per_dest_interface = per_dest.get_interface_object(interface.name, interface.node_object.name)
+                self.assertAlmostEqual(interface.traffic, per_dest_interface.traffic, delta=tolerance)
+                self.assertEqual(set(dmd._key for dmd in interface.demands(per_demand)),
+                                 set(dmd._key for dmd in per_dest_interface.demands(per_dest)))
+
+            for demand in per_demand.demand_objects:
+                per_dest_demand = per_dest.get_demand_object(demand.source_node_object.name,
+                                                             demand.dest_node_object.name, demand.name)
+                self.assertEqual(self._path_keys(demand), self._path_keys(per_dest_demand))
+
+    def test_per_destination_traffic_propagation(self):
+        self._assert_propagation_modes_match(PerformanceModel, 'test/igp_routing_topology.csv')
+
+    def test_per_destination_traffic_propagation_parallel_links(self):
+        self._assert_propagation_modes_match(FlexModel, 'test/parallel_link_model_test_topology_igp_only.csv')
+
+    def test_per_destination_ecmp_traffic(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.traffic_propagation = 'per_destination'
+        model.add_demand('B', 'F', 20, 'dmd_b_f_1')
+        model.update_simulation()
+
+        # dmd_a_f_1 (40) splits 2 ways at A; B then splits its 20 from A plus
+        # the 20 from dmd_b_f_1 2 ways
+        self.assertEqual(model.get_interface_object('A-to-B', 'A').traffic, 20)
+        self.assertEqual(model.get_interface_object('A-to-D', 'A').traffic, 20)
+        self.assertEqual(model.get_interface_object('B-to-D', 'B').traffic, 20)
+        self.assertEqual(model.get_interface_object('B-to-G', 'B').traffic, 20)
+        self.assertEqual(model.get_interface_object('G-to-D', 'G').traffic, 20)
+        self.assertEqual(model.get_interface_object('D-to-F', 'D').traffic, 60)
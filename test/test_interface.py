@@ -290,3 +290,37 @@ class TestInterface(unittest.TestCase):
         self.assertTrue(dmd_a_d_1 in int_a_b.demands(model))
         self.assertTrue(dmd_a_d_2 in int_a_b.demands(model))
         self.assertTrue(dmd_a_f_1 in int_a_b.demands(model))
+
+    def test_traffic_per_demand(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        int_a_b = model.get_interface_object('A-to-B', 'A')
+
+        traffic_per_demand = int_a_b.traffic_per_demand(model)
+
+        self.assertEqual(set(traffic_per_demand), set(int_a_b.demands(model)))
+        self.assertAlmostEqual(sum(traffic_per_demand.values()), int_a_b.traffic)
+
+    def test_reverse_indexes_match_scan(self):
+        for traffic_propagation in ('per_demand', 'per_destination'):
+            model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+            model.traffic_propagation = traffic_propagation
+            model.update_simulation()
+
+            indexed = {}
+            for interface in model.interface_objects:
+                indexed[interface] = (set(interface.demands(model)), set(interface.lsps(model)),
+                                      interface.traffic_per_demand(model))
+            indexed_lsps = {lsp: set(lsp.demands_on_lsp(model)) for lsp in model.rsvp_lsp_objects}
+
+            # Without the reverse indexes the query methods scan the model
+            model._reverse_indexes = None
+            for interface in model.interface_objects:
+                self.assertEqual(indexed[interface][0], set(interface.demands(model)))
+                self.assertEqual(indexed[interface][1], set(interface.lsps(model)))
+                scanned = interface.traffic_per_demand(model)
+                self.assertEqual(set(indexed[interface][2]), set(scanned))
+                for demand, traffic in scanned.items():
+                    self.assertAlmostEqual(indexed[interface][2][demand], traffic)
+            for lsp in model.rsvp_lsp_objects:
+                self.assertEqual(indexed_lsps[lsp], set(lsp.demands_on_lsp(model)))
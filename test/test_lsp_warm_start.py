@@ -0,0 +1,95 @@
+import unittest
+
+from pyNTM import FlexModel
+from pyNTM import GraphEngine
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+
+
+class TestLSPWarmStart(unittest.TestCase):
+
+    def _lsp_results(self, model):
+        # Which LSP of a parallel group gets which path follows set iteration order
+        return sorted((lsp._key[:2], lsp.reserved_bandwidth,
+                       'Unrouted' if lsp.path == 'Unrouted' else
+                       (lsp.path['path_cost'], len(lsp.path['interfaces'])))
+                      for lsp in model.rsvp_lsp_objects)
+
+    def _count_cspf_runs(self, model):
+        """
+        Runs update_simulation on model and returns how many LSPs were placed with GraphEngine.cspf
+        """
+        calls = []
+        cspf = GraphEngine.cspf
+
+        def counting_cspf(engine, *args):
+            calls.append(args)
+            return cspf(engine, *args)
+
+        GraphEngine.cspf = counting_cspf
+        try:
+            model.update_simulation()
+        finally:
+            GraphEngine.cspf = cspf
+        return len(calls)
+
+    def _assert_matches_cold_run(self, model):
+        warm_results = self._lsp_results(model)
+        model.lsp_rerouting = 'full'
+        model.update_simulation()
+        self.assertEqual(warm_results, self._lsp_results(model))
+        model.lsp_rerouting = 'incremental'
+
+    def test_failed_interface_matches_cold_run(self):
+        for model_class, model_file, failures in (
+                (PerformanceModel, 'test/model_test_topology.csv', [('A-to-B', 'A'), ('B-to-D', 'B')]),
+                (FlexModel, 'test/parallel_link_model_w_lsps.csv', [('A-to-B_2', 'A'), ('B-to-E', 'B')])):
+            model = model_class.load_model_file(model_file)
+            model.lsp_rerouting = 'incremental'
+            model.update_simulation()
+
+            for interface_name, node_name in failures:
+                model.update_simulation()  # Warm start the next run from an incremental run
+                model.fail_interface(interface_name, node_name)
+                model.update_simulation()
+                self._assert_matches_cold_run(model)
+
+    def test_unaffected_lsps_keep_paths(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.lsp_rerouting = 'incremental'
+        self.assertEqual(self._count_cspf_runs(model), len(model.rsvp_lsp_objects))
+
+        # Nothing changed; no LSP needs a new path
+        self.assertEqual(self._count_cspf_runs(model), 0)
+
+        # The A to D LSPs do not cross E-to-A
+        lsps_a_d = [model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1'), model.get_rsvp_lsp('A', 'D', 'lsp_a_d_2')]
+        paths_a_d = [lsp.path['interfaces'] for lsp in lsps_a_d]
+        model.fail_interface('E-to-A', 'E')
+        self.assertEqual(self._count_cspf_runs(model), 0)
+        self.assertEqual([lsp.path['interfaces'] for lsp in lsps_a_d], paths_a_d)
+
+    def test_demand_change_reroutes_group(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.lsp_rerouting = 'incremental'
+        model.update_simulation()
+
+        model.get_demand_object('A', 'D', 'dmd_a_d_1').traffic = 20
+        self.assertEqual(self._count_cspf_runs(model), 2)
+        self._assert_matches_cold_run(model)
+
+    def test_restored_interface_runs_cold(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.lsp_rerouting = 'incremental'
+        model.update_simulation()
+        model.fail_interface('A-to-B', 'A')
+        model.update_simulation()
+
+        model.unfail_interface('A-to-B', 'A')
+        self.assertEqual(self._count_cspf_runs(model), len(model.rsvp_lsp_objects))
+
+    def test_bad_lsp_rerouting(self):
+        model = PerformanceModel()
+
+        with self.assertRaises(ModelException):
+            model.lsp_rerouting = 'bad_mode'
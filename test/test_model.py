@@ -1,6 +1,11 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 
 from pyNTM import Circuit
+from pyNTM import FlexModel
 from pyNTM import Interface
 from pyNTM import PerformanceModel
 from pyNTM import Model
@@ -448,3 +453,515 @@ class TestModel(unittest.TestCase):
         """
         model = Model.load_model_file('test/model_test_topology.csv')
         self.assertEqual(model.__repr__(), 'PerformanceModel(Interfaces: 18, Nodes: 7, Demands: 4, RSVP_LSPs: 3)')
+
+    def test_lookup_index_direct_set_changes(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        node_a = model.get_node_object('A')
+        self.assertEqual(len(model.get_node_interfaces('A')), len(node_a.interfaces(model)))
+
+        # Objects added straight to the object sets are found
+        node_x = Node('X')
+        model.node_objects.add(node_x)
+        int_a_x = Interface('A-to-X', 10, 100, node_a, node_x, 99)
+        model.interface_objects.add(int_a_x)
+
+        self.assertIs(model.get_node_object('X'), node_x)
+        self.assertIs(model.get_interface_object('A-to-X', 'A'), int_a_x)
+        self.assertIn(int_a_x, node_a.interfaces(model))
+        self.assertIs(model.get_interface_object_from_nodes('A', 'X'), int_a_x)
+
+    def test_lookup_index_renamed_objects(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        int_a_b = model.get_interface_object('A-to-B', 'A')
+
+        model.change_interface_name('A', 'A-to-B', 'A-to-B_renamed')
+
+        self.assertIs(model.get_interface_object('A-to-B_renamed', 'A'), int_a_b)
+        with self.assertRaises(ModelException):
+            model.get_interface_object('A-to-B', 'A')
+
+        dmd_a_f_1 = model.get_demand_object('A', 'F', 'dmd_a_f_1')
+        dmd_a_f_1.name = 'dmd_a_f_renamed'
+        self.assertIs(model.get_demand_object('A', 'F', 'dmd_a_f_renamed'), dmd_a_f_1)
+        with self.assertRaises(ModelException):
+            model.get_demand_object('A', 'F', 'dmd_a_f_1')
+
+    def test_lookup_index_remove_and_add(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        lsp_a_d_1 = model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1')
+        self.assertEqual(len(model.parallel_lsp_groups()['A-D']), 2)
+
+        # Same number of LSPs, different LSPs
+        model.rsvp_lsp_objects.remove(lsp_a_d_1)
+        model.add_rsvp_lsp('B', 'C', 'lsp_b_c_1')
+
+        with self.assertRaises(ModelException):
+            model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1')
+        self.assertEqual(model.get_rsvp_lsp('B', 'C', 'lsp_b_c_1').lsp_name, 'lsp_b_c_1')
+        self.assertEqual(len(model.parallel_lsp_groups()['A-D']), 1)
+        self.assertEqual(len(model.parallel_lsp_groups()['B-C']), 1)
+
+        lsp_a_d_1.lsp_name = 'lsp_a_d_1_renamed'
+        model.rsvp_lsp_objects.add(lsp_a_d_1)
+        self.assertIs(model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1_renamed'), lsp_a_d_1)
+
+    def test_lookup_all_miss_does_not_rebuild(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        lsp_groups = model._index('lsp_groups')
+        self.assertNotIn(('A', 'F'), lsp_groups)
+
+        # Demands without LSPs find an empty group in the same index
+        self.assertEqual(model._lookup_all('lsp_groups', ('A', 'F')), [])
+        model.update_simulation()
+        self.assertIs(model._index('lsp_groups'), lsp_groups)
+
+        model.add_rsvp_lsp('A', 'F', 'lsp_a_f_1')
+        self.assertIs(model._index('lsp_groups'), lsp_groups)
+        self.assertEqual(model._lookup_all('lsp_groups', ('A', 'F')), [model.get_rsvp_lsp('A', 'F', 'lsp_a_f_1')])
+
+    def test_parallel_groups_track_added_objects(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        self.assertEqual(len(model.parallel_lsp_groups()['A-D']), 2)
+        self.assertEqual(len(model.parallel_demand_groups()['A-D']), 2)
+
+        model.add_rsvp_lsp('A', 'D', 'lsp_a_d_3')
+        model.add_demand('A', 'D', 10, 'dmd_a_d_3')
+        model.add_rsvp_lsp('B', 'C', 'lsp_b_c_1')
+
+        self.assertEqual(len(model.parallel_lsp_groups()['A-D']), 3)
+        self.assertEqual(len(model.parallel_demand_groups()['A-D']), 3)
+        self.assertEqual(model.parallel_lsp_groups()['B-C'], [model.get_rsvp_lsp('B', 'C', 'lsp_b_c_1')])
+        self.assertEqual(set(model.parallel_lsp_groups().keys()), {'A-D', 'F-E', 'B-C'})
+
+    def test_graph_cache(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        lsp_a_d_1 = model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1')
+
+        G = model._make_weighted_network_graph(include_failed_circuits=False)
+        self.assertIs(model._make_weighted_network_graph(include_failed_circuits=False), G)
+        self.assertIsNot(model._make_weighted_network_graph(include_failed_circuits=False, needed_bw=50), G)
+        self.assertEqual(lsp_a_d_1.effective_metric(model), 40)
+        self.assertIs(model._make_weighted_network_graph(include_failed_circuits=False), G)
+
+        # Topology changes rebuild the graph
+        model.get_interface_object('A-to-D', 'A').cost = 50
+        self.assertIsNot(model._make_weighted_network_graph(include_failed_circuits=False), G)
+        self.assertEqual(lsp_a_d_1.effective_metric(model), 40)
+
+        model.get_interface_object('A-to-B', 'A').cost = 100
+        self.assertEqual(lsp_a_d_1.effective_metric(model), 50)
+
+        model.fail_interface('A-to-D', 'A')
+        self.assertEqual(lsp_a_d_1.effective_metric(model), 60)
+
+        model.unfail_interface('A-to-D', 'A')
+        self.assertEqual(lsp_a_d_1.effective_metric(model), 50)
+
+    def test_graph_cache_versions(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        G = model._make_weighted_network_graph(include_failed_circuits=False)
+
+        # Simulating again, or editing another model, changes no topology
+        model.update_simulation()
+        other_model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        other_model.get_interface_object('A-to-D', 'A').cost = 50
+        self.assertIs(model._make_weighted_network_graph(include_failed_circuits=False), G)
+
+        # Graphs filtered on reservable bandwidth are not cached, so the
+        # cache stays bounded however many needed_bw values are asked for
+        for step in range(50):
+            model.get_shortest_path('A', 'D', needed_bw=step * 0.1)
+        G_10 = model._make_weighted_network_graph(include_failed_circuits=False, needed_bw=10)
+        self.assertTrue(G_10.has_edge('A', 'D'))
+        int_a_d = model.get_interface_object('A-to-D', 'A')
+        int_a_d.reserved_bandwidth = int_a_d.capacity
+        self.assertIs(model._make_weighted_network_graph(include_failed_circuits=False), G)
+        G_10 = model._make_weighted_network_graph(include_failed_circuits=False, needed_bw=10)
+        self.assertFalse(G_10.has_edge('A', 'D'))
+        for _ in range(3):
+            model.update_simulation()
+        self.assertLessEqual(len(model._graph_cache), 4)
+
+    def test_fork(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        model.add_srlg('srlg_g')
+        model.get_node_object('G').add_to_srlg('srlg_g', model)
+        utilization = {interface._key: interface.utilization for interface in model.interface_objects}
+
+        child = model.fork()
+        self.assertIsInstance(child, PerformanceModel)
+        self.assertEqual(child.get_interface_object('A-to-B', 'A').traffic, 0.0)
+        child.update_simulation()
+        self.assertEqual({interface._key: interface.utilization for interface in child.interface_objects},
+                         utilization)
+
+        child.fail_srlg('srlg_g')
+        child.get_interface_object('A-to-D', 'A').cost = 5
+        child.get_demand_object('A', 'F', 'dmd_a_f_1').traffic = 80
+        child.update_simulation()
+        self.assertTrue(child.get_node_object('G').failed)
+        self.assertTrue(child.get_interface_object('B-to-G', 'B').failed)
+        self.assertEqual(child.get_interface_object('A-to-D', 'A').traffic, 80)
+
+        # The parent's state and simulation results are untouched
+        self.assertFalse(model.get_srlg_object('srlg_g').failed)
+        self.assertFalse(model.get_node_object('G').failed)
+        self.assertFalse(model.get_interface_object('B-to-G', 'B').failed)
+        self.assertEqual(model.get_interface_object('A-to-D', 'A').cost, 40)
+        self.assertEqual(model.get_demand_object('A', 'F', 'dmd_a_f_1').traffic, 40)
+        self.assertEqual({interface._key: interface.utilization for interface in model.interface_objects},
+                         utilization)
+        self.assertIs(child.get_interface_object('A-to-D', 'A').node_object, child.get_node_object('A'))
+
+    def test_fork_lsps(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        lsp_paths = {lsp._key: lsp.path for lsp in model.rsvp_lsp_objects}
+
+        child = model.fork()
+        self.assertEqual([lsp.path for lsp in child.rsvp_lsp_objects],
+                         ['Unrouted - initial'] * len(lsp_paths))
+        child.fail_interface('A-to-B', 'A')
+        child.update_simulation()
+        for lsp in child.rsvp_lsp_objects:
+            if lsp.path != 'Unrouted':
+                self.assertTrue(all(interface in child.interface_objects for interface in lsp.path['interfaces']))
+        self.assertEqual({lsp._key: lsp.path for lsp in model.rsvp_lsp_objects}, lsp_paths)
+
+    def test_checkpoint_rollback(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.add_srlg('srlg_g')
+        model.update_simulation()
+        model.get_node_object('G').add_to_srlg('srlg_g', model)
+
+        def state():
+            return ({interface._key: (interface.failed, interface.cost, interface.traffic,
+                                      interface.reserved_bandwidth) for interface in model.interface_objects},
+                    {node.name: node.failed for node in model.node_objects},
+                    {demand._key: (demand.traffic, demand.path) for demand in model.demand_objects},
+                    {lsp._key: (lsp.path, lsp.reserved_bandwidth) for lsp in model.rsvp_lsp_objects})
+
+        baseline = state()
+        start = model.checkpoint()
+
+        model.fail_interface('A-to-B', 'A')
+        model.get_interface_object('A-to-D', 'A').cost = 5
+        model.get_demand_object('A', 'D', 'dmd_a_d_1').traffic = 50
+        model.update_simulation()
+        failed_a_b = model.checkpoint()
+        after_edits = state()
+        self.assertNotEqual(after_edits, baseline)
+
+        model.fail_srlg('srlg_g')
+        model.update_simulation()
+        self.assertTrue(model.get_interface_object('B-to-G', 'B').failed)
+
+        model.rollback(failed_a_b)
+        self.assertEqual(state(), after_edits)
+        self.assertFalse(model.get_srlg_object('srlg_g').failed)
+
+        model.rollback(start)
+        self.assertEqual(state(), baseline)
+
+        with self.assertRaises(ModelException):
+            model.rollback(failed_a_b)
+
+        model.release_checkpoints()
+        model.fail_interface('A-to-B', 'A')
+        with self.assertRaises(ModelException):
+            model.rollback(start)
+
+    def test_checkpoint_journal_per_model(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        start = model.checkpoint()
+
+        # Simulation results are recorded once per checkpoint
+        for _ in range(5):
+            model.update_simulation()
+        self.assertEqual(len(model._tracker.journal), start + 1)
+
+        child = model.fork()
+        model.get_interface_object('A-to-B', 'A').cost = 7
+        child.get_interface_object('A-to-B', 'A').cost = 9
+        model.rollback(start)
+        self.assertEqual(model.get_interface_object('A-to-B', 'A').cost, 20)
+        self.assertEqual(child.get_interface_object('A-to-B', 'A').cost, 9)
+        self.assertIsNone(child._tracker.journal)
+
+    def test_rollback_keeps_settings(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        traffic = {interface._key: interface.traffic for interface in model.interface_objects}
+        start = model.checkpoint()
+
+        model.fail_interface('A-to-B', 'A')
+        model.update_simulation()
+        model.routing_engine = 'native'
+        model.lsp_rerouting = 'incremental'
+        demand = model.get_demand_object('A', 'D', 'dmd_a_d_1')
+        demand.name = 'renamed'
+        model.rollback(start)
+
+        # Only the simulation results and the journaled edits are undone
+        self.assertEqual(model.routing_engine, 'native')
+        self.assertEqual(model.lsp_rerouting, 'incremental')
+        self.assertEqual(demand.name, 'renamed')
+        self.assertIs(model.get_demand_object('A', 'D', 'renamed'), demand)
+        self.assertFalse(model.get_interface_object('A-to-B', 'A').failed)
+        self.assertEqual({interface._key: interface.traffic for interface in model.interface_objects}, traffic)
+        self.assertIsNotNone(model._tracker)
+
+    def test_batch_defers_validation(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        validations = []
+        validate_model = model.validate_model
+
+        def counting_validate_model():
+            validations.append(1)
+            return validate_model()
+        model.validate_model = counting_validate_model
+
+        with model.batch():
+            model.add_node(Node('X'))
+            with model.batch():
+                model.add_circuit(model.get_node_object('A'), model.get_node_object('X'), 'A-to-X', 'X-to-A')
+            model.add_demand('A', 'X', 10, 'dmd_a_x')
+            model.add_rsvp_lsp('A', 'X', 'lsp_a_x')
+            self.assertEqual(validations, [])
+        self.assertEqual(validations, [1])
+
+        model.update_simulation()
+        self.assertEqual(model.get_interface_object('A-to-X', 'A').traffic, 10)
+
+    def test_batch_keeps_indexes(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        node_index = model._index('node')
+        demand_index = model._index('demand')
+
+        with model.batch():
+            for number in range(100):
+                model.add_node(Node('X{}'.format(number)))
+                model.add_demand('A', 'X{}'.format(number), 10, 'dmd_a_x')
+            with self.assertRaises(ModelException):
+                model.add_demand('A', 'X0', 10, 'dmd_a_x')
+            with self.assertRaises(ModelException):
+                model.add_node(Node('X99'))
+
+        # The indexes were updated in place, not rebuilt
+        self.assertIs(model._index('node'), node_index)
+        self.assertIs(model._index('demand'), demand_index)
+        self.assertEqual(len(demand_index), 101)
+        self.assertIs(model.get_node_object('X99'), node_index['X99'])
+
+    def test_batch_rollback(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        num_interfaces = len(model.interface_objects)
+
+        with self.assertRaises(ModelException):
+            with model.batch():
+                model.add_node(Node('X'))
+                model.add_circuit(model.get_node_object('A'), model.get_node_object('X'), 'A-to-X', 'X-to-A')
+                model.add_demand('A', 'X', 10, 'dmd_a_x')
+                model.add_demand('A', 'Z', 10, 'dmd_a_z')
+
+        self.assertEqual(len(model.interface_objects), num_interfaces)
+        self.assertEqual(len(model.demand_objects), 1)
+        with self.assertRaises(ModelException):
+            model.get_node_object('X')
+        model.add_demand('A', 'F', 10, 'dmd_a_f_2')
+        self.assertEqual(len(model.demand_objects), 2)
+
+    def test_add_in_bulk(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+
+        demands = model.add_demands([('A', 'B', 10, 'dmd_a_b'), ('B', 'A', 5, 'dmd_b_a')])
+        self.assertEqual(set(demands), set([model.get_demand_object('A', 'B', 'dmd_a_b'),
+                                            model.get_demand_object('B', 'A', 'dmd_b_a')]))
+
+        with self.assertRaises(ModelException) as context:
+            model.add_demands([('A', 'C', 10, 'dmd_a_c'), ('A', 'B', 10, 'dmd_a_b'), ('A', 'Z', 10, 'dmd_a_z'),
+                               ('A', 'C', 10, 'dmd_a_c')])
+        message, errors = context.exception.args[0]
+        self.assertEqual(message, '3 of the Demands could not be added')
+        self.assertEqual([row for row, error in errors],
+                         [('A', 'B', 10, 'dmd_a_b'), ('A', 'Z', 10, 'dmd_a_z'), ('A', 'C', 10, 'dmd_a_c')])
+        self.assertEqual(len(model.demand_objects), 3)
+
+        lsps = model.add_rsvp_lsps([('A', 'F', 'lsp_a_f_1'), ('A', 'F', 'lsp_a_f_2')])
+        self.assertEqual(len(lsps), 2)
+        with self.assertRaises(ModelException):
+            model.add_rsvp_lsps([('A', 'F', 'lsp_a_f_3'), ('A', 'F', 'lsp_a_f_1')])
+        self.assertEqual(len(model.rsvp_lsp_objects), 2)
+
+        # A failed bulk add inside a batch adds nothing, even if the batch goes on
+        with model.batch():
+            model.add_node(Node('X'))
+            with self.assertRaises(ModelException):
+                model.add_circuits([{'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X', 'interface_b': 'X-to-A'},
+                                    {'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X', 'interface_b': 'X-to-A2'}])
+            model.add_circuits([{'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X', 'interface_b': 'X-to-A',
+                                 'cost_a': 5, 'capacity': 50}])
+        self.assertEqual(model.get_interface_object('A-to-X', 'A').cost, 5)
+        self.assertEqual(model.get_interface_object('X-to-A', 'X').capacity, 50)
+        self.assertEqual(len(model.get_node_object('X').interfaces(model)), 1)
+
+    def test_add_circuits_flex_model(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_test_topology_igp_only.csv')
+        model.update_simulation()
+        model.add_node(Node('X'))
+
+        with self.assertRaises(ModelException):
+            model.add_circuits([{'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X', 'interface_b': 'X-to-A'}])
+        model.add_circuits([{'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X_1', 'interface_b': 'X-to-A_1',
+                             'circuit_id': 'a_x_1'},
+                            {'node_a': 'A', 'node_b': 'X', 'interface_a': 'A-to-X_2', 'interface_b': 'X-to-A_2',
+                             'circuit_id': 'a_x_2'}])
+        model.update_simulation()
+        self.assertEqual(len(model.get_node_object('X').interfaces(model)), 2)
+
+    def test_multiple_links_between_nodes(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        self.assertEqual(model.multiple_links_between_nodes(), [])
+
+        node_a = model.get_node_object('A')
+        node_b = model.get_node_object('B')
+        model.interface_objects.add(Interface('A-to-B_2', 10, 100, node_a, node_b, 90))
+        model.interface_objects.add(Interface('B-to-A_2', 10, 100, node_b, node_a, 90))
+        self.assertEqual(model.multiple_links_between_nodes(), ['A-B', 'A-B', 'B-A', 'B-A'])
+
+        with self.assertRaises(ModelException) as context:
+            model.validate_model()
+        self.assertIn({'multiple links between nodes detected; not allowed in Model object(use Parallel_Link_Model)':
+                       ['A-B', 'A-B', 'B-A', 'B-A']}, context.exception.args[0][1])
+
+    def test_load_model_file_duplicates(self):
+        model_file = 'test/igp_routing_topology.csv'
+        with open(model_file) as f:
+            lines = f.read().splitlines()
+        lines[2:2] = [lines[3]]  # a second B-to-A
+        lines += ['A\tF\t20\tdmd_a_f_1', 'A\tB\t20\tdmd_a_b_1', '', 'RSVP_LSP_TABLE', 'source\tdest\tname',
+                  'A\tF\tlsp_a_f_1', 'A\tF\tlsp_a_f_1\t10']
+
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = os.path.join(directory, 'model.csv')
+            with open(data_file, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                model = PerformanceModel.load_model_file(data_file)
+
+        self.assertEqual(len(model.interface_objects), 18)
+        self.assertEqual(model.get_demand_object('A', 'F', 'dmd_a_f_1').traffic, 40)
+        self.assertEqual(len(model.demand_objects), 2)
+        self.assertIsNone(model.get_rsvp_lsp('A', 'F', 'lsp_a_f_1').configured_setup_bandwidth)
+        self.assertIs(model.get_demand_object('A', 'B', 'dmd_a_b_1').source_node_object, model.get_node_object('A'))
+        self.assertEqual(model.get_node_object('G').lat, 30)
+        printed = output.getvalue()
+        self.assertIn("disregarding line 4\n", printed)
+        self.assertIn("disregarding line 35\n", printed)
+        self.assertIn("disregarding line 41\n", printed)
+
+    def test_snapshot(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_w_lsps.csv')
+        model.add_srlg('srlg_g')
+        model.get_node_object('G').add_to_srlg('srlg_g', model)
+        model.fail_interface('A-to-B_2', 'A')
+        model.update_simulation()
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_file = os.path.join(directory, 'model.snapshot')
+            model.save_snapshot(snapshot_file)
+            loaded = FlexModel.load_snapshot(snapshot_file)
+            with self.assertRaises(ModelException):
+                PerformanceModel.load_snapshot(snapshot_file)
+
+        self.assertEqual({interface._key: (interface.failed, interface.traffic, interface.reserved_bandwidth)
+                          for interface in loaded.interface_objects},
+                         {interface._key: (interface.failed, interface.traffic, interface.reserved_bandwidth)
+                          for interface in model.interface_objects})
+        self.assertEqual(len(loaded.circuit_objects), len(model.circuit_objects))
+        self.assertIn(loaded.get_node_object('G'), loaded.get_srlg_object('srlg_g').node_objects)
+        for lsp in model.rsvp_lsp_objects:
+            loaded_lsp = loaded.get_rsvp_lsp(lsp.source_node_object.name, lsp.dest_node_object.name, lsp.lsp_name)
+            self.assertEqual(loaded_lsp.reserved_bandwidth, lsp.reserved_bandwidth)
+            if lsp.path == 'Unrouted':
+                self.assertEqual(loaded_lsp.path, 'Unrouted')
+            else:
+                self.assertEqual([interface._key for interface in loaded_lsp.path['interfaces']],
+                                 [interface._key for interface in lsp.path['interfaces']])
+        for demand in model.demand_objects:
+            loaded_demand = loaded.get_demand_object(demand.source_node_object.name, demand.dest_node_object.name,
+                                                     demand.name)
+            self.assertEqual(sorted(repr(path) for path in loaded_demand.path),
+                             sorted(repr(path) for path in demand.path))
+        interface = model.get_interface_object('A-to-B', 'A')
+        self.assertEqual(
+            sorted(repr(demand) for demand in loaded.get_interface_object('A-to-B', 'A').demands(loaded)),
+            sorted(repr(demand) for demand in interface.demands(model)))
+
+    def test_snapshot_without_simulation(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_file = os.path.join(directory, 'model.snapshot')
+            model.save_snapshot(snapshot_file, simulation=False)
+            loaded = PerformanceModel.load_snapshot(snapshot_file)
+            with open(snapshot_file, 'wb') as f:
+                f.write(b'not a snapshot')
+            with self.assertRaises(ModelException):
+                PerformanceModel.load_snapshot(snapshot_file)
+
+        self.assertEqual(set(interface.traffic for interface in loaded.interface_objects), {0})
+        self.assertEqual(set(demand.path for demand in loaded.demand_objects), {'Unrouted'})
+        loaded.update_simulation()
+        self.assertEqual({interface._key: interface.traffic for interface in loaded.interface_objects},
+                         {interface._key: interface.traffic for interface in model.interface_objects})
+
+    def test_save_model(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_w_lsps.csv')
+        model.update_simulation()
+        model.get_node_object('G').add_to_srlg('srlg_g', model, create_if_not_present=True)
+        model.get_interface_object('A-to-B_2', 'A').add_to_srlg('srlg_a_b', model, create_if_not_present=True)
+        model.get_node_object('G').lat = 30.5
+        model.get_demand_object('A', 'B', 'dmd_a_b_1').traffic = 12.5
+        model.get_interface_object('A-to-C', 'A').percent_reservable_bandwidth = 80.5
+
+        def definitions(model):
+            return ({interface._key: (interface.remote_node_object.name, interface.cost, interface.capacity,
+                                      interface.circuit_id, interface.rsvp_enabled,
+                                      interface.percent_reservable_bandwidth,
+                                      sorted(srlg.name for srlg in interface.srlgs))
+                     for interface in model.interface_objects},
+                    {node.name: (node.lat, node.lon, sorted(srlg.name for srlg in node.srlgs))
+                     for node in model.node_objects},
+                    {demand._key: demand.traffic for demand in model.demand_objects},
+                    {lsp._key: lsp.configured_setup_bandwidth for lsp in model.rsvp_lsp_objects})
+
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = os.path.join(directory, 'model.csv')
+            model.save_model(data_file)
+            loaded = FlexModel.load_model_file(data_file)
+
+        self.assertEqual(definitions(loaded), definitions(model))
+        self.assertEqual(loaded.get_srlg_object('srlg_g').node_objects, {loaded.get_node_object('G')})
+        loaded.update_simulation()
+        loaded.fail_srlg('srlg_a_b')
+        self.assertTrue(loaded.get_interface_object('B-to-A_2', 'B').failed)
+
+    def test_save_model_bad_name(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.add_demand('A', 'B', 10, 'dmd a b')
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ModelException):
+                model.save_model(os.path.join(directory, 'model.csv'))
@@ -0,0 +1,79 @@
+import unittest
+
+from pyNTM import FailureSweep
+from pyNTM import ModelException
+from pyNTM import MonteCarloFailures
+from pyNTM import PerformanceModel
+from pyNTM import ScenarioExecutor
+
+
+class TestMonteCarloFailures(unittest.TestCase):
+
+    def _model(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        return model
+
+    def test_failure_probability(self):
+        model = self._model()
+        circuit = model.get_circuit_object_from_interface('A-to-B', 'A')
+        circuit.failure_probability = 0.25
+        self.assertEqual(model.get_interface_object('B-to-A', 'B').failure_probability, 0.25)
+
+        model.update_simulation()
+        self.assertEqual(model.get_circuit_object_from_interface('B-to-A', 'B').failure_probability, 0.25)
+
+        for element in (model.get_node_object('A'), model.get_interface_object('A-to-B', 'A')):
+            with self.assertRaises(ModelException):
+                element.failure_probability = 1.5
+
+    def test_no_failures(self):
+        model = self._model()
+        baseline = {interface: interface.utilization for interface in model.interface_objects}
+
+        results = model.monte_carlo_failures(50, seed=1)
+        self.assertEqual(results['states'], {(): 50})
+        for interface, utilization in results['interfaces'].items():
+            self.assertAlmostEqual(utilization['mean'], baseline[interface], places=1)
+            self.assertEqual(utilization['p99'], utilization['mean'])
+            self.assertEqual(utilization['down_probability'], 0)
+
+    def test_distribution(self):
+        model = self._model()
+        model.get_circuit_object_from_interface('A-to-B', 'A').failure_probability = 0.5
+        model.get_node_object('G').failure_probability = 0.1
+        model.add_srlg('srlg_c')
+        model.get_interface_object('A-to-C', 'A').add_to_srlg('srlg_c', model)
+        model.get_srlg_object('srlg_c').failure_probability = 0.2
+
+        monte_carlo = MonteCarloFailures(model, seed=3)
+        results = monte_carlo.run(400, threshold=50)
+        self.assertEqual(sum(results['states'].values()), 400)
+        self.assertLessEqual(len(results['states']), 8)
+
+        # Check the summary against the utilization of each unique state
+        sweep = FailureSweep(model)
+        interface = model.get_interface_object('A-to-D', 'A')
+        values = []
+        for scenario, count in results['states'].items():
+            values += [sweep.run_scenario(scenario)['utilization'][interface]] * count
+        self.assertAlmostEqual(results['interfaces'][interface]['mean'], sum(values) / len(values))
+        self.assertEqual(results['interfaces'][interface]['p95'], sorted(values)[379])
+        self.assertEqual(results['interfaces'][interface]['exceed_probability'],
+                         len([value for value in values if value > 50]) / 400)
+
+        interface = model.get_interface_object('A-to-B', 'A')
+        self.assertEqual(results['interfaces'][interface]['down_probability'],
+                         sum(count for scenario, count in results['states'].items()
+                             if ('circuit', 'A-to-B', 'A') in scenario or
+                             ('circuit', 'B-to-A', 'B') in scenario) / 400)
+
+    def test_executor(self):
+        model = self._model()
+        model.get_node_object('E').failure_probability = 0.3
+        model.get_node_object('F').failure_probability = 0.3
+        expected = MonteCarloFailures(model, seed=5).run(100)
+
+        with ScenarioExecutor(model, processes=2) as executor:
+            results = MonteCarloFailures(model, seed=5).run(100, executor=executor)
+        self.assertEqual(results, expected)
@@ -0,0 +1,68 @@
+import unittest
+
+from pyNTM import FlexModel
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+
+
+class TestRoutingMatrix(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        self.model.update_simulation()
+        self.routing = self.model.routing_matrix()
+
+    def test_shape(self):
+        self.assertEqual(len(self.routing.interfaces), len(self.model.interface_objects))
+        self.assertEqual(len(self.routing.demands), len(self.model.demand_objects))
+        self.assertEqual(len(self.routing.column_offsets), len(self.model.demand_objects) + 1)
+
+    def test_lsp_demand_fractions(self):
+        dmd_a_d_1 = self.model.get_demand_object('A', 'D', 'dmd_a_d_1')
+        lsp_a_d_1 = self.model.get_rsvp_lsp('A', 'D', 'lsp_a_d_1')
+        lsp_a_d_2 = self.model.get_rsvp_lsp('A', 'D', 'lsp_a_d_2')
+
+        fractions = {}
+        for interface, demand, fraction in self.routing.entries():
+            if demand is dmd_a_d_1:
+                fractions[interface] = fraction
+
+        for interface in set(lsp_a_d_1.path['interfaces'] + lsp_a_d_2.path['interfaces']):
+            expected = 0.5 * ((interface in lsp_a_d_1.path['interfaces']) + (interface in lsp_a_d_2.path['interfaces']))
+            self.assertEqual(fractions[interface], expected)
+        self.assertEqual(len(fractions), len(set(lsp_a_d_1.path['interfaces'] + lsp_a_d_2.path['interfaces'])))
+
+    def test_evaluate_current_traffic(self):
+        results = self.routing.evaluate(self.routing.demand_traffic())
+
+        for interface, result in results.items():
+            self.assertAlmostEqual(result['traffic'], interface.traffic, delta=0.1)
+            self.assertEqual(result['utilization'], float('%.2f' % (result['traffic'] / interface.capacity * 100)))
+
+    def test_evaluate_scaled_traffic(self):
+        current = self.routing.interface_traffic(self.routing.demand_traffic())
+        doubled = self.routing.interface_traffic([2 * traffic for traffic in self.routing.demand_traffic()])
+
+        for row_id in range(len(self.routing.interfaces)):
+            self.assertAlmostEqual(doubled[row_id], 2 * current[row_id])
+
+    def test_bad_traffic_vector(self):
+        with self.assertRaises(ModelException):
+            self.routing.evaluate([10])
+
+    def test_igp_traffic_matches_simulation(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_test_topology_igp_only.csv')
+        model.update_simulation()
+        routing = model.routing_matrix()
+
+        new_traffic = {'dmd_a_e_1': 65, 'dmd_d_a_1': 12}
+        for demand in model.demand_objects:
+            demand.traffic = new_traffic.get(demand.name, 3 * demand.traffic)
+        results = routing.evaluate(routing.demand_traffic())
+
+        model.update_simulation()
+        for interface, result in results.items():
+            if interface.failed:
+                self.assertEqual(result['traffic'], 'Down')
+            else:
+                self.assertAlmostEqual(result['traffic'], interface.traffic, delta=0.05 * len(routing.demands))
@@ -0,0 +1,65 @@
+import unittest
+
+from pyNTM import FailureSweep
+from pyNTM import FlexModel
+from pyNTM import PerformanceModel
+from pyNTM import ScenarioExecutor
+from pyNTM.scenario_executor import pack_model, unpack_model
+
+
+class TestScenarioExecutor(unittest.TestCase):
+
+    def test_pack_model(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        model.update_simulation()
+        model.add_srlg('srlg_b_d')
+        model.get_interface_object('B-to-D', 'B').add_to_srlg('srlg_b_d', model)
+        model.get_node_object('G').add_to_srlg('srlg_b_d', model)
+        model.fail_interface('A-to-B', 'A')
+
+        interfaces, demands, arrays = pack_model(model)
+        new_model, new_interfaces, new_demands = unpack_model(PerformanceModel, arrays)
+
+        self.assertEqual([(interface._key, interface.cost, interface.capacity, interface.failed)
+                          for interface in interfaces],
+                         [(interface._key, interface.cost, interface.capacity, interface.failed)
+                          for interface in new_interfaces])
+        self.assertEqual([(demand._key, demand.traffic) for demand in demands],
+                         [(demand._key, demand.traffic) for demand in new_demands])
+        self.assertEqual(sorted(lsp._key for lsp in model.rsvp_lsp_objects),
+                         sorted(lsp._key for lsp in new_model.rsvp_lsp_objects))
+        self.assertEqual(sorted(interface._key for interface in
+                                new_model.get_srlg_object('srlg_b_d').interface_objects),
+                         [('B-to-D', 'B'), ('D-to-B', 'D')])
+        self.assertEqual([node.name for node in new_model.get_srlg_object('srlg_b_d').node_objects], ['G'])
+
+    def test_pack_model_circuit_ids(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_test_topology.csv')
+        model.update_simulation()
+
+        interfaces, demands, arrays = pack_model(model)
+        new_interfaces = unpack_model(FlexModel, arrays)[1]
+
+        self.assertEqual([(interface._key, interface.circuit_id) for interface in interfaces],
+                         [(interface._key, interface.circuit_id) for interface in new_interfaces])
+
+    def test_matches_failure_sweep(self):
+        for model_class, model_file in ((PerformanceModel, 'test/igp_routing_topology.csv'),
+                                        (FlexModel, 'test/parallel_link_model_test_topology_igp_only.csv')):
+            model = model_class.load_model_file(model_file)
+            sweep = FailureSweep(model)
+            scenarios = sweep.scenarios(max_failures=2)
+            expected = sweep.run(scenarios)
+
+            with ScenarioExecutor(model, processes=2) as executor:
+                results = executor.run(scenarios, chunksize=5)
+
+            self.assertEqual(set(results['scenarios']), set(scenarios))
+            for scenario, worst in expected['scenarios'].items():
+                self.assertEqual(results['scenarios'][scenario]['max_utilization'], worst['max_utilization'])
+                self.assertEqual(set(results['scenarios'][scenario]['unrouted_demands']),
+                                 set(worst['unrouted_demands']))
+            self.assertEqual({interface: worst['max_utilization'] for interface, worst in
+                              results['interfaces'].items()},
+                             {interface: worst['max_utilization'] for interface, worst in
+                              expected['interfaces'].items()})
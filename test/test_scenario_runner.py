@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import unittest
+from multiprocessing import cpu_count
+
+from pyNTM import FlexModel
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+from pyNTM import ScenarioRunner
+from pyNTM import load_scenarios
+from pyNTM.scenario_runner import ScenarioEvaluator
+
+SCENARIOS = [
+    {'name': 'baseline'},
+    {'name': 'failures', 'fail': [['circuit', 'A-to-B', 'A'], ['node', 'G']]},
+    {'name': 'overlay', 'demand_scale': 2, 'metrics': [['A-to-D', 'A', 5]]},
+    {'name': 'one demand', 'demand_scale': [['A', 'F', 'dmd_a_f_1', 3]]},
+    {'name': 'new circuit', 'add_circuits': [{'node_a': 'E', 'node_b': 'F', 'interface_a': 'E-to-F',
+                                              'interface_b': 'F-to-E', 'cost_a': 1, 'cost_b': 1,
+                                              'capacity': 50}],
+     'fail': [['circuit', 'A-to-D', 'A']]},
+    {'name': 'bad node', 'fail': [['node', 'Z']]},
+]
+
+
+class TestScenarioRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.scenario_file = os.path.join(self.directory, 'scenarios.jsonl')
+        self.results_file = os.path.join(self.directory, 'results.jsonl')
+        with open(self.scenario_file, 'w') as scenario_file:
+            for scenario in SCENARIOS:
+                scenario_file.write(json.dumps(scenario) + '\n\n')
+
+    def _results(self):
+        with open(self.results_file) as results_file:
+            return {result['name']: result for result in (json.loads(line) for line in results_file)}
+
+    def _simulated_utilization(self, apply_scenario):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        apply_scenario(model)
+        model.update_simulation()
+        return sorted([interface.name, interface.node_object.name,
+                       None if interface.failed else interface.utilization]
+                      for interface in model.interface_objects)
+
+    def test_load_scenarios(self):
+        scenarios = list(load_scenarios(self.scenario_file))
+        self.assertEqual(scenarios, SCENARIOS)
+
+        with open(self.scenario_file, 'w') as scenario_file:
+            scenario_file.write('{"fail": []}\n{"metric": []}\n')
+        self.assertEqual(next(load_scenarios(self.scenario_file)), {'name': '1', 'fail': []})
+        with self.assertRaises(ModelException) as context:
+            list(load_scenarios(self.scenario_file))
+        self.assertIn('line 2', context.exception.args[0])
+
+    def test_run(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        model.update_simulation()
+        utilization = {interface: interface.utilization for interface in model.interface_objects}
+
+        count = ScenarioRunner(model, processes=1).run(load_scenarios(self.scenario_file), self.results_file)
+        self.assertEqual(count, len(SCENARIOS))
+        results = self._results()
+
+        def overlay(model):
+            for demand in model.demand_objects:
+                demand.traffic = demand.traffic * 2
+            model.get_interface_object('A-to-D', 'A').cost = 5
+
+        def new_circuit(model):
+            model.add_circuit(model.get_node_object('E'), model.get_node_object('F'), 'E-to-F', 'F-to-E',
+                              1, 1, 50)
+            model.fail_interface('A-to-D', 'A')
+
+        self.assertEqual(results['baseline']['utilization'], self._simulated_utilization(lambda model: None))
+        self.assertEqual(results['overlay']['utilization'], self._simulated_utilization(overlay))
+        self.assertEqual(results['new circuit']['utilization'], self._simulated_utilization(new_circuit))
+        self.assertIn('No node with name Z', results['bad node']['error'])
+        self.assertEqual(max(util for name, node, util in results['failures']['utilization']
+                             if util is not None), results['failures']['max_utilization'])
+
+        # The overlays are taken off again
+        self.assertEqual({interface: interface.utilization for interface in model.interface_objects}, utilization)
+        self.assertEqual(len(model.interface_objects), 18)
+        self.assertEqual(model.get_demand_object('A', 'F', 'dmd_a_f_1').traffic, 40)
+
+    def test_processes(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        ScenarioRunner(model, processes=1).run(load_scenarios(self.scenario_file), self.results_file)
+        expected = self._results()
+
+        ScenarioRunner(model, processes=2).run(load_scenarios(self.scenario_file), self.results_file)
+        self.assertEqual(self._results(), expected)
+
+        ScenarioRunner(model).run(load_scenarios(self.scenario_file), self.results_file)
+        self.assertEqual(self._results(), expected)
+        self.assertEqual(ScenarioRunner(model).processes, cpu_count())
+
+    def test_processes_keep_circuit_ids(self):
+        scenarios = [{'name': 'new circuit', 'add_circuits': [{'node_a': 'A', 'node_b': 'G', 'interface_a': 'A-to-G',
+                                                               'interface_b': 'G-to-A', 'capacity': 100,
+                                                               'circuit_id': 3}]}]
+        results = []
+        for processes in (1, 2):
+            model = FlexModel.load_model_file('test/parallel_link_model_test_topology_igp_only.csv')
+            results.append([json.loads(result) for result in ScenarioRunner(model, processes).results(scenarios)])
+        self.assertNotIn('error', results[0][0])
+        self.assertEqual(results[1], results[0])
+
+    def test_overlay_teardown(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        evaluator = ScenarioEvaluator(model)
+        baseline = {interface: interface.traffic for interface in model.interface_objects}
+        num_circuits = len(model.circuit_objects)
+
+        result = evaluator.evaluate(SCENARIOS[4])
+        self.assertIn(['E-to-F', 'E', 80.0], result['utilization'])
+
+        # Neither the added circuit nor the overlay's results are left behind
+        self.assertEqual(len(model.circuit_objects), num_circuits)
+        self.assertEqual(model.get_node_object('E').interfaces(model),
+                         [interface for interface in model.interface_objects if interface.node_object.name == 'E'])
+        self.assertEqual({interface: interface.traffic for interface in model.interface_objects}, baseline)
+        self.assertFalse(model.get_interface_object('A-to-D', 'A').failed)
+        self.assertIsNone(model._tracker.journal)
+
+    def test_failures_evaluated_like_overlays(self):
+        model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        evaluator = ScenarioEvaluator(model)
+        fail = [['circuit', 'A-to-B', 'A']]
+        cost = model.get_interface_object('A-to-D', 'A').cost
+
+        # A failure gives the same result with or without other changes
+        failed = evaluator.evaluate({'name': 'failed', 'fail': fail})
+        no_op_metric = evaluator.evaluate({'name': 'failed', 'fail': fail, 'metrics': [['A-to-D', 'A', cost]]})
+        self.assertEqual(failed, no_op_metric)
+
+        simulated = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        simulated.update_simulation()
+        simulated.fail_interface('A-to-B', 'A')
+        simulated.update_simulation()
+        utilization = sorted([interface.name, interface.node_object.name,
+                              None if interface.failed else interface.utilization]
+                             for interface in simulated.interface_objects)
+        self.assertEqual(failed['utilization'], utilization)
+
+    def test_malformed_scenarios(self):
+        model = PerformanceModel.load_model_file('test/igp_routing_topology.csv')
+        evaluator = ScenarioEvaluator(model)
+        baseline = {interface: interface.traffic for interface in model.interface_objects}
+
+        malformed = [{'name': 'fail', 'fail': [['link', 'A-to-B', 'A']]},
+                     {'name': 'fail', 'fail': [['circuit', 'A-to-B']]},
+                     {'name': 'demand_scale', 'demand_scale': '2'},
+                     {'name': 'demand_scale', 'demand_scale': [['A', 'F', 3]]},
+                     {'name': 'metrics', 'metrics': [['A-to-D', 'A', '5']]},
+                     {'name': 'add_circuits', 'add_circuits': [{'node_a': 'E', 'node_b': 'F'}]},
+                     {'name': 'fields', 'metric': []}]
+        for scenario in malformed:
+            result = evaluator.evaluate(scenario)
+            self.assertEqual(list(result), ['name', 'error'])
+            self.assertTrue(result['error'].startswith('ModelException'))
+            self.assertIn(scenario['name'], result['error'])
+
+        # Errors that are not in the scenario are not hidden
+        with self.assertRaises(AttributeError):
+            evaluator.evaluate(['circuit', 'A-to-B', 'A'])
+
+        self.assertEqual({interface: interface.traffic for interface in model.interface_objects}, baseline)
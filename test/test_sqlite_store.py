@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from pyNTM import FlexModel
+from pyNTM import ModelException
+from pyNTM import PerformanceModel
+from pyNTM import SQLiteStore
+
+
+class TestSQLiteStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.model = PerformanceModel.load_model_file('test/model_test_topology.csv')
+        self.model.update_simulation()
+        self.model.fail_interface('A-to-B', 'A')
+        self.model.update_simulation()
+        self.directory = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.directory, 'model.db')
+        self.model.save_sqlite_store(self.db_file)
+        self.store = SQLiteStore(self.db_file)
+
+    @classmethod
+    def tearDownClass(self):
+        self.store.close()
+        os.remove(self.db_file)
+        os.rmdir(self.directory)
+
+    def test_interfaces_over(self):
+        expected = sorted((interface.name, interface.node_object.name) for interface in self.model.interface_objects
+                          if not interface.failed and interface.utilization > 50)
+        rows = self.store.interfaces_over(50)
+        self.assertEqual(sorted((row['name'], row['node']) for row in rows), expected)
+        self.assertEqual([row['utilization'] for row in rows],
+                         sorted((row['utilization'] for row in rows), reverse=True))
+
+    def test_demands_on_interface(self):
+        for interface in self.model.interface_objects:
+            rows = self.store.demands_on_interface(interface.name, interface.node_object.name)
+            expected = {demand._key: traffic for demand, traffic in interface.traffic_per_demand(self.model).items()}
+            self.assertEqual({(row['source'], row['dest'], row['name']): row['traffic_on_interface'] for row in rows},
+                             {key: traffic for key, traffic in expected.items()})
+
+        with self.assertRaises(ModelException):
+            self.store.demands_on_interface('A-to-Z', 'A')
+
+    def test_lsps(self):
+        rows = self.store.lsps_from_node('A')
+        self.assertEqual(sorted(row['name'] for row in rows),
+                         sorted(lsp.lsp_name for lsp in self.model.rsvp_lsp_objects
+                                if lsp.source_node_object.name == 'A'))
+
+        for interface in self.model.interface_objects:
+            rows = self.store.lsps_on_interface(interface.name, interface.node_object.name)
+            self.assertEqual(sorted(row['name'] for row in rows),
+                             sorted(lsp.lsp_name for lsp in interface.lsps(self.model)))
+
+    def test_failed_interface(self):
+        rows = self.store.query('SELECT traffic, utilization, failed FROM interfaces WHERE name = ?', ('A-to-B',))
+        self.assertEqual(rows, [{'traffic': None, 'utilization': None, 'failed': 1}])
+
+    def test_flex_model_and_resave(self):
+        model = FlexModel.load_model_file('test/parallel_link_model_w_lsps.csv')
+        model.update_simulation()
+        model.save_sqlite_store(self.db_file)
+        model.save_sqlite_store(self.db_file)
+        with SQLiteStore(self.db_file) as store:
+            self.assertEqual(store.model_family, 'FlexModel')
+            self.assertEqual(store.query('SELECT COUNT(*) AS count FROM interfaces'),
+                             [{'count': len(model.interface_objects)}])
+            self.assertEqual(len(store.unrouted_demands()),
+                             len([demand for demand in model.demand_objects if demand.path == 'Unrouted']))
+        self.model.save_sqlite_store(self.db_file)
+
+    def test_not_a_store(self):
+        bad_file = os.path.join(self.directory, 'bad.db')
+        with open(bad_file, 'wb') as f:
+            f.write(b'not a database' * 100)
+        with self.assertRaises(ModelException):
+            SQLiteStore(bad_file)
+        os.remove(bad_file)
@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 
 from pyNTM import find_end_index
+from pyNTM import read_model_tables
 
 
 class TestUtilities(unittest.TestCase):
@@ -12,3 +15,24 @@ class TestUtilities(unittest.TestCase):
     def test_find_end_index(self):
         end_index = find_end_index(0, self.lines)
         self.assertEqual(1, end_index)
+
+    def test_read_model_tables(self):
+        rows = list(read_model_tables('test/igp_routing_topology.csv'))
+
+        self.assertEqual([table for table, line_index, line in rows], [0] * 18 + [1] * 7 + [2])
+        self.assertEqual(rows[0], (0, 2, 'A\tB\tA-to-B\t20\t125'))
+        self.assertEqual(rows[18], (1, 23, 'A\t50\t0'))
+        self.assertEqual(rows[-1], (2, 33, 'A\tF\t40\tdmd_a_f_1'))
+
+    def test_read_model_tables_srlg_table(self):
+        lines = ['INTERFACES_TABLE', 'header', 'A\tB\tA-to-B\t20\t125', '', 'NODES_TABLE', 'header', '',
+                 'DEMANDS_TABLE', 'header', '', 'RSVP_LSP_TABLE', 'header', 'A\tB\tlsp_a_b_1', '',
+                 'SRLG_TABLE', 'header', 'srlg_1\tA\tA-to-B', 'srlg_1\tB']
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = os.path.join(directory, 'model.csv')
+            with open(data_file, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            rows = list(read_model_tables(data_file))
+
+        self.assertEqual(rows, [(0, 2, 'A\tB\tA-to-B\t20\t125'), (3, 12, 'A\tB\tlsp_a_b_1'),
+                                (4, 16, 'srlg_1\tA\tA-to-B'), (4, 17, 'srlg_1\tB')])